@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+GraphRAG Benchmarks - Time and measure memory of each ingest and query stage
+
+Runs the real pipeline code on synthetic documents of a given number of sections,
+so that ingestion and retrieval changes can be compared run against run.
+
+Stages:
+    parse_pdf              - pdf_reader.parse_pdf on a generated PDF (--pdf-sections, --pdf-workers)
+    classify_lines         - the per-line filtering and section number detection of parse_pdf, in lines/s
+    extract_keywords       - utils.text_processing.extract_keywords on every section
+    embedding              - the embedding model on every section, one call each like ingest.py
+    upsert_section_nodes   - GraphRAGIngestion.upsert_section_nodes (includes keywords + embedding)
+    refresh_relationships  - GraphRAGIngestion.refresh_relationships
+    get_connected_nodes    - GraphRAGQuery.get_connected_nodes for --queries queries, LLM mocked out
+
+Usage (from the project root):
+    python src/benchmark.py --sections 1000 10000 --output before.json
+    python src/benchmark.py --sections 1000 10000 --output after.json
+    python src/benchmark.py --compare before.json after.json
+
+Graph:
+    By default an in-memory stand-in (utils/memory_graph.py) replaces Neo4j, which measures
+    our own code only. --neo4j-uri runs against a real database, which is CLEARED first, e.g.
+        docker run --rm -p 7687:7687 -e NEO4J_AUTH=neo4j/benchmark -e NEO4J_PLUGINS='["apoc"]' neo4j:5
+        python src/benchmark.py --neo4j-uri bolt://localhost:7687 --neo4j-password benchmark
+
+Models:
+    The real spaCy / SentenceTransformer models are used when installed, --stub-models uses
+    a hashing embedder and the regex keyword fallback so runs do not depend on model downloads.
+"""
+
+# Suppress warnings
+import warnings
+warnings.filterwarnings("ignore", category=FutureWarning, message=".*torch*")
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import textwrap
+import time
+import tracemalloc
+import zlib
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List
+from unittest import mock
+
+import numpy as np
+
+# utils.custom_logger writes to logs/log.log relative to the working directory
+os.makedirs("logs", exist_ok=True)
+
+VOCABULARY = """satellite ocean temperature humidity rainfall cyclone monsoon wind profile cloud radiance
+sensor imager sounder channel calibration archive product dataset parameter resolution swath orbit
+latitude longitude altitude pressure moisture aerosol vegetation index surface sea level wave height
+current forecast model assimilation validation algorithm retrieval processing download portal user
+account subscription format granule metadata catalogue search filter region period daily monthly
+composite anomaly climatology station buoy radar lightning precipitation flood drought heatwave
+snow glacier chlorophyll salinity albedo emissivity brightness infrared visible microwave water vapour""".split()
+
+HEADER = "Synthetic Benchmark Manual - Version 1.0"
+FOOTER = "Benchmark Corporation - Internal Use Only"
+LINES_PER_PAGE = 60
+EMBEDDING_DIMENSIONS = 384
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+
+def _section_ids():
+    """1, 1.1, 1.1.1 ... 1.1.10, 1.2, ... - chapters of 10 subsections of 10 sub-subsections."""
+    chapter = 0
+    while True:
+        chapter += 1
+        yield f"{chapter}"
+        for sub in range(1, 11):
+            yield f"{chapter}.{sub}"
+            for subsub in range(1, 11):
+                yield f"{chapter}.{sub}.{subsub}"
+
+
+def make_sections(count: int, seed: int = 42) -> List[Dict]:
+    """Return `count` sections in document order, with the fields pdf_reader writes to structured_content.json."""
+    rng = random.Random(seed)
+    sections = []
+    for index, section_id in enumerate(itertools.islice(_section_ids(), count)):
+        parts = section_id.split('.')
+        sections.append({
+            'id': section_id,
+            'title': ' '.join(rng.sample(VOCABULARY, rng.randint(2, 4))).capitalize(),
+            'level': len(parts),
+            'parent_id': '.'.join(parts[:-1]) or None,
+            'text': ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(40, 120))).capitalize() + '.',
+            'page_number': 4 + index // 5,
+            'is_toc_entry': len(parts) == 1,
+        })
+    return sections
+
+
+def write_structured_json(sections: List[Dict], path: str) -> None:
+    """Write sections the way pdf_reader.save_to_json does."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'title': 'Synthetic Benchmark Manual', 'sections': sections}, f, indent=2, ensure_ascii=False)
+
+
+def make_pdf(sections: List[Dict], path: str) -> None:
+    """Lay the sections out like the manuals parse_pdf expects: title page, table of contents on
+    pages 2-3, content from page 4, a repeated header and footer on every page."""
+    import fitz
+
+    # Content lines, and on which content page each section heading lands
+    pages, current, heading_pages = [], [], {}
+    for section in sections:
+        body = textwrap.wrap(section['text'], 90)
+        if len(current) + 2 > LINES_PER_PAGE:
+            pages.append(current)
+            current = []
+        heading_pages[section['id']] = len(pages) + 4
+        current.append(f"{section['id']} {section['title']}")
+        for line in body:
+            if len(current) >= LINES_PER_PAGE:
+                pages.append(current)
+                current = []
+            current.append(line)
+    if current:
+        pages.append(current)
+
+    # Only level 1 is listed, that is what parse_pdf relies on the TOC for
+    toc_lines = [f"{s['id']} {s['title']} {heading_pages[s['id']]}" for s in sections if s['level'] == 1]
+    toc_pages = [toc_lines[:LINES_PER_PAGE], toc_lines[LINES_PER_PAGE:2 * LINES_PER_PAGE]]
+
+    doc = fitz.open()
+    for lines in [["Synthetic Benchmark Manual"]] + toc_pages + pages:
+        page = doc.new_page()
+        page.insert_text((50, 30), HEADER, fontsize=8)
+        y = 50
+        for line in lines:
+            page.insert_text((50, y), line, fontsize=9)
+            y += 12.5
+        page.insert_text((50, 820), FOOTER, fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def make_page_lines(sections: List[Dict]) -> List[List[str]]:
+    """The stripped text lines of each content page make_pdf would produce, with a header, footer and page number."""
+    pages, current = [], []
+    for section in sections:
+        current.append(f"{section['id']} {section['title']}")
+        current.extend(textwrap.wrap(section['text'], 90))
+        if len(current) >= LINES_PER_PAGE:
+            pages.append([HEADER] + current + [FOOTER, str(len(pages) + 4)])
+            current = []
+    if current:
+        pages.append([HEADER] + current + [FOOTER, str(len(pages) + 4)])
+    return pages
+
+
+class HashingEmbedder:
+    """Stand-in for SentenceTransformer: deterministic bag-of-words vectors, no model download."""
+
+    def encode(self, sentences, show_progress_bar: bool = False, **kwargs):
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        return np.array([self._encode_one(s) for s in sentences])
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode('utf-8')) % EMBEDDING_DIMENSIONS] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def mock_llm_response(client_configured, prompt: str, **kwargs) -> str:
+    """Replaces utils.gemini_utils.call_chat_completion, no network call."""
+    return f"Mocked LLM response for a {len(prompt)} character prompt."
+
+
+# ---------------------------------------------------------------------------
+# Measuring
+# ---------------------------------------------------------------------------
+
+def _rss_mb() -> float:
+    """Current resident memory in MB, Linux only, None elsewhere."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        return None
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(results: Dict, stage: str, function, trace_memory: bool = False, **extra):
+    """Run `function`, record its latency and memory under results[stage] and return its result."""
+    print(f"\n⏱️  {stage}")
+    rss_before = _rss_mb()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        value = function()
+    finally:
+        seconds = time.perf_counter() - start
+        row = {'seconds': seconds, 'rss_mb': _rss_mb(), 'peak_rss_mb': _peak_rss_mb()}
+        if rss_before is not None and row['rss_mb'] is not None:
+            row['rss_delta_mb'] = row['rss_mb'] - rss_before
+        if trace_memory:
+            row['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            tracemalloc.stop()
+        row.update(extra)
+        results[stage] = row
+    return value
+
+
+def _latency_summary(latencies: List[float]) -> Dict:
+    ordered = sorted(latencies)
+    return {
+        'calls': len(ordered),
+        'median_seconds': statistics.median(ordered),
+        'p95_seconds': ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        'max_seconds': ordered[-1],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+def run_size(count: int, args, workdir: str) -> Dict:
+    """All stages for one document size, returns {stage: measurements}."""
+    from ingest import GraphRAGIngestion
+    from utils.text_processing import extract_keywords
+    from utils.ml_models import get_embedding_model
+    from utils.memory_graph import MemoryDriver
+    from utils.neo4j_utils import clear_database, create_basic_indexes
+    import ingest
+    import query
+
+    results = {}
+    print(f"\n{'=' * 60}\n📊 {count:,} sections\n{'=' * 60}")
+    sections = make_sections(count, seed=args.seed)
+    write_structured_json(sections, os.path.join(workdir, f"structured_content_{count}.json"))
+
+    with ExitStack() as stack:
+        if args.stub_models:
+            embedding_model = HashingEmbedder()
+            stack.enter_context(mock.patch('utils.text_processing.NLP_AVAILABLE', False))
+            stack.enter_context(mock.patch.object(query, 'get_spacy_model', lambda: None))
+        else:
+            embedding_model = get_embedding_model()
+            if embedding_model is None:
+                print("⚠️ Warning: Embedding model could not be loaded, using the hashing embedder")
+                embedding_model = HashingEmbedder()
+        stack.enter_context(mock.patch.object(ingest, 'get_embedding_model', lambda: embedding_model))
+        stack.enter_context(mock.patch.object(query, 'get_embedding_model', lambda: embedding_model))
+
+        # LLM mocked out, prompt construction still runs
+        stack.enter_context(mock.patch.object(query, 'get_gemini_client', lambda *a, **k: True))
+        stack.enter_context(mock.patch.object(query, 'call_chat_completion', mock_llm_response))
+
+        if not args.neo4j_uri:
+            driver = MemoryDriver()
+            graph_database = SimpleNamespace(driver=lambda *a, **k: driver)
+            stack.enter_context(mock.patch.object(ingest, 'GraphDatabase', graph_database))
+            stack.enter_context(mock.patch.object(query, 'GraphDatabase', graph_database))
+        uri = args.neo4j_uri or "bolt://memory"
+
+        if 'parse_pdf' not in args.skip:
+            from pdf_reader import parse_pdf
+            pdf_sections = sections[:args.pdf_sections]
+            pdf_path = os.path.join(workdir, f"synthetic_{len(pdf_sections)}.pdf")
+            make_pdf(pdf_sections, pdf_path)
+            document = measure(results, 'parse_pdf', lambda: parse_pdf(pdf_path, workers=args.pdf_workers), args.trace_memory,
+                               sections_in_pdf=len(pdf_sections))
+            results['parse_pdf']['sections_found'] = len(document.sections)
+
+        if 'classify_lines' not in args.skip:
+            from pdf_reader.pdf_parser import classify_page_lines
+            pages = make_page_lines(sections)
+            line_count = sum(len(lines) for lines in pages)
+            measure(results, 'classify_lines', lambda: [classify_page_lines(lines, {HEADER, FOOTER}) for lines in pages],
+                    args.trace_memory, items=line_count)
+
+        if 'extract_keywords' not in args.skip:
+            measure(results, 'extract_keywords', lambda: [extract_keywords(s['text']) for s in sections],
+                    args.trace_memory, items=count)
+
+        if 'embedding' not in args.skip:
+            measure(results, 'embedding', lambda: [embedding_model.encode(s['text']) for s in sections],
+                    args.trace_memory, items=count)
+
+        ingestion = GraphRAGIngestion(uri, args.neo4j_user, args.neo4j_password)
+        graph_rag = None
+        try:
+            if args.neo4j_uri:
+                print(f"⚠️ Clearing the database at {args.neo4j_uri}")
+                clear_database(ingestion.driver)
+                create_basic_indexes(ingestion.driver)
+
+            # upsert adds keywords/embeddings to the dicts it is given
+            to_upsert = [dict(s) for s in sections]
+            measure(results, 'upsert_section_nodes', lambda: ingestion.upsert_section_nodes(to_upsert),
+                    args.trace_memory, items=count)
+            measure(results, 'refresh_relationships', ingestion.refresh_relationships, args.trace_memory)
+
+            if 'get_connected_nodes' not in args.skip:
+                graph_rag = query.GraphRAGQuery(uri, args.neo4j_user, args.neo4j_password)
+                rng = random.Random(args.seed)
+                queries = [f"what is {s['title'].lower()} ?" for s in rng.sample(sections, min(args.queries, count))]
+                latencies, statuses = [], []
+
+                def run_queries():
+                    for q in queries:
+                        start = time.perf_counter()
+                        statuses.append(graph_rag.get_connected_nodes(q)['status'])
+                        latencies.append(time.perf_counter() - start)
+
+                measure(results, 'get_connected_nodes', run_queries, args.trace_memory, items=len(queries))
+                results['get_connected_nodes'].update(_latency_summary(latencies))
+                results['get_connected_nodes']['successful'] = statuses.count('success')
+        finally:
+            if graph_rag:
+                graph_rag.close()
+            ingestion.close()
+
+    return results
+
+
+def print_report(report: Dict) -> None:
+    print(f"\n{'=' * 60}\n📋 BENCHMARK RESULTS ({report['graph']}, {report['models']})\n{'=' * 60}")
+    for count, stages in report['runs'].items():
+        print(f"\n🔍 {int(count):,} sections")
+        for stage, row in stages.items():
+            line = f"   {stage:<24}{row['seconds']:>10.3f} s"
+            if row.get('items'):
+                line += f"  {row['items'] / row['seconds'] if row['seconds'] else 0:>10,.0f}/s"
+            if row.get('median_seconds') is not None:
+                line += f"  median {row['median_seconds'] * 1000:.1f} ms, p95 {row['p95_seconds'] * 1000:.1f} ms"
+            if row.get('rss_delta_mb') is not None:
+                line += f"  rss {row['rss_delta_mb']:+.1f} MB"
+            if row.get('traced_peak_mb') is not None:
+                line += f"  traced peak {row['traced_peak_mb']:.1f} MB"
+            print(line)
+        if 'parse_pdf' in stages:
+            pdf = stages['parse_pdf']
+            marker = "✅" if pdf['sections_found'] == pdf['sections_in_pdf'] else "❌"
+            print(f"   {marker} parse_pdf found {pdf['sections_found']} of {pdf['sections_in_pdf']} sections")
+
+
+def compare(before: Dict, after: Dict, threshold: float) -> bool:
+    """Print after/before for every stage in both reports, return True if any got slower than threshold."""
+    slower = False
+    print(f"\n📊 Comparison (after / before, slower than {threshold:.2f}x is flagged)")
+    for count, stages in after['runs'].items():
+        for stage, row in stages.items():
+            old = before['runs'].get(count, {}).get(stage)
+            if not old:
+                continue
+            ratio = row['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+            flagged = ratio > threshold
+            slower = slower or flagged
+            print(f"   {'❌' if flagged else '✅'} {int(count):>7,} {stage:<24}"
+                  f"{old['seconds']:>10.3f} s -> {row['seconds']:>10.3f} s  ({ratio:.2f}x)")
+    return slower
+
+
+def main():
+    """Main entry point for the benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark the GraphRAG ingest and query pipeline")
+    parser.add_argument('--sections', type=int, nargs='+', default=[1000], help="Document sizes, e.g. 1000 10000 100000")
+    parser.add_argument('--pdf-sections', type=int, default=1000, help="Sections in the generated PDF for parse_pdf")
+    parser.add_argument('--pdf-workers', type=int, default=int(os.getenv('PDF_PARSE_WORKERS', 1)), help="parse_pdf worker processes, default PDF_PARSE_WORKERS or 1 (in-process)")
+    parser.add_argument('--queries', type=int, default=20, help="get_connected_nodes calls per size")
+    parser.add_argument('--skip', nargs='*', default=[], choices=['parse_pdf', 'classify_lines', 'extract_keywords', 'embedding', 'get_connected_nodes'])
+    parser.add_argument('--stub-models', action='store_true', help="Hashing embedder and regex keywords instead of the ML models")
+    parser.add_argument('--trace-memory', action='store_true', help="Also record the tracemalloc peak per stage (slower)")
+    parser.add_argument('--neo4j-uri', default=os.getenv('NEO4J_BENCHMARK_URI'), help="Real Neo4j to use, it is cleared first")
+    parser.add_argument('--neo4j-user', default='neo4j')
+    parser.add_argument('--neo4j-password', default=os.getenv('NEO4J_BENCHMARK_PASSWORD', 'benchmark'))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the results as JSON here")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="Compare two --output files and exit")
+    parser.add_argument('--threshold', type=float, default=1.15)
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding='utf-8') as f:
+            before = json.load(f)
+        with open(args.compare[1], encoding='utf-8') as f:
+            after = json.load(f)
+        sys.exit(1 if compare(before, after, args.threshold) else 0)
+
+    print("🚀 Starting GraphRAG benchmarks...")
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'graph': 'neo4j' if args.neo4j_uri else 'memory',
+        'models': 'stub' if args.stub_models else 'real',
+        'seed': args.seed,
+        'runs': {},
+    }
+    with tempfile.TemporaryDirectory(prefix="graphrag-benchmark-") as workdir:
+        for count in args.sections:
+            report['runs'][str(count)] = run_size(count, args, workdir)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
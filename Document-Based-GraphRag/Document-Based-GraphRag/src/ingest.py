@@ -8,9 +8,11 @@ import warnings
 warnings.filterwarnings("ignore", category=FutureWarning, message=".*torch*")
 
 import json
+from itertools import islice
 from neo4j import GraphDatabase
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator
 from tqdm import tqdm
+from pdf_reader.output_utils import iter_jsonl
 from utils.custom_logger import get_logger
 from utils.text_processing import extract_keywords
 from utils.ml_models import get_embedding_model
@@ -18,6 +20,15 @@ from utils.neo4j_utils import clear_database as util_clear_db, create_basic_inde
 
 logger = get_logger()
 
+# Sections keyword-extracted, embedded and written to Neo4j together
+UPSERT_BATCH_SIZE = 500
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of up to `size` items, consuming `items` lazily."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
 class GraphRAGIngestion:
     def __init__(self, uri: str = "bolt://localhost:7687", username: str = "neo4j", password: str = "987654321"):
         """Initialize Neo4j connection and ML models."""
@@ -48,10 +59,25 @@ class GraphRAGIngestion:
             logger.error(f"❌ JSON file not found at {json_file_path}")
             return []
 
-    def upsert_section_nodes(self, sections: List[Dict]):
+    def iter_section_data(self, file_path: str) -> Iterator[Dict]:
+        """Yield section data one at a time, streamed from a .jsonl file or from a structured_content .json file."""
+        if not file_path.endswith('.jsonl'):
+            yield from self.load_json_data(file_path)
+            return
+        try:
+            yield from iter_jsonl(file_path)
+        except FileNotFoundError:
+            logger.error(f"❌ JSON Lines file not found at {file_path}")
+
+    def upsert_section_nodes(self, sections: Iterable[Dict]) -> int:
         """
         Create or update section nodes in Neo4j using MERGE.
         This is idempotent and safe to run multiple times.
+        Sections are processed and written in batches of UPSERT_BATCH_SIZE, so a
+        generator (e.g. iter_section_data) is never held in memory all at once.
+        Returns the number of sections upserted.
+        Batches already written stay written when a later one fails, the error
+        is logged with how many sections made it into the database.
         """
         print("--- Upserting Section Nodes ---")
         query = """
@@ -78,19 +104,25 @@ class GraphRAGIngestion:
             n.embedding = section.embedding,
             n.updated_at = timestamp()
         """
-        # Pre-process sections to add keywords and embeddings
-        processed_sections = []
-        for section in tqdm(sections, desc="Generating keywords and embeddings"):
-            section['keywords'] = extract_keywords(section['text'])
-            if self.embedding_model:
-                section['embedding'] = self.embedding_model.encode(section['text']).tolist()
-            else:
-                section['embedding'] = []
-            processed_sections.append(section)
-
-        with self.driver.session() as session:
-            session.run(query, sections=processed_sections)
-        print(f"✓ Upserted {len(sections)} nodes.")
+        count = 0
+        try:
+            with self.driver.session() as session:
+                for batch in batched(tqdm(sections, desc="Generating keywords and embeddings"), UPSERT_BATCH_SIZE):
+                    # Pre-process sections to add keywords and embeddings
+                    for section in batch:
+                        section['keywords'] = extract_keywords(section['text'])
+                        if self.embedding_model:
+                            section['embedding'] = self.embedding_model.encode(section['text']).tolist()
+                        else:
+                            section['embedding'] = []
+
+                    session.run(query, sections=batch)
+                    count += len(batch)
+        except Exception as e:
+            logger.error(f"❌ Upsert failed after {count} sections were written: {e}")
+            raise e
+        print(f"✓ Upserted {count} nodes.")
+        return count
 
     def refresh_relationships(self):
         """
@@ -147,12 +179,10 @@ class GraphRAGIngestion:
         util_clear_db(self.driver)
         create_basic_indexes(self.driver)
         
-        sections = self.load_json_data(json_file_path)
-        if not sections:
+        if not self.upsert_section_nodes(self.iter_section_data(json_file_path)):
             print("❌ No data to ingest")
             return
         
-        self.upsert_section_nodes(sections)
         self.refresh_relationships()
         print("\n✅ Full ingestion completed successfully!")
 
@@ -160,12 +190,10 @@ class GraphRAGIngestion:
         """Incremental update process: upserts nodes and refreshes relationships."""
         print("🚀 Starting INCREMENTAL Graph Update Process")
         
-        sections = self.load_json_data(json_file_path)
-        if not sections:
+        if not self.upsert_section_nodes(self.iter_section_data(json_file_path)):
             print("❌ No data for update")
             return
         
-        self.upsert_section_nodes(sections)
         self.refresh_relationships()
         print("\n✅ Graph update completed successfully!")
 
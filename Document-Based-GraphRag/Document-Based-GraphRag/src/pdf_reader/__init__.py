@@ -7,25 +7,39 @@ Simple Usage:
     from pdf_reader import extract_pdf_content
     
     extract_pdf_content("input.pdf", "output.json")
+
+Large documents can be streamed to JSON Lines, one section per line:
+    extract_pdf_content("input.pdf", "output.jsonl")
+
+and parsed in a process pool, the default comes from the PDF_PARSE_WORKERS environment variable:
+    extract_pdf_content("input.pdf", "output.jsonl", workers=os.cpu_count())
 """
 
-from .pdf_parser import parse_pdf
-from .output_utils import save_to_json
+from typing import Optional
 
-def extract_pdf_content(input_path: str, output_path: str) -> bool:
+from .pdf_parser import parse_pdf, iter_sections, PDF_PARSE_WORKERS
+from .output_utils import save_to_json, save_to_jsonl, iter_jsonl
+
+def extract_pdf_content(input_path: str, output_path: str, workers: Optional[int] = None) -> bool:
     """
     Simple interface to extract PDF content and save to JSON.
     
     Args:
         input_path: Path to the input PDF file
-        output_path: Path to save the output JSON file
+        output_path: Path to save the output JSON file, a .jsonl path streams the sections to JSON Lines
+        workers: Processes used for the content pages of large documents, defaults to PDF_PARSE_WORKERS
         
     Returns:
         True if successful, False otherwise
     """
     try:
+        if output_path.endswith('.jsonl'):
+            count = save_to_jsonl(iter_sections(input_path, workers=workers), output_path)
+            print("The document has", count, "sections")
+            return True
+        
         # Parse the PDF
-        document = parse_pdf(input_path)
+        document = parse_pdf(input_path, workers=workers)
         
         # Save to JSON
         save_to_json(document, output_path)
@@ -37,4 +51,4 @@ def extract_pdf_content(input_path: str, output_path: str) -> bool:
         return False
 
 # For backward compatibility
-__all__ = ["extract_pdf_content", "parse_pdf", "save_to_json"] 
\ No newline at end of file
+__all__ = ["extract_pdf_content", "parse_pdf", "iter_sections", "PDF_PARSE_WORKERS", "save_to_json", "save_to_jsonl", "iter_jsonl"] 
\ No newline at end of file
@@ -1,13 +1,15 @@
-import fitz
-from typing import Set
+from typing import List, Optional, Set
 from collections import Counter
-from .text_utils import is_footnote
+from .line_classifier import LineInfo, classify_line
 
-def identify_headers_footers(doc: fitz.Document) -> Set[str]:
+# Pages sampled for repeated headers/footers
+HEADER_SAMPLE_PAGES = 10
+
+def identify_headers_footers(pages: List[List[str]]) -> Set[str]:
     """Identify repeated text that appears on multiple pages (headers/footers).
     
     Args:
-        doc: PyMuPDF document object
+        pages: Stripped, non-empty text lines of each page, from the first page on
         
     Returns:
         Set of text strings that appear to be headers or footers
@@ -15,11 +17,7 @@ def identify_headers_footers(doc: fitz.Document) -> Set[str]:
     text_frequency = Counter()
     
     # Collect text from top and bottom of each page
-    for page_num in range(min(10, len(doc))):  # Sample first 10 pages
-        page = doc[page_num]
-        text = page.get_text()
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
+    for lines in pages[:HEADER_SAMPLE_PAGES]:  # Sample first 10 pages
         if lines:
             # Check first and last few lines of each page
             for line in lines[:3] + lines[-3:]:
@@ -34,12 +32,13 @@ def identify_headers_footers(doc: fitz.Document) -> Set[str]:
     
     return headers_footers
 
-def should_skip_line(line: str, headers_footers: Set[str]) -> bool:
+def should_skip_line(line: str, headers_footers: Set[str], info: Optional[LineInfo] = None) -> bool:
     """Check if a line should be skipped (header, footer, footnote, etc.).
     
     Args:
         line: Text line to evaluate
         headers_footers: Set of identified headers/footers
+        info: The line's classification if the caller already has it
         
     Returns:
         True if line should be skipped
@@ -54,13 +53,14 @@ def should_skip_line(line: str, headers_footers: Set[str]) -> bool:
     if line in headers_footers:
         return True
     
+    info = info or classify_line(line)
+    
     # Skip footnotes
-    if is_footnote(line):
+    if info.is_footnote:
         return True
     
     # Skip page numbers (standalone numbers)
-    import re
-    if re.match(r'^\d+$', line):
+    if info.is_page_number:
         return True
     
     # Skip very short lines that are likely artifacts
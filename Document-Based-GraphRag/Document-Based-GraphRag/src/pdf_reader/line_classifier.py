@@ -0,0 +1,69 @@
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Compiled once, every text line of the document goes through these
+
+# "1 Title", "1.2 Title", "1.2.3 Title" or a bare "1.2" (multi-line headers, split TOC entries).
+# "1)" bullets never match, the number has to be followed by whitespace or the end of the line.
+SECTION_NUMBER_REGEX = re.compile(r'(\d+(?:\.\d+)*)(?:\s|$)')
+
+# Any of: "1 text", "* text", "[1]", "Note:", "©"
+FOOTNOTE_REGEX = re.compile(r'\d+\s|\*\s|\[\d+\]|Note:|©')
+
+# Single-line TOC entries like "1 The imc Learning Suite 4" or "1.2 Title ..... 12"
+TOC_ENTRY_REGEX = re.compile(r'(\d+(?:\.\d+)*)\s+(.*?)\s*\.*\s*(\d+)$')
+
+@dataclass(frozen=True)
+class LineInfo:
+    """What a stripped text line is, worked out once and shared by the header, TOC and content passes."""
+    section_id: Optional[str] = None      # "1.3.1" if the line starts with a section number
+    is_section_number_only: bool = False  # the whole line is a section number, e.g. "1.2" (or "12")
+    is_page_number: bool = False          # only digits
+    is_footnote: bool = False
+
+# Most lines are body text, they share these instances
+_PLAIN = LineInfo()
+_FOOTNOTE = LineInfo(is_footnote=True)
+
+def classify_line(line: str) -> LineInfo:
+    """Classify a stripped, non-empty text line in a single pass.
+
+    Args:
+        line: Stripped text line
+
+    Returns:
+        LineInfo for the line
+    """
+    first = line[:1]
+    if not first.isdecimal():
+        # No section or page number, only the non-numeric footnote markers need checking
+        if first in ('*', '[', 'N', '©') and FOOTNOTE_REGEX.match(line):
+            return _FOOTNOTE
+        return _PLAIN
+
+    if line.isdecimal():
+        return LineInfo(section_id=line, is_section_number_only=True, is_page_number=True)
+
+    match = SECTION_NUMBER_REGEX.match(line)
+    section_id = match.group(1) if match else None
+    return LineInfo(
+        section_id=section_id,
+        is_section_number_only=section_id is not None and len(section_id) == len(line),
+        is_footnote=FOOTNOTE_REGEX.match(line) is not None,
+    )
+
+def match_toc_entry(line: str) -> Optional[Tuple[str, str, int]]:
+    """Match a single-line TOC entry.
+
+    Args:
+        line: Stripped text line
+
+    Returns:
+        Tuple of (section_id, title, page) or None
+    """
+    match = TOC_ENTRY_REGEX.match(line) if line[:1].isdecimal() else None
+    if not match:
+        return None
+    section_id, title, page = match.groups()
+    return section_id, title, int(page)
@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
-from .models import Document
+from typing import Dict, Iterable, Iterator
+from .models import Document, Section
 
 def save_to_json(doc: Document, output_path: str) -> None:
     """Save document to JSON file.
@@ -15,6 +16,38 @@ def save_to_json(doc: Document, output_path: str) -> None:
             'sections': [vars(section) for section in doc.sections]
         }, f, indent=2, ensure_ascii=False)
 
+def save_to_jsonl(sections: Iterable[Section], output_path: str) -> int:
+    """Write sections to a JSON Lines file, one section object per line, as they come.
+    
+    Args:
+        sections: Sections to save, e.g. the iter_sections generator
+        output_path: Path to output .jsonl file
+        
+    Returns:
+        Number of sections written
+    """
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for section in sections:
+            f.write(json.dumps(vars(section), ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+def iter_jsonl(input_path: str) -> Iterator[Dict]:
+    """Read a JSON Lines file written by save_to_jsonl one section dict at a time.
+    
+    Args:
+        input_path: Path to the .jsonl file
+        
+    Yields:
+        Section dictionaries
+    """
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
 def print_document_summary(doc: Document) -> None:
     """Print a summary of the parsed document.
     
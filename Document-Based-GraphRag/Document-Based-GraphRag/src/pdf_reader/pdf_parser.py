@@ -1,82 +1,163 @@
 import fitz
-from typing import List, Tuple
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from .models import Section, Document
 from .text_utils import (
-    extract_section_number, 
     get_section_level, 
     get_parent_id, 
     extract_section_title, 
     clean_text
 )
-from .header_detection import identify_headers_footers, should_skip_line
-from .toc_extractor import extract_toc_entries, extract_document_title
+from .header_detection import identify_headers_footers, should_skip_line, HEADER_SAMPLE_PAGES
+from .line_classifier import classify_line
+from .toc_extractor import extract_toc_entries, extract_document_title, TOC_PAGES
 
-def parse_pdf_content(doc: fitz.Document, toc_entries: dict, headers_footers: set) -> List[Section]:
-    """Parse the main content of the PDF document starting from page 4.
+# Content starts on page 4 (0-based index 3)
+CONTENT_START_PAGE = 3
+# Below this many content pages the document is parsed in-process, starting the pool costs more than it saves
+PARALLEL_MIN_PAGES = 64
+PAGES_PER_SHARD = 32
+# Default worker processes for the content pages, 1 parses in-process
+PDF_PARSE_WORKERS = int(os.getenv('PDF_PARSE_WORKERS', 1))
+SHARDS_IN_FLIGHT_PER_WORKER = 2
+
+# A kept content line and its section number (None for body text)
+ClassifiedLine = Tuple[str, Optional[str]]
+
+def extract_page_lines(page: fitz.Page) -> List[str]:
+    """Extract the stripped, non-empty text lines of a page.
     
     Args:
-        doc: PyMuPDF document object
-        toc_entries: Dictionary of TOC entries
+        page: PyMuPDF page object
+        
+    Returns:
+        List of text lines
+    """
+    return [line.strip() for line in page.get_text().split('\n') if line.strip()]
+
+def classify_page_lines(lines: List[str], headers_footers: set, expected_level1_id: Optional[str] = None) -> List[ClassifiedLine]:
+    """Drop the lines of a content page that should be skipped and find the section number of the rest.
+    
+    Args:
+        lines: Stripped, non-empty text lines of the page
         headers_footers: Set of headers/footers to skip
+        expected_level1_id: Level 1 section the TOC places on this page, kept even if it looks like a footnote
         
     Returns:
-        List of parsed sections
+        List of (line, section_id) tuples, section_id is None for content lines
     """
-    sections = []
-    current_section = None
-    current_text = []
+    classified = []
+    for line in lines:
+        info = classify_line(line)
+        section_id = info.section_id
+        
+        # CRITICAL FIX: Use the canonical section extractor to protect level 1 headers.
+        # This ensures the protection logic is identical to the parsing logic.
+        if expected_level1_id and section_id == expected_level1_id:
+            classified.append((line, section_id))
+            continue
+        
+        if not should_skip_line(line, headers_footers, info):
+            classified.append((line, section_id))
     
-    # Get level 1 sections from TOC to create exceptions for filtering
-    level1_toc = {id: info for id, info in toc_entries.items() if get_section_level(id) == 1}
+    return classified
+
+def _classify_page(doc: fitz.Document, page_num: int, headers_footers: set, level1_pages: Dict[int, str]) -> List[ClassifiedLine]:
+    """Extract and classify one page (0-based) of the document."""
+    return classify_page_lines(extract_page_lines(doc[page_num]), headers_footers, level1_pages.get(page_num + 1))
+
+def _classify_page_range_worker(pdf_path: str, start: int, end: int, headers_footers: set, level1_pages: Dict[int, str]) -> List[List[ClassifiedLine]]:
+    """Process pool worker, PyMuPDF documents cannot be pickled so each shard opens the file itself."""
+    with fitz.open(pdf_path) as doc:
+        return [_classify_page(doc, page_num, headers_footers, level1_pages) for page_num in range(start, end)]
+
+def iter_content_pages(pdf_path: str, doc: fitz.Document, early_pages: List[List[str]], toc_entries: dict,
+                       headers_footers: set, workers: Optional[int] = None) -> Iterator[List[ClassifiedLine]]:
+    """Classify the lines of every content page, yielded in page order.
     
-    # Extract actual content starting from page 4
-    for page_num in range(3, len(doc)):
-        page = doc[page_num]
-        text = page.get_text()
-        lines = text.split('\n')
-        
-        # Check if a level 1 section is expected on this page
-        expected_level1_id = None
-        for section_id, info in level1_toc.items():
-            if info['page'] == page_num + 1:
-                expected_level1_id = section_id
-                break
+    Pages already extracted for the header/TOC passes are reused, with more than one worker
+    the rest are sharded over a process pool when the document is large enough. Only a few shards per worker
+    are in flight at a time, so a slow consumer does not pile up parsed pages in memory.
+    
+    Args:
+        pdf_path: Path to the PDF file, reopened by each worker
+        doc: Open PyMuPDF document object
+        early_pages: Lines of the first pages, already extracted
+        toc_entries: Dictionary of TOC entries
+        headers_footers: Set of headers/footers to skip
+        workers: Worker processes, defaults to PDF_PARSE_WORKERS (1 parses in-process)
         
-        # Pre-filter lines, with an exception for expected level 1 section IDs
-        filtered_lines = []
-        for line in lines:
-            stripped_line = line.strip()
-            if not stripped_line:
-                continue
-            
-            # CRITICAL FIX: Use the canonical section extractor to protect level 1 headers.
-            # This ensures the protection logic is identical to the parsing logic.
-            is_level1_header = False
-            if expected_level1_id:
-                id_from_line = extract_section_number(stripped_line)
-                if id_from_line == expected_level1_id:
-                    is_level1_header = True
+    Yields:
+        For each page from page 4 on, its classified lines
+    """
+    # Level 1 sections expected on each page (1-based), used to protect their headers from filtering
+    level1_pages = {}
+    for section_id, info in toc_entries.items():
+        if get_section_level(section_id) == 1:
+            level1_pages.setdefault(info['page'], section_id)
+    
+    for page_num, lines in enumerate(early_pages):
+        if page_num >= CONTENT_START_PAGE:
+            yield classify_page_lines(lines, headers_footers, level1_pages.get(page_num + 1))
+    
+    start = max(len(early_pages), CONTENT_START_PAGE)
+    remaining = len(doc) - start
+    if remaining <= 0:
+        return
+    
+    if workers is None:
+        workers = PDF_PARSE_WORKERS
+    if workers <= 1 or remaining < PARALLEL_MIN_PAGES:
+        for page_num in range(start, len(doc)):
+            yield _classify_page(doc, page_num, headers_footers, level1_pages)
+        return
+    
+    shards = [(shard_start, min(shard_start + PAGES_PER_SHARD, len(doc))) for shard_start in range(start, len(doc), PAGES_PER_SHARD)]
+    print(f"Parsing {remaining} pages in {len(shards)} shards over {workers} processes")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Results are taken in submission order, so pages stay in document order
+        submit = lambda shard: executor.submit(_classify_page_range_worker, pdf_path, shard[0], shard[1], headers_footers, level1_pages)
+        pending = deque(submit(shard) for shard in shards[:workers * SHARDS_IN_FLIGHT_PER_WORKER])
+        next_shard = len(pending)
+        while pending:
+            shard_pages = pending.popleft().result()
+            if next_shard < len(shards):
+                pending.append(submit(shards[next_shard]))
+                next_shard += 1
+            yield from shard_pages
 
-            if is_level1_header:
-                filtered_lines.append(stripped_line)
-                continue
-            
-            if not should_skip_line(stripped_line, headers_footers):
-                filtered_lines.append(stripped_line)
+def iter_content_sections(pages: Iterable[List[ClassifiedLine]], toc_entries: dict) -> Iterator[Section]:
+    """Build the sections from the classified content pages, starting from page 4.
+    
+    The current section and its collected text carry over from one page to the next,
+    so the pages must be given in document order. Each section is yielded as soon as
+    the next section header (or the end of the document) completes it.
+    
+    Args:
+        pages: For each page from page 4 on, its classified lines (see iter_content_pages)
+        toc_entries: Dictionary of TOC entries
         
+    Yields:
+        Parsed sections, in document order
+    """
+    current_section = None
+    current_text = []
+    
+    for page_offset, filtered_lines in enumerate(pages):
+        page_num = CONTENT_START_PAGE + page_offset
         i = 0
         while i < len(filtered_lines):
-            line = filtered_lines[i]
+            line, section_id = filtered_lines[i]
             
             # Check if this is a section header
-            section_id = extract_section_number(line)
-            
             if section_id:
                 # If there's a current section, save its collected text before starting a new one.
                 # This handles the case where a section has no body text and is followed immediately by a sub-section.
                 if current_section:
                     current_section.text = clean_text(' '.join(current_text))
-                    sections.append(current_section)
+                    yield current_section
                 
                 # Extract title using lookahead logic
                 title, lines_consumed = _extract_section_title_with_lookahead(
@@ -103,15 +184,25 @@ def parse_pdf_content(doc: fitz.Document, toc_entries: dict, headers_footers: se
     # Add the very last section to the list
     if current_section:
         current_section.text = clean_text(' '.join(current_text))
-        sections.append(current_section)
+        yield current_section
+
+def parse_pdf_content(pages: Iterable[List[ClassifiedLine]], toc_entries: dict) -> List[Section]:
+    """Parse the main content of the PDF document starting from page 4.
     
-    return sections
+    Args:
+        pages: For each page from page 4 on, its classified lines (see iter_content_pages)
+        toc_entries: Dictionary of TOC entries
+        
+    Returns:
+        List of parsed sections
+    """
+    return list(iter_content_sections(pages, toc_entries))
 
-def _extract_section_title_with_lookahead(filtered_lines: List[str], i: int, line: str, section_id: str) -> Tuple[str, int]:
+def _extract_section_title_with_lookahead(filtered_lines: List[ClassifiedLine], i: int, line: str, section_id: str) -> Tuple[str, int]:
     """Extract section title using lookahead logic for multi-line headers.
     
     Args:
-        filtered_lines: List of filtered text lines
+        filtered_lines: List of classified (line, section_id) tuples of the page
         i: Current line index
         line: Current line text
         section_id: Extracted section ID
@@ -130,12 +221,12 @@ def _extract_section_title_with_lookahead(filtered_lines: List[str], i: int, lin
         # Look ahead to next line(s) for title
         lookahead = 1
         while i + lookahead < len(filtered_lines):
-            next_line = filtered_lines[i + lookahead].strip()
-            if next_line and not extract_section_number(next_line):  # Not another section header
+            next_line, next_section_id = filtered_lines[i + lookahead]
+            if next_line and not next_section_id:  # Not another section header
                 title = next_line
                 lines_consumed += 1  # We consumed this line too
                 break
-            elif extract_section_number(next_line):  # Break early if it's a new section (failsafe)
+            elif next_section_id:  # Break early if it's a new section (failsafe)
                 break
             lookahead += 1
     
@@ -221,30 +312,66 @@ def _validate_section_coverage(toc_entries: dict, sections: List[Section]) -> No
     
     print("="*60)
 
-def parse_pdf(pdf_path: str) -> Document:
-    """Main function to parse a PDF document into structured content.
+def _read_front_matter(doc: fitz.Document) -> Tuple[List[List[str]], set, Optional[str], dict]:
+    """Extract the first pages once and run the header/footer, title and TOC passes on them.
     
     Args:
-        pdf_path: Path to the PDF file
+        doc: PyMuPDF document object
         
     Returns:
-        Document object with title and sections
+        Tuple of (early page lines, headers/footers, document title, TOC entries)
     """
-    doc = fitz.open(pdf_path)
+    # The first pages are needed by the header, title and TOC passes, extract their text once
+    early_pages = [extract_page_lines(doc[page_num]) for page_num in range(min(max(HEADER_SAMPLE_PAGES, TOC_PAGES), len(doc)))]
     
     # Step 1: Identify headers and footers
-    headers_footers = identify_headers_footers(doc)
+    headers_footers = identify_headers_footers(early_pages)
     print(f"Identified {len(headers_footers)} potential headers/footers")
     
     # Step 2: Extract document title
-    document_title = extract_document_title(doc, headers_footers)
+    document_title = extract_document_title(early_pages, headers_footers)
     
     # Step 3: Extract TOC entries
-    toc_entries = extract_toc_entries(doc, headers_footers)
+    toc_entries = extract_toc_entries(early_pages, headers_footers)
     print(f"Found {len(toc_entries)} TOC entries")
     
-    # Step 4: Parse main content
-    sections = parse_pdf_content(doc, toc_entries, headers_footers)
+    return early_pages, headers_footers, document_title, toc_entries
+
+def iter_sections(pdf_path: str, workers: Optional[int] = None) -> Iterator[Section]:
+    """Parse a PDF document and yield its sections one at a time, in document order.
+    
+    Same sections as parse_pdf, without holding them all in memory. The section
+    coverage validation needs every section and is not run.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        workers: Processes used for the content pages of large documents, defaults to PDF_PARSE_WORKERS
+        
+    Yields:
+        Section objects
+    """
+    with fitz.open(pdf_path) as doc:
+        early_pages, headers_footers, _, toc_entries = _read_front_matter(doc)
+        yield from iter_content_sections(
+            iter_content_pages(pdf_path, doc, early_pages, toc_entries, headers_footers, workers), toc_entries
+        )
+
+def parse_pdf(pdf_path: str, workers: Optional[int] = None) -> Document:
+    """Main function to parse a PDF document into structured content.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        workers: Processes used for the content pages of large documents, defaults to PDF_PARSE_WORKERS
+        
+    Returns:
+        Document object with title and sections
+    """
+    with fitz.open(pdf_path) as doc:
+        early_pages, headers_footers, document_title, toc_entries = _read_front_matter(doc)
+        
+        # Step 4: Extract and classify the content pages, then build the sections from them in page order
+        pages = iter_content_pages(pdf_path, doc, early_pages, toc_entries, headers_footers, workers)
+        sections = parse_pdf_content(pages, toc_entries)
     
     print(f"Headers/footers identified: {list(headers_footers)}")
     print("The document has", len(sections), "sections")
@@ -1,5 +1,12 @@
 import re
 from typing import Optional
+from .line_classifier import classify_line
+
+# Leading separators like dots, spaces, dashes, colons between a section number and its title
+TITLE_SEPARATOR_REGEX = re.compile(r'^[\.\s\-:]+')
+WHITESPACE_REGEX = re.compile(r'\s+')
+STANDALONE_NUMBER_REGEX = re.compile(r'^\d+\s*$', flags=re.MULTILINE)
+TRAILING_NUMBER_REGEX = re.compile(r'\s*\d+\s*$')
 
 def extract_section_number(text: str) -> Optional[str]:
     """Extract section number from text if it exists.
@@ -12,25 +19,8 @@ def extract_section_number(text: str) -> Optional[str]:
     """
     text = text.strip()
     
-    # Skip lines that look like bullet points with parentheses: "1)", "2)", etc.
-    if re.match(r'^\d+\)', text):
-        return None
-    
-    # Skip lines that start with bullet point markers
-    if text.startswith(('–', '-', '•', '*', '◦', '○')):
-        return None
-    
-    # Match clean section numbers followed by space: "1 Title", "1.2 Title", "1.2.3 Title"
-    match = re.match(r'^(\d+(?:\.\d+)*)\s', text)
-    if match:
-        return match.group(1)
-    
-    # Also match if the entire line is just a section number (for multi-line headers): "1", "1.2"
-    match = re.match(r'^(\d+(?:\.\d+)*)$', text)
-    if match:
-        return match.group(1)
-    
-    return None
+    # "1 Title", "1.2 Title", "1.2.3 Title" or just "1.2" (multi-line headers), never "1)" bullets
+    return classify_line(text).section_id if text else None
 
 def get_section_level(section_id: str) -> int:
     """Determine the hierarchical level of a section based on its ID.
@@ -71,7 +61,7 @@ def extract_section_title(line: str, section_id: str) -> str:
     remaining = line[len(section_id):].strip()
     
     # Remove any leading separators like dots, spaces, dashes, colons
-    title = re.sub(r'^[\.\s\-:]+', '', remaining).strip()
+    title = TITLE_SEPARATOR_REGEX.sub('', remaining).strip()
     
     return title
 
@@ -85,10 +75,10 @@ def clean_text(text: str) -> str:
         Cleaned and normalized text
     """
     # Remove multiple spaces and newlines
-    text = re.sub(r'\s+', ' ', text)
+    text = WHITESPACE_REGEX.sub(' ', text)
     # Remove standalone page numbers
-    text = re.sub(r'^\d+\s*$', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\s*\d+\s*$', '', text)
+    text = STANDALONE_NUMBER_REGEX.sub('', text)
+    text = TRAILING_NUMBER_REGEX.sub('', text)
     return text.strip()
 
 def is_footnote(line: str) -> bool:
@@ -100,16 +90,6 @@ def is_footnote(line: str) -> bool:
     Returns:
         True if line appears to be a footnote
     """
-    footnote_patterns = [
-        r'^\d+\s+',  # Starting with number and space
-        r'^\*\s+',   # Starting with asterisk
-        r'^\[\d+\]', # [1], [2], etc.
-        r'^Note:',   # Starting with "Note:"
-        r'^©',       # Copyright symbols
-    ]
-    
-    for pattern in footnote_patterns:
-        if re.match(pattern, line.strip()):
-            return True
-    
-    return False 
\ No newline at end of file
+    # Number and space, asterisk, [1], "Note:" or ©, see line_classifier.FOOTNOTE_REGEX
+    line = line.strip()
+    return bool(line) and classify_line(line).is_footnote 
\ No newline at end of file
@@ -1,31 +1,25 @@
-import fitz
-import re
-from typing import Dict
+from typing import Dict, List
 from .header_detection import should_skip_line
+from .line_classifier import classify_line, match_toc_entry
 
-def extract_toc_entries(doc: fitz.Document, headers_footers: set) -> Dict[str, Dict[str, any]]:
+# Pages searched for the table of contents
+TOC_PAGES = 3
+
+def extract_toc_entries(pages: List[List[str]], headers_footers: set) -> Dict[str, Dict[str, any]]:
     """Extract Table of Contents entries from the first few pages of the document.
     
     Args:
-        doc: PyMuPDF document object
+        pages: Stripped, non-empty text lines of each page, from the first page on
         headers_footers: Set of identified headers/footers to skip
         
     Returns:
         Dictionary mapping section IDs to their TOC information
     """
     toc_entries = {}
-    # Pattern for single-line entries like "1 The imc Learning Suite 4"
-    single_line_regex = re.compile(r'^(\d+(?:\.\d+)*)\s+(.*?)\s*\.*\s*(\d+)$')
-    # Pattern for just a section number
-    section_num_regex = re.compile(r'^(\d+(?:\.\d+)*)$')
-    # Pattern for just a page number
-    page_num_regex = re.compile(r'^\d+$')
 
-    for page_num in range(min(3, len(doc))):
-        page = doc[page_num]
-        text = page.get_text()
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
+    for lines in pages[:TOC_PAGES]:
+        # Section number only / page number only lines, see line_classifier
+        infos = [classify_line(line) for line in lines]
         i = 0
         while i < len(lines):
             line = lines[i]
@@ -38,69 +32,54 @@ def extract_toc_entries(doc: fitz.Document, headers_footers: set) -> Dict[str, D
             print("line", line)
             
             # Try single-line pattern first
-            single_line_match = single_line_regex.match(line)
-            if single_line_match:
-                section_id, title, page_str = single_line_match.groups()
-                try:
-                    page_int = int(page_str)
-                    toc_entries[section_id] = {'title': title, 'page': page_int}
-                    print(f"✓ TOC (Single-line): {section_id} - '{title}' (page {page_int})")
-                except ValueError:
-                    pass
+            toc_entry = match_toc_entry(line)
+            if toc_entry:
+                section_id, title, page_int = toc_entry
+                toc_entries[section_id] = {'title': title, 'page': page_int}
+                print(f"✓ TOC (Single-line): {section_id} - '{title}' (page {page_int})")
             # Handle split entries (number on one line, title on next, page on third)
-            elif section_num_regex.match(line) and i + 1 < len(lines):
+            elif infos[i].is_section_number_only and i + 1 < len(lines):
                 section_id = line
                 title = lines[i + 1]
                 
                 # Look ahead for page number
-                if i + 2 < len(lines) and page_num_regex.match(lines[i + 2]):
-                    try:
-                        page_int = int(lines[i + 2])
-                        toc_entries[section_id] = {'title': title, 'page': page_int}
-                        print(f"✓ TOC (Split): {section_id} - '{title}' (page {page_int})")
-                        lines_consumed = 3
-                    except ValueError:
-                        pass
+                if i + 2 < len(lines) and infos[i + 2].is_page_number:
+                    page_int = int(lines[i + 2])
+                    toc_entries[section_id] = {'title': title, 'page': page_int}
+                    print(f"✓ TOC (Split): {section_id} - '{title}' (page {page_int})")
+                    lines_consumed = 3
                 # If no page number found, this might be a false positive
                 else:
                     print(f"⚠️ Skipping potential false positive: {section_id} - '{title}'")
             # Handle case where we have a title followed by a page number
-            elif not section_num_regex.match(line) and not page_num_regex.match(line) and i + 1 < len(lines):
+            elif not infos[i].is_section_number_only and not infos[i].is_page_number and i + 1 < len(lines):
                 title = line
-                if page_num_regex.match(lines[i + 1]):
-                    try:
-                        page_int = int(lines[i + 1])
-                        # Look back for section number
-                        if i > 0 and section_num_regex.match(lines[i - 1]):
-                            section_id = lines[i - 1]
-                            toc_entries[section_id] = {'title': title, 'page': page_int}
-                            print(f"✓ TOC (Split-back): {section_id} - '{title}' (page {page_int})")
-                            lines_consumed = 2
-                    except ValueError:
-                        pass
+                if infos[i + 1].is_page_number:
+                    page_int = int(lines[i + 1])
+                    # Look back for section number
+                    if i > 0 and infos[i - 1].is_section_number_only:
+                        section_id = lines[i - 1]
+                        toc_entries[section_id] = {'title': title, 'page': page_int}
+                        print(f"✓ TOC (Split-back): {section_id} - '{title}' (page {page_int})")
+                        lines_consumed = 2
             
             i += lines_consumed
     
     return toc_entries
 
-def extract_document_title(doc: fitz.Document, headers_footers: set) -> str:
+def extract_document_title(pages: List[List[str]], headers_footers: set) -> str:
     """Extract the document title from the first page.
     
     Args:
-        doc: PyMuPDF document object
+        pages: Stripped, non-empty text lines of each page, from the first page on
         headers_footers: Set of identified headers/footers to skip
         
     Returns:
         Document title or None if not found
     """
     # Look for title in first page
-    page = doc[0]
-    text = page.get_text()
-    lines = text.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if line and not should_skip_line(line, headers_footers):
+    for line in pages[0] if pages else []:
+        if not should_skip_line(line, headers_footers):
             return line
     
     return None 
\ No newline at end of file
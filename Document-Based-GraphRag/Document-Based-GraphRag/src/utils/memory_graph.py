@@ -0,0 +1,167 @@
+"""In-memory stand-in for the Neo4j driver, used by the benchmarks.
+
+Only understands the Cypher statements issued by ingest.py, query.py and
+utils/neo4j_utils.py - each one is recognised by a marker string and run
+as plain Python over dicts. Anything else raises NotImplementedError so a
+new query in the pipeline is noticed instead of silently returning nothing.
+"""
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+RELATED_CONTENT_REGEX = re.compile(r"\[:(\w+)\*1\.\.(\d+)\]")
+
+
+class MemoryRecord(dict):
+    """A result row, supports record['key'] and dict(record) like a neo4j Record."""
+
+
+class MemoryResult:
+    def __init__(self, records: List[Dict]):
+        self._records = [MemoryRecord(r) for r in records]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def single(self) -> Optional[MemoryRecord]:
+        return self._records[0] if self._records else None
+
+
+class MemoryGraph:
+    """Section nodes keyed by id, and typed relationships with properties."""
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict] = {}
+        # start id -> type -> {end id: properties}
+        self.outgoing: Dict[str, Dict[str, Dict[str, Dict]]] = defaultdict(lambda: defaultdict(dict))
+
+    def relationship_count(self) -> int:
+        return sum(len(ends) for types in self.outgoing.values() for ends in types.values())
+
+    def merge_relationship(self, start: str, rel_type: str, end: str, **properties):
+        self.outgoing[start][rel_type].setdefault(end, {}).update(properties)
+
+    def run(self, query: str, **params) -> MemoryResult:
+        if "UNWIND $sections" in query:
+            return self._upsert_sections(params["sections"])
+        if "DETACH DELETE" in query:
+            self.nodes.clear()
+            self.outgoing.clear()
+            return MemoryResult([])
+        if "apoc.periodic.iterate" in query:
+            self.outgoing.clear()
+            return MemoryResult([])
+        if query.lstrip().startswith("CREATE") and "INDEX" in query:
+            return MemoryResult([])
+        if "parent.id = child.parent_id" in query:
+            return self._merge_hierarchy()
+        if "MERGE (s1)-[:NEXT]->(s2)" in query:
+            return self._merge_next()
+        if "MATCH path = (start)" in query:
+            return self._related_content(query, params["node_id"])
+        if "MATCH (n)-[r]-(m)" in query:
+            return self._relationship_details(params["main_id"], params["related_id"])
+        if "n.embedding IS NOT NULL" in query:
+            needs_keywords = "n.keywords IS NOT NULL" in query
+            return MemoryResult([
+                {"id": n["id"], "title": n["title"], "text": n["text"], "embedding": n["embedding"],
+                 "page_number": n["page_number"], "level": n["level"], "keywords": n["keywords"]}
+                for n in self.nodes.values()
+                if n.get("embedding") is not None and (not needs_keywords or n.get("keywords") is not None)
+            ])
+        if "RETURN count(n)" in query:
+            return MemoryResult([{"c": len(self.nodes)}])
+        if "RETURN count(r)" in query:
+            return MemoryResult([{"c": self.relationship_count()}])
+        raise NotImplementedError(f"MemoryGraph does not understand this query: {query.strip()[:200]}")
+
+    def _upsert_sections(self, sections: List[Dict]) -> MemoryResult:
+        for section in sections:
+            node = self.nodes.setdefault(section["id"], {})
+            node.update({
+                "id": section["id"],
+                "title": section["title"],
+                "text": section["text"],
+                "level": section["level"],
+                "page_number": section["page_number"],
+                "parent_id": section["parent_id"],
+                "word_count": len(section["text"].split(" ")),
+                "keywords": section["keywords"],
+                "embedding": section["embedding"],
+            })
+        return MemoryResult([])
+
+    def _merge_hierarchy(self) -> MemoryResult:
+        for node in self.nodes.values():
+            parent_id = node.get("parent_id")
+            if parent_id is not None and parent_id in self.nodes:
+                self.merge_relationship(parent_id, "HAS_SUBSECTION", node["id"])
+                self.merge_relationship(node["id"], "PARENT", parent_id)
+        return MemoryResult([])
+
+    def _merge_next(self) -> MemoryResult:
+        children = defaultdict(list)
+        for start, types in self.outgoing.items():
+            for parent in types.get("PARENT", {}):
+                children[parent].append(start)
+        # Cypher compares the ids as strings, so do the same
+        for siblings in children.values():
+            siblings.sort()
+            for s1, s2 in zip(siblings, siblings[1:]):
+                self.merge_relationship(s1, "NEXT", s2)
+        return MemoryResult([])
+
+    def _related_content(self, query: str, node_id: str) -> MemoryResult:
+        rel_type, depth = RELATED_CONTENT_REGEX.search(query).groups()
+        records = []
+        frontier = [node_id]
+        for current_depth in range(1, int(depth) + 1):
+            next_frontier = []
+            for start in frontier:
+                for end in self.outgoing.get(start, {}).get(rel_type, {}):
+                    node = self.nodes[end]
+                    records.append({"id": node["id"], "title": node["title"], "text": node["text"],
+                                    "page_number": node["page_number"], "level": node["level"],
+                                    "depth": current_depth})
+                    next_frontier.append(end)
+            frontier = next_frontier
+        return MemoryResult(records)
+
+    def _relationship_details(self, main_id: str, related_id: str) -> MemoryResult:
+        if main_id not in self.nodes or related_id not in self.nodes:
+            return MemoryResult([])
+        main, related = self.nodes[main_id], self.nodes[related_id]
+        records = []
+        for start, end, direction in ((main_id, related_id, "outgoing"), (related_id, main_id, "incoming")):
+            for rel_type, ends in self.outgoing.get(start, {}).items():
+                if end in ends:
+                    records.append({"rel_type": rel_type, "r": dict(ends[end]), "direction": direction,
+                                    "main_keywords": main["keywords"], "related_keywords": related["keywords"]})
+        return MemoryResult(records)
+
+
+class MemorySession:
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+
+    def run(self, query: str, parameters: Dict = None, **params) -> MemoryResult:
+        return self.graph.run(query, **(parameters or {}), **params)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class MemoryDriver:
+    """Drop-in for neo4j.GraphDatabase.driver(...) backed by a MemoryGraph."""
+
+    def __init__(self, graph: MemoryGraph = None):
+        self.graph = graph or MemoryGraph()
+
+    def session(self, **kwargs) -> MemorySession:
+        return MemorySession(self.graph)
+
+    def close(self):
+        pass
@@ -41,6 +41,12 @@ def sigshutdown_handler(_signo, _stack_frame):
         worker_handler.shutdown_workers()
     except Exception as e:
         logger.error(f"Error shutting down workers: {str(e)}")
+
+    try:
+        from changedetectionio.processors.process_pool import shutdown_process_pool
+        shutdown_process_pool()
+    except Exception as e:
+        logger.error(f"Error shutting down processing pool: {str(e)}")
     
     # Shutdown socketio server fast
     from changedetectionio.flask_app import socketio_server
@@ -42,7 +42,7 @@ class Import(Resource):
             tag_uuids = tag_uuids.split(',')
 
         urls = request.get_data().decode('utf8').splitlines()
-        added = []
+        entries = []
         allow_simplehost = not strtobool(os.getenv('BLOCK_SIMPLEHOSTS', 'False'))
         for url in urls:
             url = url.strip()
@@ -53,10 +53,10 @@ class Import(Resource):
             if not validators.url(url, simple_host=allow_simplehost):
                 return f"Invalid or unsupported URL - {url}", 400
 
-            if dedupe and self.datastore.url_exists(url):
-                continue
+            entries.append((url, tags))
 
-            new_uuid = self.datastore.add_watch(url=url, extras=extras, tag=tags, tag_uuids=tag_uuids)
-            added.append(new_uuid)
+        # All validated first, then added in one go, the ticker checks them in waves
+        added, skipped = self.datastore.add_watches_bulk(entries=entries, extras=extras, tag_uuids=tag_uuids, dedupe=dedupe)
+        self.datastore.schedule_first_checks_in_waves(added)
 
-        return added
\ No newline at end of file
+        return added
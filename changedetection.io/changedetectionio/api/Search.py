@@ -16,24 +16,47 @@ class Search(Resource):
             curl "http://localhost:5000/api/v1/search?q=https://example.com/page1" -H"x-api-key:813031b16330fe25e3780cf0325daa45"
             curl "http://localhost:5000/api/v1/search?q=https://example.com/page1?tag=Favourites" -H"x-api-key:813031b16330fe25e3780cf0325daa45"
             curl "http://localhost:5000/api/v1/search?q=https://example.com?partial=true" -H"x-api-key:813031b16330fe25e3780cf0325daa45"
+            curl "http://localhost:5000/api/v1/search?q=https://example.com&prefix=true&limit=20&offset=40" -H"x-api-key:813031b16330fe25e3780cf0325daa45"
         @apiName Search
         @apiGroup Watch Management
         @apiQuery {String} q Search query to match against watch URLs and titles
         @apiQuery {String} [tag] Optional name of tag to limit results (name not UUID)
         @apiQuery {String} [partial] Allow partial matching of URL query
-        @apiSuccess (200) {Object} JSON Object containing matched watches
+        @apiQuery {String} [prefix] Match the start of the URL, title or error text
+        @apiQuery {Number} [limit] Maximum number of results to return
+        @apiQuery {Number} [offset] Number of results to skip, use with limit for pagination
+        @apiSuccess (200) {Object} JSON Object containing matched watches, the X-Total-Count header has the total number of matches
         """
         query = request.args.get('q', '').strip()
         tag_limit = request.args.get('tag', '').strip()
         from changedetectionio.strtobool import strtobool
+        from changedetectionio.search_index import SEARCH_MODE_EXACT, SEARCH_MODE_PARTIAL, SEARCH_MODE_PREFIX
         partial = bool(strtobool(request.args.get('partial', '0'))) if 'partial' in request.args else False
+        prefix = bool(strtobool(request.args.get('prefix', '0'))) if 'prefix' in request.args else False
 
         # Require a search query
         if not query:
             abort(400, message="Search query 'q' parameter is required")
 
+        try:
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            abort(400, message="'limit' and 'offset' must be numbers")
+
+        if (limit is not None and limit < 0) or offset < 0:
+            abort(400, message="'limit' and 'offset' can not be negative")
+
+        mode = SEARCH_MODE_EXACT
+        if partial:
+            mode = SEARCH_MODE_PARTIAL
+        elif prefix:
+            mode = SEARCH_MODE_PREFIX
+
         # Use the search function from the datastore
-        matching_uuids = self.datastore.search_watches_for_url(query=query, tag_limit=tag_limit, partial=partial)
+        matching_uuids = self.datastore.search_watches_for_url(query=query, tag_limit=tag_limit, mode=mode)
+        total = len(matching_uuids)
+        matching_uuids = matching_uuids[offset:offset + limit] if limit is not None else matching_uuids[offset:]
 
         # Build the response with watch details
         results = {}
@@ -48,4 +71,4 @@ class Search(Resource):
                 'viewed': watch.viewed
             }
 
-        return results, 200
\ No newline at end of file
+        return results, 200, {'X-Total-Count': str(total)}
\ No newline at end of file
@@ -1,5 +1,7 @@
+from flask import make_response
 from flask_restful import Resource
 from . import auth
+from .. import metrics
 
 
 class SystemInfo(Resource):
@@ -20,7 +22,9 @@ class SystemInfo(Resource):
                 'queue_size': 10 ,
                 'overdue_watches': ["watch-uuid-list"],
                 'uptime': 38344.55,
+                'startup': {'lazy_watch_load': false, 'seconds': 1.92, 'rss_mb': 182.4, 'rss_increase_mb': 96.1, 'watches': 800, 'watches_not_rehydrated': 0},
                 'watch_count': 800,
+                'metrics': {'changedetection_fetch_seconds': {'requests,ok': {'count': 1520, 'avg_seconds': 0.412, 'max_seconds': 9.81, 'total_seconds': 626.2}}, ...},
                 'version': "0.40.1"
             }
         @apiName Get Info
@@ -49,6 +53,34 @@ class SystemInfo(Resource):
                    'queue_size': self.update_q.qsize(),
                    'overdue_watches': overdue_watches,
                    'uptime': round(time.time() - self.datastore.start_time, 2),
+                   'startup': self.datastore.startup_stats,
                    'watch_count': len(self.datastore.data.get('watching', {})),
+                   'metrics': metrics.registry.summary(),
                    'version': main_version
-               }, 200
\ No newline at end of file
+               }, 200
+
+
+class Metrics(Resource):
+    def __init__(self, **kwargs):
+        # datastore is a black box dependency
+        self.datastore = kwargs['datastore']
+
+    @auth.check_token
+    def get(self):
+        """
+        @api {get} /metrics Check pipeline metrics
+        @apiDescription Timings of the fetch, processing stages, queue wait, notifications and datastore saves, plus queue depth, in-flight fetches per host and busy workers, in the Prometheus text format
+        @apiExample {curl} Example usage:
+            curl http://localhost:5000/metrics -H"x-api-key:813031b16330fe25e3780cf0325daa45"
+            HTTP/1.0 200
+            # HELP changedetection_fetch_seconds Time to fetch a page, per fetcher backend and result
+            # TYPE changedetection_fetch_seconds histogram
+            changedetection_fetch_seconds_bucket{fetcher="requests",result="ok",le="0.001"} 0
+            ...
+        @apiName Metrics
+        @apiGroup System Information
+        """
+        response = make_response(metrics.registry.render(), 200)
+        response.mimetype = 'text/plain'
+        response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+        return response
@@ -1,3 +1,4 @@
+import json
 import os
 from changedetectionio.strtobool import strtobool
 
@@ -5,13 +6,14 @@ from flask_expects_json import expects_json
 from changedetectionio import queuedWatchMetaData
 from changedetectionio import worker_handler
 from flask_restful import abort, Resource
-from flask import request, make_response
+from flask import request, make_response, Response
 import validators
 from . import auth
 import copy
 
 # Import schemas from __init__.py
 from . import schema, schema_create_watch, schema_update_watch
+from changedetectionio.search_index import SORT_INSERTION_ORDER, InvalidCursor
 
 
 class Watch(Resource):
@@ -40,7 +42,7 @@ class Watch(Resource):
         @apiQuery {String} [paused] =`paused` or =`unpaused` , Sets the PAUSED state
         @apiQuery {String} [muted] =`muted` or =`unmuted` , Sets the MUTE NOTIFICATIONS state
         @apiSuccess (200) {String} OK When paused/muted/recheck operation OR full JSON object of the watch
-        @apiSuccess (200) {JSON} WatchJSON JSON Full JSON object of the watch
+        @apiSuccess (200) {JSON} WatchJSON JSON Full JSON object of the watch, `next_check` is the predicted epoch time of the next check (`null` when paused)
         """
         from copy import deepcopy
         watch = deepcopy(self.datastore.data['watching'].get(uuid))
@@ -69,6 +71,8 @@ class Watch(Resource):
         # attr .last_changed will check for the last written text snapshot on change
         watch['last_changed'] = watch.last_changed
         watch['viewed'] = watch.viewed
+        # When the scheduler is expected to check it next (epoch time), adaptive recheck can move it
+        watch['next_check'] = self.datastore.next_check_time(self.datastore.data['watching'].get(uuid))
         return watch
 
     @auth.check_token
@@ -254,6 +258,7 @@ class CreateWatch(Resource):
                     "last_changed": 1677103794,
                     "last_checked": 1677103794,
                     "last_error": false,
+                    "next_check": 1677114594,
                     "title": "",
                     "url": "http://www.quotationspage.com/random.php"
                 },
@@ -261,6 +266,7 @@ class CreateWatch(Resource):
                     "last_changed": 0,
                     "last_checked": 1676662819,
                     "last_error": false,
+                    "next_check": 1676673619,
                     "title": "QuickLook",
                     "url": "https://github.com/QL-Win/QuickLook/tags"
                 }
@@ -268,31 +274,81 @@ class CreateWatch(Resource):
 
         @apiParam {String} [recheck_all]       Optional Set to =1 to force recheck of all watches
         @apiParam {String} [tag]               Optional name of tag to limit results
+        @apiParam {String} [sort]              Optional sort by `last_changed`, `last_checked`, `title` or `date_created`, default is the order the watches were added
+        @apiParam {String} [order]             Optional `asc` or `desc` (default `asc`)
+        @apiParam {Number} [limit]             Optional maximum number of watches to return, when there are more the `X-Next-Cursor` header is set
+        @apiParam {String} [cursor]            Optional value of the `X-Next-Cursor` header from the previous page
         @apiName ListWatches
         @apiGroup Watch Management
         @apiSuccess (200) {String} OK JSON dict
         """
-        list = {}
-
-        tag_limit = request.args.get('tag', '').lower()
-        for uuid, watch in self.datastore.data['watching'].items():
-            # Watch tags by name (replace the other calls?)
-            tags = self.datastore.get_all_tags_for_watch(uuid=uuid)
-            if tag_limit and not any(v.get('title').lower() == tag_limit for k, v in tags.items()):
-                continue
-
-            list[uuid] = {
-                'last_changed': watch.last_changed,
-                'last_checked': watch['last_checked'],
-                'last_error': watch['last_error'],
-                'title': watch['title'],
-                'url': watch['url'],
-                'viewed': watch.viewed
-            }
-
         if request.args.get('recheck_all'):
             for uuid in self.datastore.data['watching'].keys():
                 worker_handler.queue_item_async_safe(self.update_q, queuedWatchMetaData.PrioritizedItem(priority=1, item={'uuid': uuid}))
             return {'status': "OK"}, 200
 
-        return list, 200
\ No newline at end of file
+        sort_index = self.datastore.sort_index
+        sort_attribute = SORT_INSERTION_ORDER
+        if request.args.get('sort'):
+            sort_attribute = sort_index.normalise_attribute(request.args.get('sort'))
+            if not sort_attribute:
+                abort(400, message="'sort' must be one of last_changed, last_checked, title or date_created")
+
+        order = request.args.get('order', 'asc').lower()
+        if order not in ('asc', 'desc'):
+            abort(400, message="'order' must be 'asc' or 'desc'")
+
+        try:
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+        except ValueError:
+            abort(400, message="'limit' must be a number")
+        if limit is not None and limit < 1:
+            abort(400, message="'limit' must be greater than 0")
+
+        # Resolve the tag name once instead of per watch
+        predicate = None
+        tag_limit = request.args.get('tag', '').lower()
+        if tag_limit:
+            tag_uuids = {k for k, v in self.datastore.data['settings']['application'].get('tags', {}).items() if v.get('title', '').lower() == tag_limit}
+            watching = self.datastore.data['watching']
+            predicate = lambda uuid: uuid in watching and bool(tag_uuids.intersection(watching[uuid].get('tags', [])))
+
+        headers = {}
+        if limit is not None or request.args.get('cursor'):
+            try:
+                uuids, next_cursor = sort_index.page(attr=sort_attribute,
+                                                     reverse=order == 'desc',
+                                                     limit=limit if limit is not None else len(sort_index),
+                                                     cursor=request.args.get('cursor'),
+                                                     predicate=predicate)
+            except InvalidCursor as e:
+                abort(400, message=str(e))
+            if next_cursor:
+                headers['X-Next-Cursor'] = next_cursor
+        else:
+            uuids = [uuid for uuid in sort_index.uuids(sort_attribute, reverse=order == 'desc') if not predicate or predicate(uuid)]
+
+        watching = self.datastore.data['watching']
+
+        def generate():
+            # Stream one watch at a time so a large list is never built up as a single dict/string
+            yield '{'
+            first = True
+            for uuid in uuids:
+                watch = watching.get(uuid)
+                if not watch:
+                    continue
+                item = {
+                    'last_changed': watch.last_changed,
+                    'last_checked': watch['last_checked'],
+                    'last_error': watch['last_error'],
+                    'title': watch['title'],
+                    'next_check': self.datastore.next_check_time(watch),
+                    'url': watch['url'],
+                    'viewed': watch.viewed
+                }
+                yield ('' if first else ',') + json.dumps(uuid) + ':' + json.dumps(item)
+                first = False
+            yield '}'
+
+        return Response(generate(), status=200, mimetype='application/json', headers=headers)
\ No newline at end of file
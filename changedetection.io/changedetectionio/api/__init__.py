@@ -29,5 +29,5 @@ schema_delete_notification_urls['required'] = ['notification_urls']
 from .Watch import Watch, WatchHistory, WatchSingleHistory, CreateWatch
 from .Tags import Tags, Tag
 from .Import import Import
-from .SystemInfo import SystemInfo
+from .SystemInfo import SystemInfo, Metrics
 from .Notifications import Notifications
@@ -1,8 +1,10 @@
 from .processors.exceptions import ProcessorException
 import changedetectionio.content_fetchers.exceptions as content_fetchers_exceptions
 from changedetectionio.processors.text_json_diff.processor import FilterNotFoundInResponse
-from changedetectionio import html_tools
+from changedetectionio import html_tools, metrics
 from changedetectionio.flask_app import watch_check_update
+from changedetectionio.host_politeness import host_scheduler
+from changedetectionio.processors import process_pool
 
 import asyncio
 import importlib
@@ -48,7 +50,25 @@ async def async_update_worker(worker_id, q, notification_q, app, datastore):
             continue
         
         uuid = queued_item_data.item.get('uuid')
+
+        # Per-host politeness, when the host can't take another request right now hand the item back and take the next one
+        politeness_key = None
+        fetch_status_code = None
+        queued_watch = datastore.data['watching'].get(uuid)
+        if queued_watch and queued_watch.get('url'):
+            politeness_key = host_scheduler.key_for(url=queued_watch.get('url'),
+                                                    proxy=datastore.get_preferred_proxy_for_watch(uuid=uuid))
+            wait_seconds = host_scheduler.try_acquire(politeness_key)
+            if wait_seconds:
+                logger.debug(f"Worker {worker_id} deferring watch {uuid} for {wait_seconds:.1f}s, host '{politeness_key}' is busy or backing off")
+                q.defer(queued_item_data, wait_seconds)
+                continue
+
         fetch_start_time = round(time.time())
+        check_started = time.perf_counter()
+        check_result = 'error'
+        if getattr(queued_item_data, 'queued_at', None):
+            metrics.observe(metrics.QUEUE_WAIT_SECONDS, time.monotonic() - queued_item_data.queued_at)
         
         # Mark this UUID as being processed
         from changedetectionio import worker_handler
@@ -87,10 +107,19 @@ async def async_update_worker(worker_id, q, notification_q, app, datastore):
                                                                          watch_uuid=uuid)
 
                     # All fetchers are now async, so call directly
-                    await update_handler.call_browser()
+                    fetch_started = time.perf_counter()
+                    fetch_result = 'ok'
+                    try:
+                        await update_handler.call_browser()
+                    except Exception as fetch_error:
+                        fetch_result = type(fetch_error).__name__
+                        raise
+                    finally:
+                        metrics.observe(metrics.FETCH_SECONDS, time.perf_counter() - fetch_started,
+                                        fetcher=update_handler.fetcher.__module__.rsplit('.', 1)[-1], result=fetch_result)
 
-                    # Run change detection (this is synchronous)
-                    changed_detected, update_obj, contents = update_handler.run_changedetection(watch=watch)
+                    # Run change detection, CPU bound so it runs on a thread or in the processing pool, not on the event loop
+                    changed_detected, update_obj, contents = await process_pool.run_changedetection(update_handler, watch=watch)
 
                 except PermissionError as e:
                     logger.critical(f"File permission error updating file, watch: {uuid}")
@@ -128,6 +157,7 @@ async def async_update_worker(worker_id, q, notification_q, app, datastore):
                     process_changedetection_results = False
 
                 except content_fetchers_exceptions.Non200ErrorCodeReceived as e:
+                    fetch_status_code = e.status_code
                     if e.status_code == 403:
                         err_text = "Error - 403 (Access denied) received"
                     elif e.status_code == 404:
@@ -188,6 +218,7 @@ async def async_update_worker(worker_id, q, notification_q, app, datastore):
                     # Yes fine, so nothing todo, don't continue to process.
                     process_changedetection_results = False
                     changed_detected = False
+                    check_result = 'unchanged'
                     
                 except content_fetchers_exceptions.BrowserConnectError as e:
                     datastore.update_watch(uuid=uuid,
@@ -294,6 +325,7 @@ async def async_update_worker(worker_id, q, notification_q, app, datastore):
 
                     update_obj['last_error'] = False
                     cleanup_error_artifacts(uuid, datastore)
+                    check_result = 'changed' if changed_detected else 'unchanged'
 
                 if not datastore.data['watching'].get(uuid):
                     continue
@@ -312,11 +344,13 @@ async def async_update_worker(worker_id, q, notification_q, app, datastore):
                         datastore.update_watch(uuid=uuid, update_obj=update_obj)
 
                         if changed_detected or not watch.history_n:
+                            save_started = time.perf_counter()
                             if update_handler.screenshot:
                                 watch.save_screenshot(screenshot=update_handler.screenshot)
 
+                            # Compressing and writing the files is CPU and disk work, keep it off the event loop
                             if update_handler.xpath_data:
-                                watch.save_xpath_data(data=update_handler.xpath_data)
+                                await asyncio.to_thread(watch.save_xpath_data, data=update_handler.xpath_data)
 
                             # Ensure unique timestamp for history
                             if watch.newest_history_key and int(fetch_start_time) == int(watch.newest_history_key):
@@ -324,13 +358,16 @@ async def async_update_worker(worker_id, q, notification_q, app, datastore):
                                 fetch_start_time += 1
                                 await asyncio.sleep(1)
 
-                            watch.save_history_text(contents=contents,
+                            await asyncio.to_thread(watch.save_history_text,
+                                                    contents=contents,
                                                     timestamp=int(fetch_start_time),
                                                     snapshot_id=update_obj.get('previous_md5', 'none'))
 
                             empty_pages_are_a_change = datastore.data['settings']['application'].get('empty_pages_are_a_change', False)
                             if update_handler.fetcher.content or (not update_handler.fetcher.content and empty_pages_are_a_change):
-                                watch.save_last_fetched_html(contents=update_handler.fetcher.content, timestamp=int(fetch_start_time))
+                                await asyncio.to_thread(watch.save_last_fetched_html, contents=update_handler.fetcher.content, timestamp=int(fetch_start_time))
+                            metrics.observe(metrics.PROCESSING_STAGE_SECONDS, time.perf_counter() - save_started,
+                                            processor=watch.get('processor', 'text_json_diff'), stage=metrics.STAGE_SAVE)
 
                             # Send notifications on second+ check
                             if watch.history_n >= 2:
@@ -365,6 +402,26 @@ async def async_update_worker(worker_id, q, notification_q, app, datastore):
                 datastore.update_watch(uuid=uuid, update_obj={'last_error': f"Worker error: {str(e)}"})
         
         finally:
+            check_seconds = time.perf_counter() - check_started
+            processor_name = watch.get('processor', 'text_json_diff') if watch else 'unknown'
+            metrics.observe(metrics.CHECK_SECONDS, check_seconds, processor=processor_name)
+            if metrics.enabled():
+                metrics.CHECKS_TOTAL.inc(result=check_result)
+                metrics.WORKER_BUSY_SECONDS.inc(check_seconds)
+            if update_handler and update_handler.stage_timings:
+                metrics.observe_stages(processor_name, update_handler.stage_timings.seconds)
+
+            # Give the host slot back, a 429/503 reply makes the host back off
+            if politeness_key:
+                retry_after = None
+                try:
+                    if update_handler and update_handler.fetcher:
+                        fetch_status_code = fetch_status_code or update_handler.fetcher.get_last_status_code()
+                        retry_after = update_handler.fetcher.get_all_headers().get('retry-after')
+                except Exception as politeness_error:
+                    logger.debug(f"Worker {worker_id} could not read the reply status for {uuid}: {politeness_error}")
+                host_scheduler.release(politeness_key, status_code=fetch_status_code, retry_after=retry_after)
+
             # Always cleanup - this runs whether there was an exception or not
             if uuid:
                 try:
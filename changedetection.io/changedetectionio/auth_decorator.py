@@ -3,6 +3,14 @@ from functools import wraps
 from flask import current_app, redirect, request
 from loguru import logger
 
+# With 'shared_diff_access' these are open without login, the diff page and the RegEx extract job it starts and polls
+SHARED_DIFF_ENDPOINTS = ('diff_history_page', 'diff_history_extract_progress', 'diff_history_extract_download')
+
+
+def is_shared_diff_endpoint(endpoint):
+    return bool(endpoint) and endpoint.rsplit('.', 1)[-1] in SHARED_DIFF_ENDPOINTS
+
+
 def login_optionally_required(func):
     """
     If password authentication is enabled, verify the user is logged in.
@@ -20,7 +28,7 @@ def login_optionally_required(func):
         has_password_enabled = datastore.data['settings']['application'].get('password') or os.getenv("SALTED_PASS", False)
 
         # Permitted
-        if request.endpoint and 'diff_history_page' in request.endpoint and datastore.data['settings']['application'].get('shared_diff_access'):
+        if is_shared_diff_endpoint(request.endpoint) and datastore.data['settings']['application'].get('shared_diff_access'):
             return func(*args, **kwargs)
         elif request.method in flask_login.config.EXEMPT_METHODS:
             return func(*args, **kwargs)
@@ -0,0 +1,159 @@
+"""
+Benchmarks of the change detection hot paths, with synthetic pages, histories and datastores so runs are repeatable.
+
+Not part of the test suite, each bench_*.py module registers its benchmarks with @benchmark, the runner times every
+one of them and writes the timings as JSON so two commits can be compared.
+
+    python3 -m changedetectionio.benchmarks --output before.json
+    python3 -m changedetectionio.benchmarks --output after.json -k html_to_text -k diff
+    python3 -m changedetectionio.benchmarks --compare before.json after.json
+
+--quick runs only the smallest parameter of each benchmark once, enough to see that nothing is broken.
+--compare exits with 1 when a benchmark got slower than --threshold (median, default 1.15 = 15% slower).
+
+A benchmark function does its setup and returns (or yields, to clean up afterwards) the callable that is timed,
+when that callable returns a number it is counted as items done per call and reported as items per second.
+"""
+
+import gc
+import importlib
+import inspect
+import os
+import pkgutil
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+# name -> {'function', 'params', 'rounds', 'warmup'}
+BENCHMARKS = {}
+
+
+def benchmark(name=None, params=None, rounds=5, warmup=1):
+    """
+    Register a benchmark.
+
+    :param params: Run it once for each of these values (passed as the only argument), smallest first
+    :param rounds: Timed calls, the median is what is compared
+    :param warmup: Untimed calls before the timed ones
+    """
+
+    def decorator(function):
+        BENCHMARKS[name or function.__name__] = {'function': function, 'params': params, 'rounds': rounds, 'warmup': warmup}
+        return function
+
+    return decorator
+
+
+def load_all():
+    """Import every bench_* module in this package, which registers their benchmarks"""
+    for module_info in pkgutil.iter_modules(__path__):
+        if module_info.name.startswith('bench_'):
+            importlib.import_module(f"{__name__}.{module_info.name}")
+    return BENCHMARKS
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _time_one(function, param, rounds, warmup):
+    setup = function(param) if param is not None else function()
+    generator = setup if inspect.isgenerator(setup) else None
+    call = next(generator) if generator else setup
+
+    try:
+        for _ in range(warmup):
+            call()
+
+        timings = []
+        items = None
+        for _ in range(rounds):
+            gc.collect()
+            start = time.perf_counter()
+            result = call()
+            timings.append(time.perf_counter() - start)
+            if isinstance(result, (int, float)) and not isinstance(result, bool):
+                items = result
+    finally:
+        if generator:
+            # Runs what comes after the yield
+            next(generator, None)
+
+    median = statistics.median(timings)
+    row = {
+        'rounds': rounds,
+        'min_seconds': min(timings),
+        'median_seconds': median,
+        'mean_seconds': statistics.fmean(timings),
+        'max_seconds': max(timings),
+        'stdev_seconds': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+    if items is not None:
+        row['items_per_call'] = items
+        row['items_per_second'] = items / median if median else None
+    return row
+
+
+def run(select=None, quick=False, progress=print):
+    """
+    :param select: Only benchmarks with one of these strings in their name
+    :param quick: Only the first parameter and one round of each
+    :return: The results dict that is written as JSON
+    """
+    results = {}
+    for name, spec in sorted(load_all().items()):
+        params = spec['params'] or [None]
+        if quick:
+            params = params[:1]
+        for param in params:
+            full_name = name if param is None else f"{name}[{param}]"
+            if select and not any(s in full_name for s in select):
+                continue
+            rounds, warmup = (1, 0) if quick else (spec['rounds'], spec['warmup'])
+            try:
+                results[full_name] = _time_one(spec['function'], param, rounds, warmup)
+            except Exception as e:
+                results[full_name] = {'error': f"{type(e).__name__}: {e}"}
+            if progress:
+                progress(format_row(full_name, results[full_name]))
+
+    return {
+        'commit': _git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'quick': quick,
+        'benchmarks': results,
+    }
+
+
+def format_row(name, row):
+    if 'error' in row:
+        return f"{name:<50} ERROR {row['error']}"
+    line = f"{name:<50}{row['median_seconds'] * 1000:>12.2f} ms  (min {row['min_seconds'] * 1000:.2f}, {row['rounds']} rounds)"
+    if row.get('items_per_second'):
+        line += f"  {row['items_per_second']:,.0f} items/s"
+    return line
+
+
+def compare(before, after, threshold=1.15):
+    """
+    Median of each benchmark in both results, after / before.
+
+    :return: [(name, before median, after median, ratio, slower than the threshold)]
+    """
+    rows = []
+    for name, new in sorted(after['benchmarks'].items()):
+        old = before['benchmarks'].get(name)
+        if not old or 'error' in old or 'error' in new:
+            continue
+        ratio = new['median_seconds'] / old['median_seconds'] if old['median_seconds'] else float('inf')
+        rows.append((name, old['median_seconds'], new['median_seconds'], ratio, ratio > threshold))
+    return rows
@@ -0,0 +1,48 @@
+import argparse
+import json
+import sys
+
+from loguru import logger
+
+from . import compare, fixtures, run
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m changedetectionio.benchmarks',
+                                     description='Benchmarks of the change detection hot paths')
+    parser.add_argument('-k', dest='select', action='append', help='Only benchmarks with this in their name (can be repeated)')
+    parser.add_argument('--output', '-o', help='Write the results to this JSON file')
+    parser.add_argument('--quick', action='store_true', help='Smallest parameter and one round only')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two results files')
+    parser.add_argument('--threshold', type=float, default=1.15, help='Slower than this ratio is a regression, default 1.15')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            before = json.load(f)
+        with open(args.compare[1]) as f:
+            after = json.load(f)
+        print(f"{before.get('commit') or '?'} -> {after.get('commit') or '?'}")
+        print(f"{'benchmark':<50}{'before ms':>12}{'after ms':>12}{'ratio':>8}")
+        rows = compare(before, after, threshold=args.threshold)
+        for name, old, new, ratio, slower in rows:
+            print(f"{name:<50}{old * 1000:>12.2f}{new * 1000:>12.2f}{ratio:>8.2f}{'  SLOWER' if slower else ''}")
+        sys.exit(1 if any(slower for *_, slower in rows) else 0)
+
+    # The per-watch debug logging would be most of what is measured
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+
+    try:
+        results = run(select=args.select, quick=args.quick)
+    finally:
+        fixtures.cleanup()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
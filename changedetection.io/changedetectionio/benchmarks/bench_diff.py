@@ -0,0 +1,16 @@
+from changedetectionio import diff
+from changedetectionio.benchmarks import benchmark, fixtures
+
+
+@benchmark(params=[2000, 20000])
+def render_diff(lines):
+    previous, newest = fixtures.text_versions(lines)
+    return lambda: diff.render_diff(previous_version_file_contents=previous, newest_version_file_contents=newest)
+
+
+@benchmark(params=[2000, 20000])
+def render_diff_changes_only(lines):
+    """What the notifications and the added/removed filters ask for"""
+    previous, newest = fixtures.text_versions(lines)
+    return lambda: diff.render_diff(previous_version_file_contents=previous, newest_version_file_contents=newest,
+                                    include_equal=False, line_feed_sep="\n")
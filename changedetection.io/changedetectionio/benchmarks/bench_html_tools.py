@@ -0,0 +1,28 @@
+from changedetectionio import html_tools
+from changedetectionio.benchmarks import benchmark, fixtures
+
+
+@benchmark(params=[500, 2000])
+def include_filters_css(products):
+    html = fixtures.large_html(products)
+    return lambda: html_tools.include_filters(include_filters='div.product .price', html_content=html)
+
+
+@benchmark(params=[500, 2000])
+def xpath_filter(products):
+    html = fixtures.large_html(products)
+    return lambda: html_tools.xpath_filter(xpath_filter='//div[contains(@class, "product")]//span[@class="price"]', html_content=html)
+
+
+@benchmark(params=[500, 2000])
+def html_to_text(products):
+    html = fixtures.large_html(products)
+    return lambda: html_tools.html_to_text(html_content=html)
+
+
+@benchmark(params=[500, 2000])
+def strip_ignore_text(products):
+    text = html_tools.html_to_text(html_content=fixtures.large_html(products))
+    # Plain text and regex rules, the usual mix
+    wordlist = ['shipping', 'warranty', 'Benchmark shop', r'/\$\d+\.\d{2}/', r'/^\s*(alpha|bravo)\b/i']
+    return lambda: html_tools.strip_ignore_text(content=text, wordlist=wordlist)
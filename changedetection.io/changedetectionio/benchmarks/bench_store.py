@@ -0,0 +1,34 @@
+from changedetectionio.benchmarks import benchmark, fixtures
+
+
+@benchmark(params=[1000, 10000])
+def watch_history(snapshots):
+    """Reading the history index, done for every history_n/newest_history_key/last_changed lookup"""
+    watch = fixtures.watch_with_history(snapshots)
+    return lambda: len(watch.history)
+
+
+@benchmark(params=[10000, 100000], rounds=3)
+def datastore_sync_to_json(watches):
+    store = fixtures.datastore(watches)
+
+    def save():
+        store.sync_to_json()
+        return watches
+
+    return save
+
+
+@benchmark(params=[10000, 100000], rounds=3)
+def scheduler_tick(watches):
+    """One pass of the recheck ticker over every watch, about half of them are due and get queued"""
+    from changedetectionio.custom_queue import SignalPriorityQueue
+    from changedetectionio.flask_app import queue_due_watches
+
+    store = fixtures.datastore(watches)
+
+    def tick():
+        queue_due_watches(store, SignalPriorityQueue(), queue_item=lambda q, item: q.put(item))
+        return watches
+
+    return tick
@@ -0,0 +1,72 @@
+import asyncio
+import queue
+import threading
+import time
+import types
+
+from changedetectionio.benchmarks import benchmark, fixtures
+
+WATCHES_PER_CALL = 200
+WORKERS = 10
+
+
+@benchmark(params=['unchanged', 'first_check'], rounds=3)
+def worker_throughput(mode):
+    """
+    Checks per second through the real async workers (fetch with html_requests, process, save) against a local
+    HTTP server that serves a 200 product page.
+
+    unchanged   - the same watches checked again and again, the page does not change (the usual case)
+    first_check - new watches every call, so every check writes its first snapshot
+    """
+    from changedetectionio import queuedWatchMetaData
+    from changedetectionio.async_update_worker import async_update_worker
+    from changedetectionio.custom_queue import AsyncSignalPriorityQueue
+    from changedetectionio.host_politeness import host_scheduler
+
+    base_url = fixtures.stub_http_server()
+    # first_check takes the next slice of never checked watches each call, enough for warmup + rounds
+    slices = 1 if mode == 'unchanged' else 6
+    store = fixtures.datastore(WATCHES_PER_CALL * slices, url_prefix=f"{base_url}/page")
+    store.data['settings']['application']['fetch_backend'] = 'html_requests'
+    uuids = list(store.data['watching'].keys())
+    calls = 0
+
+    # Everything is on one local host, with the per-host limit this would measure the politeness delays
+    max_inflight_per_host = host_scheduler.max_inflight_per_host
+    host_scheduler.max_inflight_per_host = 0
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True, name='BenchmarkWorkerLoop').start()
+    update_q = AsyncSignalPriorityQueue()
+    app = types.SimpleNamespace(config=types.SimpleNamespace(exit=threading.Event()))
+    workers = [asyncio.run_coroutine_threadsafe(async_update_worker(i, update_q, queue.Queue(), app, store), loop)
+               for i in range(WORKERS)]
+
+    def check_all():
+        nonlocal calls
+        batch = uuids if mode == 'unchanged' else uuids[calls * WATCHES_PER_CALL:(calls + 1) * WATCHES_PER_CALL]
+        if not batch:
+            raise RuntimeError("Ran out of new watches for first_check")
+        calls += 1
+
+        check_counts = {uuid: store.data['watching'][uuid].get('check_count', 0) for uuid in batch}
+        for uuid in batch:
+            item = queuedWatchMetaData.PrioritizedItem(priority=1, item={'uuid': uuid})
+            asyncio.run_coroutine_threadsafe(update_q.put(item), loop).result()
+
+        while any(store.data['watching'][uuid].get('check_count', 0) == count for uuid, count in check_counts.items()):
+            time.sleep(0.005)
+        return len(batch)
+
+    try:
+        yield check_all
+    finally:
+        app.config.exit.set()
+        for worker in workers:
+            try:
+                worker.result(timeout=5)
+            except Exception:
+                worker.cancel()
+        loop.call_soon_threadsafe(loop.stop)
+        host_scheduler.max_inflight_per_host = max_inflight_per_host
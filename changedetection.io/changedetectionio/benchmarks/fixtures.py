@@ -0,0 +1,154 @@
+"""
+Synthetic, seeded inputs for the benchmarks, the same every run so timings of two commits can be compared.
+
+Datastores are created in temporary directories and shared between the benchmarks that use the same size,
+cleanup() stops them and removes the directories.
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SEED = 20240101
+
+WORDS = ('alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike november oscar papa quebec '
+         'romeo sierra tango uniform victor whiskey xray yankee zulu price stock offer shipping warranty colour size '
+         'weight battery screen camera memory storage wireless charger cable adapter').split()
+
+_temp_dirs = []
+_stores = []
+_servers = []
+
+
+def words(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+@lru_cache(maxsize=None)
+def large_html(products=2000):
+    """A product listing page, scripts, navigation, nested divs and a spec table per product (about 1.5MB for 2000)"""
+    rng = random.Random(SEED)
+    state = json.dumps({'products': [{'id': i, 'sku': f"SKU-{i:06d}", 'tags': [rng.choice(WORDS) for _ in range(5)]} for i in range(200)]})
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Benchmark shop - all products</title>',
+        f'<script>window.__STATE__ = {state};</script>',
+        '<style>.product{margin:1em}.price{font-weight:bold}.hidden{display:none}</style></head><body>',
+        '<nav id="menu"><ul>' + ''.join(f'<li><a href="/c/{i}">{words(rng, 2)}</a></li>' for i in range(60)) + '</ul></nav>',
+        '<main id="content"><h1>All products</h1><div class="listing">',
+    ]
+    for i in range(products):
+        specs = ''.join(f'<tr><td class="label">{rng.choice(WORDS)}</td><td class="value">{rng.randint(1, 999)} {rng.choice(WORDS)}</td></tr>'
+                        for _ in range(4))
+        parts.append(
+            f'<div class="product{" sale" if i % 7 == 0 else ""}" id="p{i}" data-sku="SKU-{i:06d}">'
+            f'<div class="media"><img src="/img/{i}.jpg" alt="{words(rng, 3)}"></div>'
+            f'<div class="details"><h2 class="name"><a href="/p/{i}">{words(rng, 4).title()}</a></h2>'
+            f'<span class="price">${rng.randint(5, 2000)}.{rng.randint(0, 99):02d}</span>'
+            f'<p class="description">{words(rng, 30)}.</p>'
+            f'<table class="specs">{specs}</table>'
+            f'<span class="hidden">{words(rng, 5)}</span></div></div>'
+        )
+    parts.append('</div></main><footer><p>' + words(rng, 40) + '</p></footer>')
+    parts.append('<script>document.querySelectorAll(".hidden").forEach(function(e){e.remove()});</script></body></html>')
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=None)
+def text_versions(lines=20000, changed_every=100):
+    """(previous, newest) text snapshot, the newest has one line in every changed_every replaced, added or removed"""
+    rng = random.Random(SEED)
+    previous = [f"{words(rng, rng.randint(3, 12))} {rng.randint(0, 10000)}" for _ in range(lines)]
+    newest = []
+    for i, line in enumerate(previous):
+        if i % changed_every == 0:
+            kind = (i // changed_every) % 3
+            if kind == 0:
+                newest.append(f"{line} changed")
+            elif kind == 1:
+                newest.append(line)
+                newest.append(f"{words(rng, 6)} added")
+            # 2 = removed
+        else:
+            newest.append(line)
+    return '\n'.join(previous), '\n'.join(newest)
+
+
+def temp_dir(prefix='cdio-benchmark-'):
+    path = tempfile.mkdtemp(prefix=prefix)
+    _temp_dirs.append(path)
+    return path
+
+
+def watch_with_history(snapshots=10000):
+    """A Watch in a temporary data directory with a history index of this many snapshots (the files are not written)"""
+    from changedetectionio.model import Watch
+
+    watch = Watch.model(datastore_path=temp_dir(), default={'url': 'https://example.com/history'})
+    watch.ensure_data_dir_exists()
+    start = 1_600_000_000
+    with open(os.path.join(watch.watch_data_dir, 'history.txt'), 'w') as f:
+        for i in range(snapshots):
+            f.write(f"{start + i * 3600},{i:032x}.txt.br\n")
+    return watch
+
+
+@lru_cache(maxsize=None)
+def datastore(watches=10000, url_prefix='https://example.com/page'):
+    """
+    A ChangeDetectionStore with this many watches, last_checked spread over the last two recheck intervals
+    so about half of them are due for a check.
+    """
+    from changedetectionio.store import ChangeDetectionStore
+
+    store = ChangeDetectionStore(datastore_path=temp_dir(), include_default_watches=False)
+    _stores.append(store)
+    store.add_watches_bulk(((f"{url_prefix}/{i}", '') for i in range(watches)), write_to_disk_now=False)
+
+    rng = random.Random(SEED)
+    now = time.time()
+    interval = store.threshold_seconds
+    for watch in store.data['watching'].values():
+        watch['last_checked'] = int(now - rng.uniform(0, interval * 2))
+    return store
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        data = large_html(products=200).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def stub_http_server():
+    """A local HTTP server that serves the same product page for every path, returns its base URL"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name='BenchmarkStubServer').start()
+    _servers.append(server)
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def cleanup():
+    for server in _servers:
+        server.shutdown()
+        server.server_close()
+    for store in _stores:
+        store.stop_thread = True
+    for path in _temp_dirs:
+        shutil.rmtree(path, ignore_errors=True)
+    _servers.clear()
+    _stores.clear()
+    _temp_dirs.clear()
+    datastore.cache_clear()
@@ -1,8 +1,14 @@
 import datetime
 import glob
+import json
+import queue
 import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from flask import Blueprint, render_template, send_from_directory, flash, url_for, redirect, abort
+from flask import Blueprint, render_template, send_from_directory, flash, url_for, redirect, abort, request, Response
 import os
 
 from changedetectionio.store import ChangeDetectionStore
@@ -10,68 +16,215 @@ from changedetectionio.flask_app import login_optionally_required
 from loguru import logger
 
 BACKUP_FILENAME_FORMAT = "changedetection-backup-{}.zip"
+# Incremental backups only contain the files that changed since the previous backup
+BACKUP_INCREMENTAL_SUFFIX = "-incremental"
+# Size and modification time of every file in the last completed backup, what the next incremental backup is compared to
+BACKUP_MANIFEST_FILENAME = "changedetection-backup-manifest.json"
+# Inside every backup, lists every file of the datastore at the time (so a chain of incremental backups can be restored)
+BACKUP_ARCHIVE_MANIFEST = "backup-manifest.json"
+# Always in the backup, even when unchanged, so that any backup can be inspected on its own
+BACKUP_ALWAYS_INCLUDE = ("url-watches.json", "secret.txt")
+
+# Already compressed, deflating these again only costs CPU time
+BACKUP_STORED_EXTENSIONS = ('.br', '.gz', '.jpeg', '.jpg', '.png', '.webp', '.zip')
+BACKUP_COMPRESSION_LEVEL = int(os.getenv("BACKUP_COMPRESSION_LEVEL", 8))
+# Threads that stat and read the files ahead of the zip writer
+BACKUP_WORKERS = int(os.getenv("BACKUP_WORKERS", 4))
+# Bytes handed to the browser at a time when streaming a backup
+BACKUP_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _backup_files(datastore_path, watches: dict):
+    """(full path, name in the zip) of every file that belongs in a backup"""
+    from pathlib import Path
 
+    yield os.path.join(datastore_path, "url-watches.json"), "url-watches.json"
+    yield os.path.join(datastore_path, "secret.txt"), "secret.txt"
+
+    for uuid, w in list(watches.items()):
+        for f in Path(w.watch_data_dir).glob('*'):
+            # Use the full path to access the file, but make the file 'relative' in the Zip.
+            yield str(f), os.path.join(f.parts[-2], f.parts[-1])
+
+
+def _stat_file(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        # Watch was deleted or the history was cleared while the backup was running
+        return None
+
+
+def _read_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_to_zip(zipObj, arcname, data, mtime=None):
+    zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(mtime if mtime else time.time())[:6])
+    zinfo.external_attr = 0o644 << 16
+    if arcname.lower().endswith(BACKUP_STORED_EXTENSIONS):
+        zipObj.writestr(zinfo, data, compress_type=zipfile.ZIP_STORED)
+    else:
+        zipObj.writestr(zinfo, data, compress_type=zipfile.ZIP_DEFLATED, compresslevel=BACKUP_COMPRESSION_LEVEL)
+
+
+def load_backup_manifest(datastore_path):
+    try:
+        with open(os.path.join(datastore_path, BACKUP_MANIFEST_FILENAME), 'r') as f:
+            return json.load(f).get('files')
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_backup(fileobj, watches: dict, datastore_path, previous_manifest=None):
+    """
+    Write a backup zip to fileobj, a path or any writable file object (it does not need to be seekable).
+
+    With previous_manifest only the files which are new or have a different size/modification time are added.
+    Files are stat'ed and read ahead by a small thread pool while the zip is written, already compressed files
+    (brotli snapshots, screenshots) are stored as they are instead of being compressed again.
+
+    Returns the manifest {name in zip: [size, mtime_ns]} of every file in the datastore
+    """
+    files = list(_backup_files(datastore_path, watches))
+    manifest = {}
+    to_add = []
+
+    with ThreadPoolExecutor(max_workers=max(1, BACKUP_WORKERS), thread_name_prefix="backup") as executor, \
+            zipfile.ZipFile(fileobj, "w") as zipObj:
+
+        for (path, arcname), st in zip(files, executor.map(_stat_file, [path for path, arcname in files])):
+            if st is None:
+                continue
+            manifest[arcname] = [st.st_size, st.st_mtime_ns]
+            if previous_manifest is None or arcname in BACKUP_ALWAYS_INCLUDE or previous_manifest.get(arcname) != manifest[arcname]:
+                to_add.append((path, arcname, st.st_mtime))
+
+        # Read ahead a few files at a time so memory stays bounded however big the datastore is
+        pending = deque()
+        to_add_iter = iter(to_add)
+        for i in range(max(1, BACKUP_WORKERS) * 4):
+            item = next(to_add_iter, None)
+            if not item:
+                break
+            pending.append((item, executor.submit(_read_file, item[0])))
+
+        while pending:
+            (path, arcname, mtime), future = pending.popleft()
+            item = next(to_add_iter, None)
+            if item:
+                pending.append((item, executor.submit(_read_file, item[0])))
+            data = future.result()
+            if data is None:
+                manifest.pop(arcname, None)
+                continue
+            _write_to_zip(zipObj, arcname, data, mtime=mtime)
 
-def create_backup(datastore_path, watches: dict):
-    logger.debug("Creating backup...")
-    import zipfile
-    from pathlib import Path
+        # Create a list file with just the URLs, so it's easier to port somewhere else in the future
+        _write_to_zip(zipObj, "url-list.txt", "".join("{}\r\n".format(w.get('url')) for w in list(watches.values())))
+        _write_to_zip(zipObj, "url-list-with-tags.txt",
+                      "".join("{} {}\r\n".format(w.get('url'), w.get('tags', {})) for w in list(watches.values())))
 
-    # create a ZipFile object
-    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-    backupname = BACKUP_FILENAME_FORMAT.format(timestamp)
-    backup_filepath = os.path.join(datastore_path, backupname)
+        _write_to_zip(zipObj, BACKUP_ARCHIVE_MANIFEST, json.dumps({
+            'incremental': previous_manifest is not None,
+            'files': manifest
+        }, indent=2))
 
-    with zipfile.ZipFile(backup_filepath.replace('.zip', '.tmp'), "w",
-                         compression=zipfile.ZIP_DEFLATED,
-                         compresslevel=8) as zipObj:
+    return manifest
 
-        # Add the index
-        zipObj.write(os.path.join(datastore_path, "url-watches.json"), arcname="url-watches.json")
 
-        # Add the flask app secret
-        zipObj.write(os.path.join(datastore_path, "secret.txt"), arcname="secret.txt")
+def create_backup(datastore_path, watches: dict, incremental=False):
+    logger.debug("Creating backup...")
 
-        # Add any data in the watch data directory.
-        for uuid, w in watches.items():
-            for f in Path(w.watch_data_dir).glob('*'):
-                zipObj.write(f,
-                             # Use the full path to access the file, but make the file 'relative' in the Zip.
-                             arcname=os.path.join(f.parts[-2], f.parts[-1]),
-                             compress_type=zipfile.ZIP_DEFLATED,
-                             compresslevel=8)
+    previous_manifest = None
+    if incremental:
+        previous_manifest = load_backup_manifest(datastore_path)
+        if previous_manifest is None:
+            logger.warning("No previous backup to compare to, creating a full backup instead of an incremental one")
 
-        # Create a list file with just the URLs, so it's easier to port somewhere else in the future
-        list_file = "url-list.txt"
-        with open(os.path.join(datastore_path, list_file), "w") as f:
-            for uuid in watches:
-                url = watches[uuid]["url"]
-                f.write("{}\r\n".format(url))
-        list_with_tags_file = "url-list-with-tags.txt"
-        with open(
-                os.path.join(datastore_path, list_with_tags_file), "w"
-        ) as f:
-            for uuid in watches:
-                url = watches[uuid].get('url')
-                tag = watches[uuid].get('tags', {})
-                f.write("{} {}\r\n".format(url, tag))
-
-        # Add it to the Zip
-        zipObj.write(
-            os.path.join(datastore_path, list_file),
-            arcname=list_file,
-            compress_type=zipfile.ZIP_DEFLATED,
-            compresslevel=8,
-        )
-        zipObj.write(
-            os.path.join(datastore_path, list_with_tags_file),
-            arcname=list_with_tags_file,
-            compress_type=zipfile.ZIP_DEFLATED,
-            compresslevel=8,
-        )
+    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    backupname = BACKUP_FILENAME_FORMAT.format(timestamp + (BACKUP_INCREMENTAL_SUFFIX if previous_manifest is not None else ''))
+    backup_filepath = os.path.join(datastore_path, backupname)
+
+    manifest = write_backup(backup_filepath.replace('.zip', '.tmp'), watches, datastore_path, previous_manifest=previous_manifest)
 
     # Now it's done, rename it so it shows up finally and its completed being written.
-    os.rename(backup_filepath.replace('.zip', '.tmp'), backup_filepath.replace('.tmp', '.zip'))
+    os.rename(backup_filepath.replace('.zip', '.tmp'), backup_filepath)
+
+    # Only a completed backup can be the base of the next incremental backup
+    manifest_path = os.path.join(datastore_path, BACKUP_MANIFEST_FILENAME)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump({'backup': backupname, 'files': manifest}, f)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    logger.debug(f"Backup {backupname} completed")
+
+
+class _StreamWriter:
+    """Write-only file object for ZipFile which hands the output to the download response in chunks"""
+
+    def __init__(self, q: queue.Queue):
+        self.q = q
+        self.buffer = bytearray()
+        self.aborted = threading.Event()
+
+    def put(self, item):
+        # Block while the browser is slow to read, but give up if it went away
+        while True:
+            if self.aborted.is_set():
+                raise BrokenPipeError("Backup download was cancelled")
+            try:
+                self.q.put(item, timeout=1)
+                return
+            except queue.Full:
+                pass
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= BACKUP_STREAM_CHUNK_SIZE:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+        return len(data)
+
+    def flush(self):
+        if self.buffer:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+
+
+def stream_backup(datastore_path, watches: dict):
+    """Generator of the bytes of a complete (not incremental) backup zip, nothing is written to disk"""
+    q = queue.Queue(maxsize=16)
+    writer = _StreamWriter(q)
+
+    def run():
+        try:
+            write_backup(writer, watches, datastore_path)
+            writer.flush()
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            logger.error(f"Error streaming backup - {str(e)}")
+        finally:
+            try:
+                writer.put(None)
+            except BrokenPipeError:
+                pass
+
+    thread = threading.Thread(target=run, daemon=True, name="backup-stream")
+    thread.start()
+    try:
+        while True:
+            chunk = q.get()
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        writer.aborted.set()
 
 
 def construct_blueprint(datastore: ChangeDetectionStore):
@@ -91,7 +244,9 @@ def construct_blueprint(datastore: ChangeDetectionStore):
 
         # Be sure we're written fresh
         datastore.sync_to_json()
-        zip_thread = threading.Thread(target=create_backup, args=(datastore.datastore_path, datastore.data.get("watching")))
+        zip_thread = threading.Thread(target=create_backup,
+                                      args=(datastore.datastore_path, datastore.data.get("watching")),
+                                      kwargs={'incremental': request.args.get('incremental') == '1'})
         zip_thread.start()
         backup_threads.append(zip_thread)
         flash("Backup building in background, check back in a few minutes.")
@@ -109,7 +264,8 @@ def construct_blueprint(datastore: ChangeDetectionStore):
             backup_info.append({
                 'filename': os.path.basename(backup),
                 'filesize': f"{size:.2f}",
-                'creation_time': creation_time
+                'creation_time': creation_time,
+                'incremental': BACKUP_INCREMENTAL_SUFFIX in os.path.basename(backup)
             })
 
         backup_info.sort(key=lambda x: x['creation_time'], reverse=True)
@@ -121,7 +277,7 @@ def construct_blueprint(datastore: ChangeDetectionStore):
     def download_backup(filename):
         import re
         filename = filename.strip()
-        backup_filename_regex = BACKUP_FILENAME_FORMAT.format("\d+")
+        backup_filename_regex = BACKUP_FILENAME_FORMAT.format(r"\d+(" + BACKUP_INCREMENTAL_SUFFIX + ")?")
 
         full_path = os.path.join(os.path.abspath(datastore.datastore_path), filename)
         if not full_path.startswith(os.path.abspath(datastore.datastore_path)):
@@ -137,6 +293,17 @@ def construct_blueprint(datastore: ChangeDetectionStore):
         logger.debug(f"Backup download request for '{full_path}'")
         return send_from_directory(os.path.abspath(datastore.datastore_path), filename, as_attachment=True)
 
+    @login_optionally_required
+    @backups_blueprint.route("/download-now", methods=['GET'])
+    def download_backup_now():
+        # Be sure we're written fresh
+        datastore.sync_to_json()
+        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+        logger.debug("Streaming backup download")
+        return Response(stream_backup(datastore.datastore_path, datastore.data.get("watching")),
+                        mimetype='application/zip',
+                        headers={'Content-Disposition': f'attachment; filename="{BACKUP_FILENAME_FORMAT.format(timestamp)}"'})
+
     @login_optionally_required
     @backups_blueprint.route("", methods=['GET'])
     def index():
@@ -157,6 +324,10 @@ def construct_blueprint(datastore: ChangeDetectionStore):
         for backup in backups:
             os.unlink(backup)
 
+        # Incremental backups need the earlier backups, so the next one has to be a full backup
+        if os.path.isfile(os.path.join(datastore.datastore_path, BACKUP_MANIFEST_FILENAME)):
+            os.unlink(os.path.join(datastore.datastore_path, BACKUP_MANIFEST_FILENAME))
+
         flash("Backups were deleted.")
 
         return redirect(url_for('backups.index'))
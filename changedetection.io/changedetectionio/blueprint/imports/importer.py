@@ -1,4 +1,5 @@
 from abc import abstractmethod
+import os
 import time
 from wtforms import ValidationError
 from loguru import logger
@@ -37,12 +38,10 @@ class import_url_list(Importer):
             ):
 
         urls = data.split("\n")
-        good = 0
         now = time.time()
+        max_urls = int(os.getenv('IMPORT_MAX_URLS', 100000))
 
-        if (len(urls) > 5000):
-            flash("Importing 5,000 of the first URLs from your list, the rest can be imported again.")
-
+        entries = []
         for url in urls:
             url = url.strip()
             if not len(url):
@@ -55,25 +54,28 @@ class import_url_list(Importer):
                 url, tags = url.split(" ", 1)
 
             # Flask wtform validators wont work with basic auth, use validators package
-            # Up to 5000 per batch so we dont flood the server
             # @todo validators.url will fail when you add your own IP etc
-            if len(url) and 'http' in url.lower() and good < 5000:
-                extras = None
-                if processor:
-                    extras = {'processor': processor}
-                new_uuid = datastore.add_watch(url=url.strip(), tag=tags, write_to_disk_now=False, extras=extras)
-
-                if new_uuid:
-                    # Straight into the queue.
-                    self.new_uuids.append(new_uuid)
-                    good += 1
-                    continue
+            if len(url) and 'http' in url.lower() and len(entries) < max_urls:
+                entries.append((url.strip(), tags))
+                continue
 
             # Worked past the 'continue' above, append it to the bad list
             if self.remaining_data is None:
                 self.remaining_data = []
             self.remaining_data.append(url)
 
+        if len(self.remaining_data) and len(entries) == max_urls:
+            flash(f"Importing {max_urls:,} of the first URLs from your list, the rest can be imported again.")
+
+        extras = None
+        if processor:
+            extras = {'processor': processor}
+
+        # All in one go, tags are looked up once and the JSON is written once
+        self.new_uuids, skipped = datastore.add_watches_bulk(entries=entries, extras=extras)
+        self.remaining_data += skipped
+        good = len(self.new_uuids)
+
         flash("{} Imported from list in {:.2f}s, {} Skipped.".format(good, time.time() - now, len(self.remaining_data)))
 
 
@@ -4,14 +4,50 @@ from changedetectionio.store import ChangeDetectionStore
 from feedgen.feed import FeedGenerator
 from flask import Blueprint, make_response, request, url_for, redirect
 from loguru import logger
+from collections import OrderedDict
 import datetime
+import os
 import pytz
 import re
+import threading
 import time
 
 
 BAD_CHARS_REGEX=r'[\x00-\x08\x0B\x0C\x0E-\x1F]'
 
+# How many rendered watch entries and whole feeds (one per tag) are kept
+RSS_ENTRY_CACHE_SIZE = int(os.getenv('RSS_ENTRY_CACHE_SIZE', 1000))
+RSS_FEED_CACHE_SIZE = int(os.getenv('RSS_FEED_CACHE_SIZE', 50))
+
+
+class LRUCache:
+    """Size bounded and thread safe, the least recently used entries are dropped first"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_missing(self, keep):
+        """Drop the entries whose key is not in keep"""
+        with self.lock:
+            for key in [key for key in self._entries.keys() if key not in keep]:
+                del self._entries[key]
+
 # Anything that is not text/UTF-8 should be stripped before it breaks feedgen (such as binary data etc)
 def scan_invalid_chars_in_rss(content):
     for match in re.finditer(BAD_CHARS_REGEX, content):
@@ -36,6 +72,57 @@ def clean_entry_content(content):
 def construct_blueprint(datastore: ChangeDetectionStore):
     rss_blueprint = Blueprint('rss', __name__)
 
+    # RSS readers poll often, so keep the rendered pieces around
+    # uuid -> (cache key, entry dict), the cache key changes whenever a new snapshot is saved
+    entry_cache = LRUCache(RSS_ENTRY_CACHE_SIZE)
+    # tag uuid (None for all watches) -> (etag, rss bytes)
+    feed_cache = LRUCache(RSS_FEED_CACHE_SIZE)
+
+    def build_entry(watch, html_colour_enable):
+        """Render the diff/content for a watch, this is the expensive part (history index read, 2x snapshot read, diff)"""
+        from changedetectionio import diff
+
+        dates = list(watch.history.keys())
+        watch_title = watch.get('title') if watch.get('title') else watch.get('url')
+
+        try:
+            snapshots = watch.get_history_snapshots(dates[-2:])
+            html_diff = diff.render_diff(previous_version_file_contents=snapshots[dates[-2]],
+                                         newest_version_file_contents=snapshots[dates[-1]],
+                                         include_equal=False,
+                                         line_feed_sep="<br>",
+                                         html_colour=html_colour_enable
+                                         )
+        except FileNotFoundError as e:
+            html_diff = f"History snapshot file for watch {watch.get('uuid')}@{watch.last_changed} - '{watch.get('title')} not found."
+
+        # @todo Make this configurable and also consider html-colored markup
+        # @todo User could decide if <link> goes to the diff page, or to the watch link
+        rss_template = "<html><body>\n<h4><a href=\"{{watch_url}}\">{{watch_title}}</a></h4>\n<p>{{html_diff}}</p>\n</body></html>\n"
+
+        content = jinja_render(template_str=rss_template, watch_title=watch_title, html_diff=html_diff, watch_url=watch.link)
+
+        # Out of range chars could also break feedgen
+        if scan_invalid_chars_in_rss(content):
+            content = clean_entry_content(content)
+
+        return {
+            'title': watch_title,
+            'content': content,
+            'pub_date': datetime.datetime.fromtimestamp(int(watch.newest_history_key)).replace(tzinfo=pytz.UTC),
+        }
+
+    def get_entry(watch, html_colour_enable):
+        # Anything that ends up in the entry content is part of the key
+        cache_key = (watch.newest_history_key, watch.history_n, html_colour_enable, watch.get('title'), watch.get('url'))
+        cached = entry_cache.get(watch['uuid'])
+        if cached and cached[0] == cache_key:
+            return cached[1]
+
+        entry = build_entry(watch, html_colour_enable)
+        entry_cache.put(watch['uuid'], (cache_key, entry))
+        return entry
+
     # Some RSS reader situations ended up with rss/ (forward slash after RSS) due
     # to some earlier blueprint rerouting work, it should goto feed.
     @rss_blueprint.route("/", methods=['GET'])
@@ -46,6 +133,7 @@ def construct_blueprint(datastore: ChangeDetectionStore):
     # from changedetectionio.auth_decorator import login_optionally_required
     @rss_blueprint.route("", methods=['GET'])
     def feed():
+        import hashlib
         now = time.time()
         # Always requires token set
         app_rss_token = datastore.data['settings']['application'].get('rss_access_token')
@@ -53,10 +141,10 @@ def construct_blueprint(datastore: ChangeDetectionStore):
         if rss_url_token != app_rss_token:
             return "Access denied, bad token", 403
 
-        from changedetectionio import diff
         limit_tag = request.args.get('tag', '').lower().strip()
         # Be sure limit_tag is a uuid
-        for uuid, tag in datastore.data['settings']['application'].get('tags', {}).items():
+        tags = datastore.data['settings']['application'].get('tags', {})
+        for uuid, tag in tags.items():
             if limit_tag == tag.get('title', '').lower().strip():
                 limit_tag = uuid
 
@@ -75,23 +163,36 @@ def construct_blueprint(datastore: ChangeDetectionStore):
 
         sorted_watches.sort(key=lambda x: x.last_changed, reverse=False)
 
-        fg = FeedGenerator()
-        fg.title('changedetection.io')
-        fg.description('Feed description')
-        fg.link(href='https://changedetection.io')
-
         html_colour_enable = False
         if datastore.data['settings']['application'].get('rss_content_format') == 'html':
             html_colour_enable = True
 
-        for watch in sorted_watches:
-
-            dates = list(watch.history.keys())
-            # Re #521 - Don't bother processing this one if theres less than 2 snapshots, means we never had a change detected.
-            if len(dates) < 2:
-                continue
+        # Re #521 - Don't bother processing watches with less than 2 snapshots, means we never had a change detected.
+        feed_watches = [watch for watch in sorted_watches if watch.history_n >= 2 and not watch.viewed]
+
+        # Everything the feed output depends on, only in-memory values here so this stays cheap
+        signature = hashlib.md5(repr((
+            request.url_root,
+            html_colour_enable,
+            [(w['uuid'], w.newest_history_key, w.history_n, w.get('title'), w.get('url')) for w in feed_watches]
+        )).encode('utf-8')).hexdigest()
+
+        # Only cached per known tag, any other ?tag= value would just fill the cache
+        feed_cache_key = limit_tag if limit_tag else None
+        cacheable = not limit_tag or limit_tag in tags
+        cached = feed_cache.get(feed_cache_key) if cacheable else None
+        if cached and cached[0] == signature:
+            rss_content = cached[1]
+            logger.trace(f"RSS served from cache in {time.time() - now:.3f}s")
+        else:
+            fg = FeedGenerator()
+            fg.title('changedetection.io')
+            fg.description('Feed description')
+            fg.link(href='https://changedetection.io')
+
+            for watch in feed_watches:
+                entry = get_entry(watch, html_colour_enable)
 
-            if not watch.viewed:
                 # Re #239 - GUID needs to be individual for each event
                 # @todo In the future make this a configurable link back (see work on BASE_URL https://github.com/dgtlmoon/changedetection.io/pull/228)
                 guid = "{}/{}".format(watch['uuid'], watch.last_changed)
@@ -99,49 +200,28 @@ def construct_blueprint(datastore: ChangeDetectionStore):
 
                 # Include a link to the diff page, they will have to login here to see if password protection is enabled.
                 # Description is the page you watch, link takes you to the diff JS UI page
-                # Dict val base_url will get overriden with the env var if it is set.
-                ext_base_url = datastore.data['settings']['application'].get('active_base_url')
-                # @todo fix
-
                 # Because we are called via whatever web server, flask should figure out the right path (
                 diff_link = {'href': url_for('ui.ui_views.diff_history_page', uuid=watch['uuid'], _external=True)}
 
                 fe.link(link=diff_link)
+                fe.title(title=entry['title'])
+                fe.content(content=entry['content'], type='CDATA')
+                fe.guid(guid, permalink=False)
+                fe.pubDate(entry['pub_date'])
 
-                # @todo watch should be a getter - watch.get('title') (internally if URL else..)
-
-                watch_title = watch.get('title') if watch.get('title') else watch.get('url')
-                fe.title(title=watch_title)
-                try:
-
-                    html_diff = diff.render_diff(previous_version_file_contents=watch.get_history_snapshot(dates[-2]),
-                                                 newest_version_file_contents=watch.get_history_snapshot(dates[-1]),
-                                                 include_equal=False,
-                                                 line_feed_sep="<br>",
-                                                 html_colour=html_colour_enable
-                                                 )
-                except FileNotFoundError as e:
-                    html_diff = f"History snapshot file for watch {watch.get('uuid')}@{watch.last_changed} - '{watch.get('title')} not found."
-
-                # @todo Make this configurable and also consider html-colored markup
-                # @todo User could decide if <link> goes to the diff page, or to the watch link
-                rss_template = "<html><body>\n<h4><a href=\"{{watch_url}}\">{{watch_title}}</a></h4>\n<p>{{html_diff}}</p>\n</body></html>\n"
-
-                content = jinja_render(template_str=rss_template, watch_title=watch_title, html_diff=html_diff, watch_url=watch.link)
+            rss_content = fg.rss_str()
+            if cacheable:
+                feed_cache.put(feed_cache_key, (signature, rss_content))
 
-                # Out of range chars could also break feedgen
-                if scan_invalid_chars_in_rss(content):
-                    content = clean_entry_content(content)
+            # Forget entries of watches that no longer exist
+            entry_cache.discard_missing(datastore.data['watching'])
 
-                fe.content(content=content, type='CDATA')
-                fe.guid(guid, permalink=False)
-                dt = datetime.datetime.fromtimestamp(int(watch.newest_history_key))
-                dt = dt.replace(tzinfo=pytz.UTC)
-                fe.pubDate(dt)
+            logger.trace(f"RSS generated in {time.time() - now:.3f}s")
 
-        response = make_response(fg.rss_str())
+        response = make_response(rss_content)
         response.headers.set('Content-Type', 'application/rss+xml;charset=utf-8')
-        logger.trace(f"RSS generated in {time.time() - now:.3f}s")
-        return response
+        response.set_etag(signature)
+        # Turns into a 304 Not Modified when the reader sent a matching If-None-Match
+        return response.make_conditional(request)
 
-    return rss_blueprint
\ No newline at end of file
+    return rss_blueprint
@@ -81,7 +81,7 @@ def construct_blueprint(datastore: ChangeDetectionStore, update_q, queuedWatchMe
     @views_blueprint.route("/diff/<string:uuid>", methods=['GET', 'POST'])
     @login_optionally_required
     def diff_history_page(uuid):
-        from changedetectionio import forms
+        from changedetectionio import forms, history_extract
 
         # More for testing, possible to return the first/only
         if uuid == 'first':
@@ -102,6 +102,12 @@ def construct_blueprint(datastore: ChangeDetectionStore, update_q, queuedWatchMe
 
             else:
                 extract_regex = request.form.get('extract_regex').strip()
+
+                # Long histories are extracted in the background, the page shows the progress
+                if watch.history_n > history_extract.inline_snapshots() and not history_extract.cached_report(watch, extract_regex):
+                    job = history_extract.start_extraction(watch, extract_regex)
+                    return redirect(url_for('ui.ui_views.diff_history_page', uuid=uuid, extract_job=job.id) + '#extract')
+
                 output = watch.extract_regex_from_all_history(extract_regex)
                 if output:
                     watch_dir = os.path.join(datastore.datastore_path, uuid)
@@ -134,11 +140,6 @@ def construct_blueprint(datastore: ChangeDetectionStore, update_q, queuedWatchMe
         else:
             from_version = dates[from_version_index]
 
-        try:
-            from_version_file_contents = watch.get_history_snapshot(dates[from_version_index])
-        except Exception as e:
-            from_version_file_contents = f"Unable to read to-version at index {dates[from_version_index]}.\n"
-
         to_version = request.args.get('to_version')
         to_version_index = -1
         if to_version and to_version in dates:
@@ -146,10 +147,10 @@ def construct_blueprint(datastore: ChangeDetectionStore, update_q, queuedWatchMe
         else:
             to_version = dates[to_version_index]
 
-        try:
-            to_version_file_contents = watch.get_history_snapshot(dates[to_version_index])
-        except Exception as e:
-            to_version_file_contents = "Unable to read to-version at index{}.\n".format(dates[to_version_index])
+        # Both in one go, the history index is only read once
+        snapshots = watch.get_history_snapshots([dates[from_version_index], dates[to_version_index]], skip_unreadable=True)
+        from_version_file_contents = snapshots.get(dates[from_version_index], f"Unable to read to-version at index {dates[from_version_index]}.\n")
+        to_version_file_contents = snapshots.get(dates[to_version_index], "Unable to read to-version at index{}.\n".format(dates[to_version_index]))
 
         screenshot_url = watch.get_screenshot()
 
@@ -170,6 +171,7 @@ def construct_blueprint(datastore: ChangeDetectionStore, update_q, queuedWatchMe
                                  extra_stylesheets=extra_stylesheets,
                                  extra_title=f" - Diff - {watch.label}",
                                  extract_form=extract_form,
+                                 extract_job=history_extract.get_job(request.args.get('extract_job')) if request.args.get('extract_job') else None,
                                  is_html_webdriver=is_html_webdriver,
                                  last_error=watch['last_error'],
                                  last_error_screenshot=watch.get_error_snapshot(),
@@ -188,6 +190,32 @@ def construct_blueprint(datastore: ChangeDetectionStore, update_q, queuedWatchMe
 
         return output
 
+    @views_blueprint.route("/diff/<string:uuid>/extract/<string:job_id>", methods=['GET'])
+    @login_optionally_required
+    def diff_history_extract_progress(uuid, job_id):
+        from changedetectionio import history_extract
+
+        job = history_extract.get_job(job_id)
+        if not job or job.watch_uuid != uuid:
+            abort(404)
+
+        return job.as_dict()
+
+    @views_blueprint.route("/diff/<string:uuid>/extract/<string:job_id>/download", methods=['GET'])
+    @login_optionally_required
+    def diff_history_extract_download(uuid, job_id):
+        from changedetectionio import history_extract
+
+        job = history_extract.get_job(job_id)
+        if not job or job.watch_uuid != uuid or not job.filename:
+            abort(404)
+
+        watch_dir = os.path.join(datastore.datastore_path, uuid)
+        response = make_response(send_from_directory(directory=watch_dir, path=job.filename, as_attachment=True))
+        response.headers['Content-type'] = 'text/csv'
+        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        return response
+
     @views_blueprint.route("/form/add/quickwatch", methods=['POST'])
     @login_optionally_required
     def form_quick_watch_add():
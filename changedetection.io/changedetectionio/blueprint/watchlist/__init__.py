@@ -41,12 +41,22 @@ def construct_blueprint(datastore: ChangeDetectionStore, update_q, queuedWatchMe
             datastore.needs_write = True
             return redirect(url_for('watchlist.index', tag = active_tag_uuid))
 
-        # Sort by last_changed and add the uuid which is usually the key..
-        sorted_watches = []
+        sort_attribute = request.args.get('sort') if request.args.get('sort') else request.cookies.get('sort')
+        sort_order = request.args.get('order') if request.args.get('order') else request.cookies.get('order')
+        sort_attribute = datastore.sort_index.normalise_attribute(sort_attribute) or 'last_changed'
+        sort_order = sort_order if sort_order in ('asc', 'desc') else 'asc'
+
+        # The watches are already kept in order by the sort index, 'asc' here has always meant the newest/highest first
         with_errors = request.args.get('with_errors') == "1"
         errored_count = 0
         search_q = request.args.get('q').strip().lower() if request.args.get('q') else False
-        for uuid, watch in datastore.data['watching'].items():
+        # Matches title, URL and error text
+        search_matches = set(datastore.search_watches_for_url(query=search_q, partial=True)) if search_q else None
+        matching_uuids = []
+        for uuid in datastore.sort_index.uuids(sort_attribute, reverse=sort_order == 'asc'):
+            watch = datastore.data['watching'].get(uuid)
+            if not watch:
+                continue
             if with_errors and not watch.get('last_error'):
                 continue
 
@@ -55,21 +65,23 @@ def construct_blueprint(datastore: ChangeDetectionStore, update_q, queuedWatchMe
             if watch.get('last_error'):
                 errored_count += 1
 
-            if search_q:
-                if (watch.get('title') and search_q in watch.get('title').lower()) or search_q in watch.get('url', '').lower():
-                    sorted_watches.append(watch)
-                elif watch.get('last_error') and search_q in watch.get('last_error').lower():
-                    sorted_watches.append(watch)
-            else:
-                sorted_watches.append(watch)
+            if search_matches is not None and uuid not in search_matches:
+                continue
+            matching_uuids.append(uuid)
 
         form = forms.quickWatchForm(request.form)
         page = request.args.get(get_page_parameter(), type=int, default=1)
-        total_count = len(sorted_watches)
+        total_count = len(matching_uuids)
+        per_page = datastore.data['settings']['application'].get('pager_size', 50)
 
         pagination = Pagination(page=page,
                                 total=total_count,
-                                per_page=datastore.data['settings']['application'].get('pager_size', 50), css_framework="semantic")
+                                per_page=per_page, css_framework="semantic")
+
+        # Only the watches on this page are handed to the template
+        if per_page:
+            matching_uuids = matching_uuids[pagination.skip:pagination.skip + per_page]
+        page_watches = [datastore.data['watching'][uuid] for uuid in matching_uuids]
 
         sorted_tags = sorted(datastore.data['settings']['application'].get('tags').items(), key=lambda x: x[1]['title'])
 
@@ -87,13 +99,13 @@ def construct_blueprint(datastore: ChangeDetectionStore, update_q, queuedWatchMe
             hosted_sticky=os.getenv("SALTED_PASS", False) == False,
             now_time_server=round(time.time()),
             pagination=pagination,
-            queued_uuids=[q_uuid.item['uuid'] for q_uuid in update_q.queue],
+            queued_uuids=update_q.queued_uuids(),
             search_q=request.args.get('q', '').strip(),
-            sort_attribute=request.args.get('sort') if request.args.get('sort') else request.cookies.get('sort'),
-            sort_order=request.args.get('order') if request.args.get('order') else request.cookies.get('order'),
+            sort_attribute=sort_attribute,
+            sort_order=sort_order,
             system_default_fetcher=datastore.data['settings']['application'].get('fetch_backend'),
             tags=sorted_tags,
-            watches=sorted_watches
+            watches=page_watches
         )
 
         if session.get('share-link'):
@@ -1,3 +1,9 @@
+import concurrent.futures
+import os
+import threading
+import time
+from functools import lru_cache
+
 from flask import Blueprint
 
 from json_logic.builtins import BUILTINS
@@ -32,6 +38,61 @@ CUSTOM_OPERATIONS = {
     **BUILTINS,  # Include all standard operators
 }
 
+# Plugin name -> set of the fields it provides (from register_field_choices), plugins that declare nothing always run
+PLUGIN_PROVIDED_FIELDS = {}
+
+# How long a plugin can take before its data is skipped for this check
+CONDITIONS_PLUGIN_TIMEOUT = int(os.getenv("CONDITIONS_PLUGIN_TIMEOUT", 10))
+# Shared by every check, so a slow or stuck plugin can never hold more than these threads
+CONDITIONS_PLUGIN_WORKERS = int(os.getenv("CONDITIONS_PLUGIN_WORKERS", 10))
+
+_plugin_executor = None
+_plugin_executor_lock = threading.Lock()
+
+# Plugin name -> {'runs', 'errors', 'timeouts', 'total_seconds', 'last_seconds', 'max_seconds'}
+_plugin_stats = {}
+_plugin_stats_lock = threading.Lock()
+
+
+def get_plugin_executor():
+    global _plugin_executor
+    with _plugin_executor_lock:
+        if _plugin_executor is None:
+            _plugin_executor = concurrent.futures.ThreadPoolExecutor(max_workers=CONDITIONS_PLUGIN_WORKERS,
+                                                                     thread_name_prefix="conditions-plugin")
+        return _plugin_executor
+
+
+def _record_plugin_stat(plugin_name, seconds=None, error=False, timeout=False):
+    with _plugin_stats_lock:
+        stats = _plugin_stats.setdefault(plugin_name, {'runs': 0, 'errors': 0, 'timeouts': 0, 'total_seconds': 0.0, 'last_seconds': 0.0, 'max_seconds': 0.0})
+        if seconds is not None:
+            stats['runs'] += 1
+            stats['total_seconds'] += seconds
+            stats['last_seconds'] = seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+        if error:
+            stats['errors'] += 1
+        if timeout:
+            stats['timeouts'] += 1
+
+
+def get_plugin_execution_stats():
+    """Copy of the execution time statistics of each conditions plugin"""
+    with _plugin_stats_lock:
+        return {name: dict(stats) for name, stats in _plugin_stats.items()}
+
+
+def _timed_add_data(plugin_name, plugin, **kwargs):
+    start = time.monotonic()
+    try:
+        return plugin.add_data(**kwargs)
+    except Exception:
+        _record_plugin_stat(plugin_name, error=True)
+        raise
+    finally:
+        _record_plugin_stat(plugin_name, seconds=time.monotonic() - start)
+
 def filter_complete_rules(ruleset):
     rules = [
         rule for rule in ruleset
@@ -80,10 +141,29 @@ def convert_to_jsonlogic(logic_operator: str, rule_dict: list):
     return {logic_operator: json_logic_conditions} if len(json_logic_conditions) > 1 else json_logic_conditions[0]
 
 
+@lru_cache(maxsize=1024)
+def _compile_ruleset(logic_operator, rules):
+    """Build the JSON Logic rule and the set of fields it uses, cached on the rule content so an edit is a new entry"""
+    rule_dict = [{'field': field, 'operator': operator, 'value': value} for field, operator, value in rules]
+    return convert_to_jsonlogic(logic_operator=logic_operator, rule_dict=rule_dict), frozenset(field for field, operator, value in rules)
+
+
+def compile_watch_ruleset(watch):
+    """Returns (JSON Logic ruleset, set of referenced fields) or (None, None) when there are no complete rules"""
+    complete_rules = filter_complete_rules(watch.get('conditions', []))
+    if not complete_rules:
+        return None, None
+    logic_operator = "and" if watch.get("conditions_match_logic", "ALL") == "ALL" else "or"
+    return _compile_ruleset(logic_operator, tuple((r['field'], r['operator'], r['value']) for r in complete_rules))
+
+
 def execute_ruleset_against_all_plugins(current_watch_uuid: str, application_datastruct, ephemeral_data={} ):
     """
     Build our data and options by calling our plugins then pass it to jsonlogic and see if the conditions pass
 
+    Only the plugins that provide a field used by the rules are run, they run in parallel on the shared plugin
+    executor and each has CONDITIONS_PLUGIN_TIMEOUT seconds to return its data.
+
     :param ruleset: JSON Logic rule dictionary.
     :param extracted_data: Dictionary containing the facts.   <-- maybe the app struct+uuid
     :return: Dictionary of plugin results.
@@ -96,42 +176,41 @@ def execute_ruleset_against_all_plugins(current_watch_uuid: str, application_dat
     watch = application_datastruct['watching'].get(current_watch_uuid)
 
     if watch and watch.get("conditions"):
-        logic_operator = "and" if watch.get("conditions_match_logic", "ALL") == "ALL" else "or"
-        complete_rules = filter_complete_rules(watch['conditions'])
-        if complete_rules:
-            # Give all plugins a chance to update the data dict again (that we will test the conditions against)
+        ruleset, referenced_fields = compile_watch_ruleset(watch)
+        if ruleset:
+            # Give the plugins a chance to update the data dict again (that we will test the conditions against)
+            executor = get_plugin_executor()
+            futures = []
             for plugin in plugin_manager.get_plugins():
+                plugin_name = plugin_manager.get_name(plugin)
+                provided_fields = PLUGIN_PROVIDED_FIELDS.get(plugin_name)
+                if provided_fields and not provided_fields.intersection(referenced_fields):
+                    continue
+                logger.debug(f"Trying plugin {plugin_name}....")
+                futures.append((plugin_name, executor.submit(
+                    _timed_add_data,
+                    plugin_name,
+                    plugin,
+                    current_watch_uuid=current_watch_uuid,
+                    application_datastruct=application_datastruct,
+                    ephemeral_data=ephemeral_data
+                )))
+
+            deadline = time.monotonic() + CONDITIONS_PLUGIN_TIMEOUT
+            # Merge in the same order as the plugins are registered
+            for plugin_name, future in futures:
                 try:
-                    import concurrent.futures
-                    import time
-                    
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(
-                            plugin.add_data,
-                            current_watch_uuid=current_watch_uuid,
-                            application_datastruct=application_datastruct,
-                            ephemeral_data=ephemeral_data
-                        )
-                        logger.debug(f"Trying plugin {plugin}....")
-
-                        # Set a timeout of 10 seconds
-                        try:
-                            new_execute_data = future.result(timeout=10)
-                            if new_execute_data and isinstance(new_execute_data, dict):
-                                EXECUTE_DATA.update(new_execute_data)
-
-                        except concurrent.futures.TimeoutError:
-                            # The plugin took too long, abort processing for this watch
-                            raise Exception(f"Plugin {plugin.__class__.__name__} took more than 10 seconds to run.")
+                    new_execute_data = future.result(timeout=max(0, deadline - time.monotonic()))
+                    if new_execute_data and isinstance(new_execute_data, dict):
+                        EXECUTE_DATA.update(new_execute_data)
+                except concurrent.futures.TimeoutError:
+                    # The plugin took too long, carry on without its data
+                    _record_plugin_stat(plugin_name, timeout=True)
+                    logger.error(f"Plugin {plugin_name} took more than {CONDITIONS_PLUGIN_TIMEOUT} seconds to run.")
                 except Exception as e:
                     # Log the error but continue with the next plugin
-                    import logging
-                    logging.error(f"Error executing plugin {plugin.__class__.__name__}: {str(e)}")
-                    continue
+                    logger.error(f"Error executing plugin {plugin_name}: {str(e)}")
 
-            # Create the ruleset
-            ruleset = convert_to_jsonlogic(logic_operator=logic_operator, rule_dict=complete_rules)
-            
             # Pass the custom operations dictionary to jsonLogic
             if not jsonLogic(logic=ruleset, data=EXECUTE_DATA, operations=CUSTOM_OPERATIONS):
                 result = False
@@ -151,6 +230,7 @@ for plugin in plugin_manager.get_plugins():
     new_field_choices = plugin.register_field_choices()
     if isinstance(new_field_choices, list):
         field_choices.extend(new_field_choices)
+        PLUGIN_PROVIDED_FIELDS[plugin_manager.get_name(plugin)] = {field for field, label in new_field_choices}
 
 def collect_ui_edit_stats_extras(watch):
     """Collect and combine HTML content from all plugins that implement ui_edit_stats_extras"""
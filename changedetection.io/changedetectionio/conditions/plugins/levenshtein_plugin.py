@@ -1,3 +1,7 @@
+import os
+import threading
+from collections import OrderedDict
+
 import pluggy
 from loguru import logger
 
@@ -5,27 +9,105 @@ from loguru import logger
 conditions_hookimpl = pluggy.HookimplMarker("changedetectionio_conditions")
 global_hookimpl = pluggy.HookimplMarker("changedetectionio")
 
+# Up to this many characters (both texts together) the texts are compared character by character as a whole,
+# bigger texts are compared line by line first and only the changed lines are compared character by character
+LEVENSHTEIN_LINE_MODE_THRESHOLD = int(os.getenv("LEVENSHTEIN_LINE_MODE_THRESHOLD", 200_000))
+# In line mode, a changed block of lines bigger than this counts as completely different instead of being compared
+LEVENSHTEIN_MAX_BLOCK_CHARS = int(os.getenv("LEVENSHTEIN_MAX_BLOCK_CHARS", 20_000))
+# How many snapshots keep their split lines and line hashes, the latest snapshot is compared against every new fetch
+LEVENSHTEIN_SNAPSHOT_CACHE_SIZE = int(os.getenv("LEVENSHTEIN_SNAPSHOT_CACHE_SIZE", 16))
+
+_snapshot_lines_cache = OrderedDict()
+_snapshot_lines_cache_lock = threading.Lock()
+
+
+def split_lines(text):
+    """(lines, line hashes) of the text, the lines keep their line endings so they join back to the same text"""
+    lines = text.splitlines(keepends=True)
+    return lines, [hash(line) for line in lines]
+
+
+def snapshot_lines(watch, timestamp):
+    """split_lines() of a history snapshot, kept in a small LRU keyed by (watch uuid, timestamp)"""
+    key = (watch.get('uuid'), timestamp)
+    with _snapshot_lines_cache_lock:
+        if key in _snapshot_lines_cache:
+            _snapshot_lines_cache.move_to_end(key)
+            return _snapshot_lines_cache[key]
+
+    entry = split_lines(watch.get_history_snapshot(timestamp=timestamp))
+    with _snapshot_lines_cache_lock:
+        _snapshot_lines_cache[key] = entry
+        while len(_snapshot_lines_cache) > LEVENSHTEIN_SNAPSHOT_CACHE_SIZE:
+            _snapshot_lines_cache.popitem(last=False)
+    return entry
+
+
+def similarity(a, b, line_mode_threshold=None, max_block_chars=None):
+    """
+    Levenshtein distance and similarity ratio of two texts given as (lines, line hashes) from split_lines().
+
+    Small texts are compared exactly. For big texts the edit script is first found on the line hashes,
+    then only the replaced blocks of lines are compared character by character, so the cost depends on how much
+    changed rather than on the size of the page. Blocks bigger than max_block_chars count as entirely different,
+    which makes the distance an upper bound (and the ratio a lower bound) of the exact value.
+
+    :return: (distance, ratio, approximate)
+    """
+    from Levenshtein import ratio, distance, opcodes
+
+    line_mode_threshold = LEVENSHTEIN_LINE_MODE_THRESHOLD if line_mode_threshold is None else line_mode_threshold
+    max_block_chars = LEVENSHTEIN_MAX_BLOCK_CHARS if max_block_chars is None else max_block_chars
+
+    a_lines, a_hashes = a
+    b_lines, b_hashes = b
+    len_a = sum(map(len, a_lines))
+    len_b = sum(map(len, b_lines))
+
+    if len_a + len_b <= line_mode_threshold:
+        text_a = ''.join(a_lines)
+        text_b = ''.join(b_lines)
+        return distance(text_a, text_b), ratio(text_a, text_b), False
+
+    distance_value = 0
+    # ratio() is 1 - (insertions + deletions) / total length, add that up per block too
+    indel_value = 0
+    for tag, i1, i2, j1, j2 in opcodes(a_hashes, b_hashes):
+        if tag == 'equal':
+            continue
+        block_a = ''.join(a_lines[i1:i2])
+        block_b = ''.join(b_lines[j1:j2])
+        if tag == 'replace' and len(block_a) + len(block_b) <= max_block_chars:
+            distance_value += distance(block_a, block_b)
+            indel_value += round((1 - ratio(block_a, block_b)) * (len(block_a) + len(block_b)))
+        else:
+            distance_value += max(len(block_a), len(block_b))
+            indel_value += len(block_a) + len(block_b)
+
+    return distance_value, 1 - (indel_value / (len_a + len_b)), True
+
+
 def levenshtein_ratio_recent_history(watch, incoming_text=None):
     try:
-        from Levenshtein import ratio, distance
         k = list(watch.history.keys())
         a = None
         b = None
 
         # When called from ui_edit_stats_extras, we don't have incoming_text
         if incoming_text is None:
-            a = watch.get_history_snapshot(timestamp=k[-1])  # Latest snapshot
-            b = watch.get_history_snapshot(timestamp=k[-2])  # Previous snapshot
+            if len(k) >= 2:
+                a = snapshot_lines(watch, k[-1])  # Latest snapshot
+                b = snapshot_lines(watch, k[-2])  # Previous snapshot
 
         # Needs atleast one snapshot
-        elif len(k) >= 1: # Should be atleast one snapshot to compare against
-            a = watch.get_history_snapshot(timestamp=k[-1]) # Latest saved snapshot
-            b = incoming_text if incoming_text else k[-2]
+        elif len(k) >= 1 and incoming_text: # Should be atleast one snapshot to compare against
+            a = snapshot_lines(watch, k[-1]) # Latest saved snapshot
+            b = split_lines(incoming_text)
 
-        if a and b:
-            distance_value = distance(a, b)
-            ratio_value = ratio(a, b)
+        if a and b and a[0] and b[0]:
+            distance_value, ratio_value, approximate = similarity(a, b)
             return {
+                'approximate': approximate,
                 'distance': distance_value,
                 'ratio': ratio_value,
                 'percent_similar': round(ratio_value * 100, 2)
@@ -98,6 +180,7 @@ def ui_edit_stats_extras(watch):
                 </tbody>
             </table>
             <p style="font-size: 80%;">Levenshtein metrics compare the last two snapshots, measuring how many character edits are needed to transform one into the other.</p>
+            {'<p style="font-size: 80%;">These snapshots are large, they were compared line by line first so the values are an estimate.</p>' if lev_data.get('approximate') else ''}
         </div>
         """
         return html
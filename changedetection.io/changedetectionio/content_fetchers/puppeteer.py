@@ -23,7 +23,6 @@ from changedetectionio.content_fetchers.exceptions import PageUnloadable, Non200
 async def capture_full_page(page):
     import os
     import time
-    from multiprocessing import Process, Pipe
 
     start = time.time()
 
@@ -68,16 +67,11 @@ async def capture_full_page(page):
     await page.setViewport({'width': original_viewport['width'], 'height': original_viewport['height']})
 
     if len(screenshot_chunks) > 1:
-        from changedetectionio.content_fetchers.screenshot_handler import stitch_images_worker
+        from changedetectionio.content_fetchers.screenshot_handler import stitch_images_async
         logger.debug(f"Screenshot stitching {len(screenshot_chunks)} chunks together")
-        parent_conn, child_conn = Pipe()
-        p = Process(target=stitch_images_worker, args=(child_conn, screenshot_chunks, page_height, SCREENSHOT_MAX_TOTAL_HEIGHT))
-        p.start()
-        screenshot = parent_conn.recv_bytes()
-        p.join()
+        screenshot = await stitch_images_async(screenshot_chunks, page_height, SCREENSHOT_MAX_TOTAL_HEIGHT)
         logger.debug(
             f"Screenshot (chunked/stitched) - Page height: {page_height} Capture height: {SCREENSHOT_MAX_TOTAL_HEIGHT} - Stitched together in {time.time() - start:.2f}s")
-
         screenshot_chunks = None
         return screenshot
 
@@ -4,41 +4,69 @@
 # - If a page is taller than ~8000–10000px, it risks exceeding GPU memory limits.
 # - This is especially important on headless Chromium, where Playwright may fail to allocate a massive full-page buffer.
 
+import multiprocessing
+import os
+import sys
+import threading
+
 from loguru import logger
 
 from changedetectionio.content_fetchers import SCREENSHOT_MAX_HEIGHT_DEFAULT, SCREENSHOT_DEFAULT_QUALITY
 
+# Stitching is CPU and RAM heavy, so it runs in a small pool of long-lived worker processes instead of
+# forking a new process for every long page, the pool is created on first use and shared by all fetchers.
+SCREENSHOT_STITCH_WORKERS = int(os.getenv("SCREENSHOT_STITCH_WORKERS", 1))
+# Recycle a worker after this many stitches so that any memory held by Pillow is returned to the OS
+SCREENSHOT_STITCH_MAX_TASKS_PER_WORKER = int(os.getenv("SCREENSHOT_STITCH_MAX_TASKS_PER_WORKER", 50))
+
+_stitch_pool = None
+_stitch_pool_lock = threading.Lock()
+
 
-def stitch_images_worker(pipe_conn, chunks_bytes, original_page_height, capture_height):
-    import os
+def stitch_images(chunks_bytes, original_page_height, capture_height):
+    """
+    Stitch JPEG chunks (top to bottom) into a single JPEG, returns the JPEG bytes.
+
+    Only the chunk headers are read up-front to size the canvas, each chunk is then decoded, pasted as a row-strip
+    and released before the next one is decoded, so peak memory is the canvas plus a single decoded chunk.
+    The canvas is never taller than capture_height.
+    """
     import io
     from PIL import Image, ImageDraw, ImageFont
 
-    try:
+    # Image.open() only parses the header here, the pixel data is not decoded yet
+    sizes = []
+    for b in chunks_bytes:
+        with Image.open(io.BytesIO(b)) as im:
+            sizes.append(im.size)
 
-        # Load images from byte chunks
-        images = [Image.open(io.BytesIO(b)) for b in chunks_bytes]
-        total_height = sum(im.height for im in images)
-        max_width = max(im.width for im in images)
+    max_width = max(w for w, h in sizes)
+    total_height = min(sum(h for w, h in sizes), capture_height)
 
-        # Create stitched image
-        stitched = Image.new('RGB', (max_width, total_height))
+    stitched = Image.new('RGB', (max_width, total_height))
+    try:
         y_offset = 0
-        for im in images:
-            stitched.paste(im, (0, y_offset))
-            y_offset += im.height
+        for b in chunks_bytes:
+            if y_offset >= total_height:
+                break
+            with Image.open(io.BytesIO(b)) as im:
+                # Decode at most the rows that still fit on the canvas
+                strip_height = min(im.height, total_height - y_offset)
+                strip = im.crop((0, 0, im.width, strip_height)) if strip_height < im.height else im
+                stitched.paste(strip, (0, y_offset))
+                y_offset += strip_height
+                if strip is not im:
+                    strip.close()
 
         # Draw caption on top (overlaid, not extending canvas)
-        draw = ImageDraw.Draw(stitched)
-
         if original_page_height > capture_height:
+            draw = ImageDraw.Draw(stitched)
             caption_text = f"WARNING: Screenshot was {original_page_height}px but trimmed to {capture_height}px because it was too long"
             padding = 10
             font_size = 35
             font_color = (255, 0, 0)
             background_color = (255, 255, 255)
 
-
             # Try to load a proper font
             try:
                 font = ImageFont.truetype("arial.ttf", font_size)
@@ -59,15 +87,48 @@ def stitch_images_worker(pipe_conn, chunks_bytes, original_page_height, capture_
             text_y = padding
             draw.text((text_x, text_y), caption_text, font=font, fill=font_color)
 
-        # Encode and send image
         output = io.BytesIO()
         stitched.save(output, format="JPEG", quality=int(os.getenv("SCREENSHOT_QUALITY", SCREENSHOT_DEFAULT_QUALITY)))
-        pipe_conn.send_bytes(output.getvalue())
-
-        stitched.close()
-    except Exception as e:
-        pipe_conn.send(f"error:{e}")
+        return output.getvalue()
     finally:
-        pipe_conn.close()
+        stitched.close()
+
+
+def get_stitch_pool():
+    """Return the shared screenshot stitching process pool, creating it on first use."""
+    global _stitch_pool
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _stitch_pool_lock:
+        if _stitch_pool is None:
+            # 'spawn', forking the app with its running threads and event loops is not safe
+            kwargs = {'max_workers': SCREENSHOT_STITCH_WORKERS, 'mp_context': multiprocessing.get_context('spawn')}
+            # max_tasks_per_child arrived in Python 3.11
+            if sys.version_info >= (3, 11) and SCREENSHOT_STITCH_MAX_TASKS_PER_WORKER > 0:
+                kwargs['max_tasks_per_child'] = SCREENSHOT_STITCH_MAX_TASKS_PER_WORKER
+            logger.debug(f"Starting screenshot stitching pool with {SCREENSHOT_STITCH_WORKERS} worker(s)")
+            _stitch_pool = ProcessPoolExecutor(**kwargs)
+        return _stitch_pool
 
 
+def shutdown_stitch_pool():
+    global _stitch_pool
+    with _stitch_pool_lock:
+        if _stitch_pool is not None:
+            _stitch_pool.shutdown(wait=False, cancel_futures=True)
+            _stitch_pool = None
+
+
+async def stitch_images_async(chunks_bytes, original_page_height, capture_height):
+    """Stitch the chunks in the shared worker pool without blocking the event loop."""
+    import asyncio
+    from concurrent.futures.process import BrokenProcessPool
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_stitch_pool(), stitch_images, chunks_bytes, original_page_height, capture_height)
+    except BrokenProcessPool:
+        # A worker died (OOM killer etc), throw the pool away so the next screenshot gets a fresh one
+        logger.error("Screenshot stitching pool is broken, it will be restarted on the next screenshot")
+        shutdown_stitch_pool()
+        raise
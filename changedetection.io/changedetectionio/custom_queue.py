@@ -1,9 +1,55 @@
 import queue
 import asyncio
+import threading
+from collections import Counter
 from blinker import signal
 from loguru import logger
 
 
+class QueuedUUIDTracker:
+    """
+    Mixin for the priority queues, keeps a count of the watch UUIDs currently in the queue.
+
+    Hooks the internal _put()/_get() so it sees every way an item enters or leaves the queue, which makes
+    "is this watch queued?" a dict lookup instead of a scan over the whole heap.
+    """
+
+    def _init_uuid_tracking(self):
+        self._queued_uuid_counts = Counter()
+        self._queued_uuid_lock = threading.Lock()
+
+    @staticmethod
+    def _item_uuid(item):
+        if hasattr(item, 'item') and isinstance(item.item, dict):
+            return item.item.get('uuid')
+        return None
+
+    def _put(self, item, *args):
+        super()._put(item, *args)
+        uuid = self._item_uuid(item)
+        if uuid:
+            with self._queued_uuid_lock:
+                self._queued_uuid_counts[uuid] += 1
+
+    def _get(self, *args):
+        item = super()._get(*args)
+        uuid = self._item_uuid(item)
+        if uuid:
+            with self._queued_uuid_lock:
+                self._queued_uuid_counts[uuid] -= 1
+                if self._queued_uuid_counts[uuid] <= 0:
+                    del self._queued_uuid_counts[uuid]
+        return item
+
+    def is_queued(self, uuid):
+        return uuid in self._queued_uuid_counts
+
+    def queued_uuids(self):
+        """A snapshot set of the UUIDs in the queue"""
+        with self._queued_uuid_lock:
+            return set(self._queued_uuid_counts.keys())
+
+
 class NotificationQueue(queue.Queue):
     """
     Extended Queue that sends a 'notification_event' signal when notifications are added.
@@ -38,7 +84,7 @@ class NotificationQueue(queue.Queue):
         except Exception as e:
             logger.error(f"Exception emitting notification_event signal: {e}")
 
-class SignalPriorityQueue(queue.PriorityQueue):
+class SignalPriorityQueue(QueuedUUIDTracker, queue.PriorityQueue):
     """
     Extended PriorityQueue that sends a signal when items with a UUID are added.
     
@@ -48,6 +94,7 @@ class SignalPriorityQueue(queue.PriorityQueue):
     """
     
     def __init__(self, maxsize=0):
+        self._init_uuid_tracking()
         super().__init__(maxsize)
         try:
             self.queue_length_signal = signal('queue_length')
@@ -294,7 +341,7 @@ class SignalPriorityQueue(queue.PriorityQueue):
             }
 
 
-class AsyncSignalPriorityQueue(asyncio.PriorityQueue):
+class AsyncSignalPriorityQueue(QueuedUUIDTracker, asyncio.PriorityQueue):
     """
     Async version of SignalPriorityQueue that sends signals when items are added/removed.
     
@@ -303,12 +350,41 @@ class AsyncSignalPriorityQueue(asyncio.PriorityQueue):
     """
     
     def __init__(self, maxsize=0):
+        self._init_uuid_tracking()
+        self._deferred_count = 0
         super().__init__(maxsize)
         try:
             self.queue_length_signal = signal('queue_length')
         except Exception as e:
             logger.critical(f"Exception: {e}")
 
+    def qsize(self):
+        # Deferred items are still waiting to be checked
+        return super().qsize() + self._deferred_count
+
+    def defer(self, item, delay):
+        """
+        Hand an item back to the queue, but only after delay seconds (used when its host is being throttled).
+        Meanwhile it still counts as queued, so it is not queued a second time and the queue does not look empty.
+        """
+        uuid = self._item_uuid(item)
+        self._deferred_count += 1
+        if uuid:
+            with self._queued_uuid_lock:
+                self._queued_uuid_counts[uuid] += 1
+        asyncio.get_running_loop().call_later(delay, self._release_deferred, item)
+
+    def _release_deferred(self, item):
+        uuid = self._item_uuid(item)
+        self._deferred_count -= 1
+        if uuid:
+            with self._queued_uuid_lock:
+                self._queued_uuid_counts[uuid] -= 1
+                if self._queued_uuid_counts[uuid] <= 0:
+                    del self._queued_uuid_counts[uuid]
+        # Counted again by _put()
+        self.put_nowait(item)
+
     async def put(self, item):
         # Call the parent's put method first
         await super().put(item)
@@ -0,0 +1,46 @@
+"""
+What a watch inherits from its tags, resolved once per watch instead of on every lookup.
+
+The processors ask for the tag overrides of include_filters, subtractive_selectors, extract_text, ignore_text,
+trigger_text and text_should_not_be_present on every check, and the notifications ask for the tag settings of each
+notification variable, before this every one of those lookups went through all of the tags again.
+
+The datastore keeps one EffectiveWatchConfig per watch and replaces it when the watch's list of tags or any of those
+tags changed (tags count their writes in watch_base.revision). Global settings are not part of it, they are a single
+dict lookup and always read directly.
+"""
+
+
+class EffectiveWatchConfig:
+
+    def __init__(self, tags):
+        """
+        :param tags: The watch's tags {tag uuid: tag}, in the same order as the datastore tags
+        """
+        self.tags = tags
+        self._tag_overrides = {}
+        self._tag_settings = {}
+
+    def tag_overrides(self, attr):
+        """Every value the tags add to a list setting (include_filters etc), in tag order"""
+        ret = self._tag_overrides.get(attr)
+        if ret is None:
+            ret = []
+            for tag in self.tags.values():
+                if attr in tag and tag[attr]:
+                    ret = [*ret, *tag[attr]]
+            self._tag_overrides[attr] = ret
+        # A copy, callers extend what they get back
+        return list(ret)
+
+    def tag_setting(self, attr):
+        """The value from the first tag that sets it and is not muted (the notification settings cascade), or None"""
+        if attr not in self._tag_settings:
+            value = None
+            for tag in self.tags.values():
+                v = tag.get(attr)
+                if v and not tag.get('notification_muted'):
+                    value = v
+                    break
+            self._tag_settings[attr] = value
+        return self._tag_settings[attr]
@@ -13,7 +13,7 @@ from blinker import signal
 from changedetectionio.strtobool import strtobool
 from threading import Event
 from changedetectionio.custom_queue import SignalPriorityQueue, AsyncSignalPriorityQueue, NotificationQueue
-from changedetectionio import worker_handler
+from changedetectionio import worker_handler, metrics
 
 from flask import (
     Flask,
@@ -40,7 +40,7 @@ from loguru import logger
 
 from changedetectionio import __version__
 from changedetectionio import queuedWatchMetaData
-from changedetectionio.api import Watch, WatchHistory, WatchSingleHistory, CreateWatch, Import, SystemInfo, Tag, Tags, Notifications
+from changedetectionio.api import Watch, WatchHistory, WatchSingleHistory, CreateWatch, Import, SystemInfo, Metrics, Tag, Tags, Notifications
 from changedetectionio.api.Search import Search
 from .time_handler import is_within_schedule
 
@@ -192,14 +192,6 @@ def _jinja2_filter_datetimestamp(timestamp, format="%Y-%m-%d %H:%M:%S"):
     return timeago.format(int(timestamp), time.time())
 
 
-@app.template_filter('pagination_slice')
-def _jinja2_filter_pagination_slice(arr, skip):
-    per_page = datastore.data['settings']['application'].get('pager_size', 50)
-    if per_page:
-        return arr[skip:skip + per_page]
-
-    return arr
-
 @app.template_filter('format_seconds_ago')
 def _jinja2_filter_seconds_precise(timestamp):
     if timestamp == False:
@@ -208,7 +200,7 @@ def _jinja2_filter_seconds_precise(timestamp):
     return format(int(time.time()-timestamp), ',d')
 
 # Import login_optionally_required from auth_decorator
-from changedetectionio.auth_decorator import login_optionally_required
+from changedetectionio.auth_decorator import login_optionally_required, is_shared_diff_endpoint
 
 # When nobody is logged in Flask-Login's current_user is set to an AnonymousUser object.
 class User(flask_login.UserMixin):
@@ -285,7 +277,7 @@ def changedetection_app(config=None, datastore_o=None):
             # Permitted
             elif request.endpoint and 'login' in request.endpoint:
                 return None
-            elif request.endpoint and 'diff_history_page' in request.endpoint and datastore.data['settings']['application'].get('shared_diff_access'):
+            elif is_shared_diff_endpoint(request.endpoint) and datastore.data['settings']['application'].get('shared_diff_access'):
                 return None
             elif request.method in flask_login.config.EXEMPT_METHODS:
                 return None
@@ -298,7 +290,7 @@ def changedetection_app(config=None, datastore_o=None):
             elif request.path.startswith('/socket.io/'):
                 return None
             # API routes - use their own auth mechanism (@auth.check_token)
-            elif request.path.startswith('/api/'):
+            elif request.path.startswith('/api/') or request.path == '/metrics':
                 return None
             else:
                 return login_manager.unauthorized()
@@ -321,6 +313,9 @@ def changedetection_app(config=None, datastore_o=None):
     watch_api.add_resource(SystemInfo, '/api/v1/systeminfo',
                            resource_class_kwargs={'datastore': datastore, 'update_q': update_q})
 
+    watch_api.add_resource(Metrics, '/metrics',
+                           resource_class_kwargs={'datastore': datastore})
+
     watch_api.add_resource(Import,
                            '/api/v1/import',
                            resource_class_kwargs={'datastore': datastore})
@@ -591,6 +586,12 @@ def changedetection_app(config=None, datastore_o=None):
                     "queued_data": all_queued
                 })
 
+    # Gauges, read when the metrics are collected
+    from changedetectionio.host_politeness import host_scheduler
+    metrics.QUEUE_DEPTH.set_function(lambda: {'update': update_q.qsize(), 'notification': notification_q.qsize()})
+    metrics.HOST_IN_FLIGHT.set_function(lambda: {key: stats['in_flight'] for key, stats in host_scheduler.get_stats().items()})
+    metrics.WORKERS.set_function(lambda: {'running': worker_handler.get_worker_count(), 'busy': len(worker_handler.get_running_uuids())})
+
     # Start the async workers during app initialization
     # Can be overridden by ENV or use the default settings
     n_workers = int(os.getenv("FETCH_WORKERS", datastore.data['settings']['requests']['workers']))
@@ -606,6 +607,10 @@ def changedetection_app(config=None, datastore_o=None):
     if not os.getenv("GITHUB_REF", False) and not strtobool(os.getenv('DISABLE_VERSION_CHECK', 'no')) and not in_pytest:
         threading.Thread(target=check_for_new_version).start()
 
+    # Optionally recompress the text snapshots that are no longer new at a higher ratio, see storage_compression.py
+    if float(os.getenv('SNAPSHOT_RECOMPRESS_AFTER_DAYS', 0)) > 0:
+        threading.Thread(target=snapshot_recompression_runner, daemon=True, name="SnapshotRecompression").start()
+
     # Return the Flask app - the Socket.IO will be attached to it but initialized separately
     # This avoids circular dependencies
     return app
@@ -639,6 +644,34 @@ def check_for_new_version():
         app.config.exit.wait(86400)
 
 
+def snapshot_recompression_runner():
+    from changedetectionio.storage_compression import recompress_cold_snapshots
+    from changedetectionio.search_index import StoredWatch
+
+    while not app.config.exit.is_set():
+        saved = 0
+        watching = datastore.data['watching']
+        for uuid in list(watching.keys()):
+            if app.config.exit.is_set():
+                return
+            # peek() - a watch that was never used is read through its history index, not rehydrated (LAZY_WATCH_LOAD)
+            watch = watching.peek(uuid)
+            if not watch:
+                continue
+            if watching.is_pending(uuid):
+                watch = StoredWatch(watch, os.path.join(datastore.datastore_path, uuid))
+            try:
+                saved += recompress_cold_snapshots(watch)
+            except Exception as e:
+                logger.error(f"Watch UUID: {uuid} Error recompressing snapshots {str(e)}")
+
+        if saved:
+            logger.info(f"Recompressed snapshots, {saved} bytes saved")
+
+        # Hourly is enough, snapshots only become 'cold' once
+        app.config.exit.wait(3600)
+
+
 def notification_runner():
     global notification_debug_log
     from datetime import datetime
@@ -655,6 +688,7 @@ def notification_runner():
 
                 now = datetime.now()
                 sent_obj = None
+                send_started = None
 
                 try:
                     from changedetectionio.notification.handler import process_notification
@@ -669,9 +703,13 @@ def notification_runner():
                     if not n_object.get('notification_format') and datastore.data['settings']['application'].get('notification_format'):
                         n_object['notification_format'] = datastore.data['settings']['application'].get('notification_format')
                     if n_object.get('notification_urls', {}):
+                        send_started = time.perf_counter()
                         sent_obj = process_notification(n_object, datastore)
+                        metrics.observe(metrics.NOTIFICATION_SEND_SECONDS, time.perf_counter() - send_started, result='ok')
 
                 except Exception as e:
+                    if send_started:
+                        metrics.observe(metrics.NOTIFICATION_SEND_SECONDS, time.perf_counter() - send_started, result='error')
                     logger.error(f"Watch URL: {n_object['watch_url']}  Error {str(e)}")
 
                     # UUID wont be present when we submit a 'test' from the global settings
@@ -692,9 +730,134 @@ def notification_runner():
 
 
 
+def queue_due_watches(datastore, update_q, running_uuids=(), proxy_last_called_time=None, recheck_time_minimum_seconds=3, queue_item=None):
+    """
+    One pass of the recheck ticker, queue every watch that is due for a check (most over-due first).
+
+    :param queue_item: How to put an item into update_q, default worker_handler.queue_item_async_safe
+    :return: How many watches were queued, False when the time schedule could not be worked out
+    """
+    import random
+    if proxy_last_called_time is None:
+        proxy_last_called_time = {}
+    if queue_item is None:
+        queue_item = worker_handler.queue_item_async_safe
+    queued = 0
+
+    # peek() - the checks that only need the stored fields do not rehydrate the watches (LAZY_WATCH_LOAD)
+    watching = datastore.data['watching']
+
+    # Get a list of watches sorted by last_checked, this is so we examine the most over-due first
+    # Re #232 - over a copy of the UUIDs incase it changes while we're iterating through it all
+    watch_uuid_list = sorted(list(watching.keys()), key=lambda uuid: (watching.peek(uuid) or {}).get('last_checked', 0))
+
+    recheck_time_system_seconds = int(datastore.threshold_seconds)
+
+    # Check for watches outside of the time threshold to put in the thread queue.
+    for uuid in watch_uuid_list:
+        now = time.time()
+        stored = watching.peek(uuid)
+        if not stored:
+            logger.error(f"Watch: {uuid} no longer present.")
+            continue
+
+        # No need todo further processing if it's paused, or if it was only just checked
+        if stored.get('paused') or now - stored.get('last_checked', 0) < recheck_time_minimum_seconds:
+            continue
+
+        # A watch that was never used is only rehydrated once it could be due, allowing for the most jitter
+        if watching.is_pending(uuid):
+            threshold = datastore.stored_recheck_threshold_seconds(stored, system_seconds=recheck_time_system_seconds)
+            max_jitter = abs(datastore.data['settings']['requests'].get('jitter_seconds', 0))
+            if threshold is not None and now - stored.get('last_checked', 0) < threshold - max_jitter:
+                continue
+
+        watch = watching.get(uuid)
+        if not watch:
+            logger.error(f"Watch: {uuid} no longer present.")
+            continue
+
+        # Imported in a large batch, waiting for its wave of first checks
+        if datastore.first_check_is_held(uuid, now=now):
+            continue
+
+        # @todo - Maybe make this a hook?
+        # Time schedule limit - Decide between watch or global settings
+        if watch.get('time_between_check_use_default'):
+            time_schedule_limit = datastore.data['settings']['requests'].get('time_schedule_limit', {})
+            logger.trace(f"{uuid} Time scheduler - Using system/global settings")
+        else:
+            time_schedule_limit = watch.get('time_schedule_limit')
+            logger.trace(f"{uuid} Time scheduler - Using watch settings (not global settings)")
+        tz_name = datastore.data['settings']['application'].get('timezone', 'UTC')
+
+        if time_schedule_limit and time_schedule_limit.get('enabled'):
+            try:
+                result = is_within_schedule(time_schedule_limit=time_schedule_limit,
+                                            default_tz=tz_name
+                                            )
+                if not result:
+                    logger.trace(f"{uuid} Time scheduler - not within schedule skipping.")
+                    continue
+            except Exception as e:
+                logger.error(
+                    f"{uuid} - Recheck scheduler, error handling timezone, check skipped - TZ name '{tz_name}' - {str(e)}")
+                return False
+        # If they supplied an individual entry minutes to threshold.
+        # Or with adaptive recheck, the time estimated from how often the watch changes
+        threshold = datastore.recheck_threshold_seconds(watch, system_seconds=recheck_time_system_seconds, now=now)
+
+        # #580 - Jitter plus/minus amount of time to make the check seem more random to the server
+        jitter = datastore.data['settings']['requests'].get('jitter_seconds', 0)
+        if jitter > 0:
+            if watch.jitter_seconds == 0:
+                watch.jitter_seconds = random.uniform(-abs(jitter), jitter)
+
+        seconds_since_last_recheck = now - watch['last_checked']
+
+        if seconds_since_last_recheck >= (threshold + watch.jitter_seconds) and seconds_since_last_recheck >= recheck_time_minimum_seconds:
+            if not uuid in running_uuids and not update_q.is_queued(uuid):
+
+                # Proxies can be set to have a limit on seconds between which they can be called
+                watch_proxy = datastore.get_preferred_proxy_for_watch(uuid=uuid)
+                if watch_proxy and watch_proxy in list(datastore.proxy_list.keys()):
+                    # Proxy may also have some threshold minimum
+                    proxy_list_reuse_time_minimum = int(datastore.proxy_list.get(watch_proxy, {}).get('reuse_time_minimum', 0))
+                    if proxy_list_reuse_time_minimum:
+                        proxy_last_used_time = proxy_last_called_time.get(watch_proxy, 0)
+                        time_since_proxy_used = int(time.time() - proxy_last_used_time)
+                        if time_since_proxy_used < proxy_list_reuse_time_minimum:
+                            # Not enough time difference reached, skip this watch
+                            logger.debug(f"> Skipped UUID {uuid} "
+                                    f"using proxy '{watch_proxy}', not "
+                                    f"enough time between proxy requests "
+                                    f"{time_since_proxy_used}s/{proxy_list_reuse_time_minimum}s")
+                            continue
+                        else:
+                            # Record the last used time
+                            proxy_last_called_time[watch_proxy] = int(time.time())
+
+                # Use Epoch time as priority, so we get a "sorted" PriorityQueue, but we can still push a priority 1 into it.
+                priority = int(time.time())
+                logger.debug(
+                    f"> Queued watch UUID {uuid} "
+                    f"last checked at {watch['last_checked']} "
+                    f"queued at {now:0.2f} priority {priority} "
+                    f"jitter {watch.jitter_seconds:0.2f}s, "
+                    f"{now - watch['last_checked']:0.2f}s since last checked")
+
+                # Into the queue with you
+                queue_item(update_q, queuedWatchMetaData.PrioritizedItem(priority=priority, item={'uuid': uuid}))
+                queued += 1
+
+                # Reset for next time
+                watch.jitter_seconds = 0
+
+    return queued
+
+
 # Threaded runner, look for new watches to feed into the Queue.
 def ticker_thread_check_time_launch_checks():
-    import random
     proxy_last_called_time = {}
     last_health_check = 0
 
@@ -725,111 +888,16 @@ def ticker_thread_check_time_launch_checks():
         # Get a list of watches by UUID that are currently fetching data
         running_uuids = worker_handler.get_running_uuids()
 
-        # Re #232 - Deepcopy the data incase it changes while we're iterating through it all
-        watch_uuid_list = []
-        while True:
-            try:
-                # Get a list of watches sorted by last_checked, [1] because it gets passed a tuple
-                # This is so we examine the most over-due first
-                for k in sorted(datastore.data['watching'].items(), key=lambda item: item[1].get('last_checked',0)):
-                    watch_uuid_list.append(k[0])
-
-            except RuntimeError as e:
-                # RuntimeError: dictionary changed size during iteration
-                time.sleep(0.1)
-                watch_uuid_list = []
-            else:
-                break
-
         # Re #438 - Don't place more watches in the queue to be checked if the queue is already large
         while update_q.qsize() >= 2000:
             logger.warning(f"Recheck watches queue size limit reached ({MAX_QUEUE_SIZE}), skipping adding more items")
             time.sleep(3)
 
-
-        recheck_time_system_seconds = int(datastore.threshold_seconds)
-
-        # Check for watches outside of the time threshold to put in the thread queue.
-        for uuid in watch_uuid_list:
-            now = time.time()
-            watch = datastore.data['watching'].get(uuid)
-            if not watch:
-                logger.error(f"Watch: {uuid} no longer present.")
-                continue
-
-            # No need todo further processing if it's paused
-            if watch['paused']:
-                continue
-
-            # @todo - Maybe make this a hook?
-            # Time schedule limit - Decide between watch or global settings
-            if watch.get('time_between_check_use_default'):
-                time_schedule_limit = datastore.data['settings']['requests'].get('time_schedule_limit', {})
-                logger.trace(f"{uuid} Time scheduler - Using system/global settings")
-            else:
-                time_schedule_limit = watch.get('time_schedule_limit')
-                logger.trace(f"{uuid} Time scheduler - Using watch settings (not global settings)")
-            tz_name = datastore.data['settings']['application'].get('timezone', 'UTC')
-
-            if time_schedule_limit and time_schedule_limit.get('enabled'):
-                try:
-                    result = is_within_schedule(time_schedule_limit=time_schedule_limit,
-                                                default_tz=tz_name
-                                                )
-                    if not result:
-                        logger.trace(f"{uuid} Time scheduler - not within schedule skipping.")
-                        continue
-                except Exception as e:
-                    logger.error(
-                        f"{uuid} - Recheck scheduler, error handling timezone, check skipped - TZ name '{tz_name}' - {str(e)}")
-                    return False
-            # If they supplied an individual entry minutes to threshold.
-            threshold = recheck_time_system_seconds if watch.get('time_between_check_use_default') else watch.threshold_seconds()
-
-            # #580 - Jitter plus/minus amount of time to make the check seem more random to the server
-            jitter = datastore.data['settings']['requests'].get('jitter_seconds', 0)
-            if jitter > 0:
-                if watch.jitter_seconds == 0:
-                    watch.jitter_seconds = random.uniform(-abs(jitter), jitter)
-
-            seconds_since_last_recheck = now - watch['last_checked']
-
-            if seconds_since_last_recheck >= (threshold + watch.jitter_seconds) and seconds_since_last_recheck >= recheck_time_minimum_seconds:
-                if not uuid in running_uuids and uuid not in [q_uuid.item['uuid'] for q_uuid in update_q.queue]:
-
-                    # Proxies can be set to have a limit on seconds between which they can be called
-                    watch_proxy = datastore.get_preferred_proxy_for_watch(uuid=uuid)
-                    if watch_proxy and watch_proxy in list(datastore.proxy_list.keys()):
-                        # Proxy may also have some threshold minimum
-                        proxy_list_reuse_time_minimum = int(datastore.proxy_list.get(watch_proxy, {}).get('reuse_time_minimum', 0))
-                        if proxy_list_reuse_time_minimum:
-                            proxy_last_used_time = proxy_last_called_time.get(watch_proxy, 0)
-                            time_since_proxy_used = int(time.time() - proxy_last_used_time)
-                            if time_since_proxy_used < proxy_list_reuse_time_minimum:
-                                # Not enough time difference reached, skip this watch
-                                logger.debug(f"> Skipped UUID {uuid} "
-                                        f"using proxy '{watch_proxy}', not "
-                                        f"enough time between proxy requests "
-                                        f"{time_since_proxy_used}s/{proxy_list_reuse_time_minimum}s")
-                                continue
-                            else:
-                                # Record the last used time
-                                proxy_last_called_time[watch_proxy] = int(time.time())
-
-                    # Use Epoch time as priority, so we get a "sorted" PriorityQueue, but we can still push a priority 1 into it.
-                    priority = int(time.time())
-                    logger.debug(
-                        f"> Queued watch UUID {uuid} "
-                        f"last checked at {watch['last_checked']} "
-                        f"queued at {now:0.2f} priority {priority} "
-                        f"jitter {watch.jitter_seconds:0.2f}s, "
-                        f"{now - watch['last_checked']:0.2f}s since last checked")
-
-                    # Into the queue with you
-                    worker_handler.queue_item_async_safe(update_q, queuedWatchMetaData.PrioritizedItem(priority=priority, item={'uuid': uuid}))
-
-                    # Reset for next time
-                    watch.jitter_seconds = 0
+        if queue_due_watches(datastore, update_q,
+                             running_uuids=running_uuids,
+                             proxy_last_called_time=proxy_last_called_time,
+                             recheck_time_minimum_seconds=recheck_time_minimum_seconds) is False:
+            return False
 
         # Wait before checking the list again - saves CPU
         time.sleep(1)
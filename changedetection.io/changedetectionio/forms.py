@@ -719,6 +719,14 @@ class globalSettingsRequestForm(Form):
     jitter_seconds = IntegerField('Random jitter seconds ± check',
                                   render_kw={"style": "width: 5em;"},
                                   validators=[validators.NumberRange(min=0, message="Should contain zero or more seconds")])
+
+    adaptive_recheck = BooleanField('Adaptive recheck time', default=False, validators=[validators.Optional()])
+    adaptive_recheck_min_minutes = IntegerField('Shortest adaptive recheck time (minutes)',
+                                                render_kw={"style": "width: 5em;"},
+                                                validators=[validators.NumberRange(min=1, message="Should be at least 1 minute")])
+    adaptive_recheck_max_minutes = IntegerField('Longest adaptive recheck time (minutes)',
+                                                render_kw={"style": "width: 5em;"},
+                                                validators=[validators.NumberRange(min=1, message="Should be at least 1 minute")])
     
     workers = IntegerField('Number of fetch workers',
                           render_kw={"style": "width: 5em;"},
@@ -730,6 +738,10 @@ class globalSettingsRequestForm(Form):
 
     default_ua = FormField(DefaultUAInputForm, label="Default User-Agent overrides")
 
+    def validate_adaptive_recheck_max_minutes(self, field):
+        if self.adaptive_recheck_min_minutes.data and field.data and field.data < self.adaptive_recheck_min_minutes.data:
+            raise ValidationError('Should not be shorter than the shortest adaptive recheck time')
+
     def validate_extra_proxies(self, extra_validators=None):
         for e in self.data['extra_proxies']:
             if e.get('proxy_name') or e.get('proxy_url'):
@@ -792,3 +804,9 @@ class globalSettingsForm(Form):
 class extractDataForm(Form):
     extract_regex = StringField('RegEx to extract', validators=[validators.Length(min=1, message="Needs a RegEx")])
     extract_submit_button = SubmitField('Extract as CSV', render_kw={"class": "pure-button pure-button-primary"})
+
+    def validate_extract_regex(self, field):
+        try:
+            re.compile(field.data.strip())
+        except re.error as e:
+            raise ValidationError(f"RegEx is not a valid regular expression - {str(e)}")
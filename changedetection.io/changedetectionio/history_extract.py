@@ -0,0 +1,207 @@
+"""
+RegEx extraction across the whole history of a watch, the 'Extract' tab of the diff page.
+
+- The snapshots are searched in chunks by a pool of worker processes, each worker reads and decompresses its own
+  snapshot files so only the file paths and the matched rows cross the process boundary
+- Rows are written to the CSV as each chunk completes (in history order), the report is never built up in memory
+- The report is kept per (RegEx, newest history key), extracting the same RegEx again before the watch changes is
+  just a download
+- Watches with a long history are extracted as a background job that the diff page polls for progress
+
+Configuration (environment)
+- EXTRACT_REGEX_WORKERS           Worker processes for searching the snapshots, default is the number of CPUs
+- EXTRACT_REGEX_INLINE_SNAPSHOTS  Histories up to this many snapshots are extracted in the request itself, default 100
+- EXTRACT_REGEX_CHUNK_SNAPSHOTS   Snapshots per task sent to a worker process, default 25
+- EXTRACT_REGEX_JOB_KEEP_SECONDS  How long a finished background job can still be polled and downloaded, default 3600
+"""
+
+import csv
+import datetime
+import glob
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid as uuid_builder
+from concurrent.futures import ProcessPoolExecutor
+
+from loguru import logger
+
+from changedetectionio.processors.checksum import fast_hash
+
+REPORT_PREFIX = 'extract-'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def inline_snapshots():
+    return int(os.getenv('EXTRACT_REGEX_INLINE_SNAPSHOTS', 100))
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.getenv('EXTRACT_REGEX_WORKERS', 0)) or os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def report_filename(regex, newest_history_key):
+    return f"{REPORT_PREFIX}{fast_hash(regex)[:16]}-{newest_history_key}.csv"
+
+
+def cached_report(watch, regex):
+    """Filename of an already extracted report for this RegEx and the current history, or None"""
+    filename = report_filename(regex, watch.newest_history_key)
+    if os.path.isfile(os.path.join(watch.watch_data_dir, filename)):
+        return filename
+    return None
+
+
+def _search_snapshots(regex, snapshots):
+    """Runs in a worker process, CSV rows for every match in the (timestamp, snapshot path) list"""
+    from changedetectionio.model.Watch import model as watch_model
+
+    compiled = re.compile(regex, re.MULTILINE)
+    rows = []
+    for timestamp, filepath in snapshots:
+        try:
+            contents = watch_model._read_snapshot_file(filepath)
+        except FileNotFoundError:
+            continue
+
+        res = compiled.findall(contents)
+        if res:
+            date_str = datetime.datetime.fromtimestamp(int(timestamp)).strftime('%Y-%m-%d %H:%M:%S')
+            for r in res:
+                row = [timestamp, date_str]
+                if isinstance(r, str):
+                    row.append(r)
+                else:
+                    row += r
+                rows.append(row)
+    return rows
+
+
+def extract_regex_to_csv(watch, regex, progress_callback=None):
+    """
+    Extract every match of the RegEx from the watch history into a CSV file in the watch data directory.
+
+    :param progress_callback: Called with (snapshots done, snapshots total) as the chunks complete
+    :return: The CSV filename, or False when nothing matched
+    """
+    filename = cached_report(watch, regex)
+    if filename:
+        return filename
+
+    snapshots = list(watch.history.items())
+    chunk_size = max(1, int(os.getenv('EXTRACT_REGEX_CHUNK_SNAPSHOTS', 25)))
+    chunks = [snapshots[i:i + chunk_size] for i in range(0, len(snapshots), chunk_size)]
+
+    if len(snapshots) <= inline_snapshots():
+        results = (_search_snapshots(regex, chunk) for chunk in chunks)
+    else:
+        # .map() gives the results back in history order
+        results = _get_pool().map(_search_snapshots, [regex] * len(chunks), chunks)
+
+    filename = report_filename(regex, watch.newest_history_key)
+    output_path = os.path.join(watch.watch_data_dir, filename)
+    tmp_path = f"{output_path}.tmp"
+    f = None
+    csv_writer = None
+    done = 0
+
+    try:
+        for chunk, rows in zip(chunks, results):
+            if rows:
+                if not csv_writer:
+                    f = open(tmp_path, 'w', newline='')
+                    csv_writer = csv.writer(f, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+                    csv_writer.writerow(['Epoch seconds', 'Date'])
+                csv_writer.writerows(rows)
+            done += len(chunk)
+            if progress_callback:
+                progress_callback(done, len(snapshots))
+    finally:
+        if f:
+            f.close()
+
+    if not csv_writer:
+        return False
+
+    # Reports for the same RegEx from older history are not needed anymore
+    for old_report in glob.glob(os.path.join(watch.watch_data_dir, f"{REPORT_PREFIX}{fast_hash(regex)[:16]}-*.csv")):
+        os.unlink(old_report)
+    os.replace(tmp_path, output_path)
+
+    return filename
+
+
+class ExtractionJob:
+    def __init__(self, watch, regex):
+        self.id = str(uuid_builder.uuid4())
+        self.watch_uuid = watch.get('uuid')
+        self.regex = regex
+        self.status = 'running'
+        self.done = 0
+        self.total = watch.history_n
+        self.filename = None
+        self.error = None
+        self.finished_at = None
+
+    def _progress(self, done, total):
+        self.done = done
+        self.total = total
+
+    def run(self, watch):
+        try:
+            self.filename = extract_regex_to_csv(watch, self.regex, progress_callback=self._progress)
+            self.status = 'done'
+        except Exception as e:
+            logger.error(f"Extracting RegEx from the history of {self.watch_uuid} failed - {str(e)}")
+            self.error = str(e)
+            self.status = 'failed'
+        finally:
+            self.finished_at = time.time()
+
+    def as_dict(self):
+        return {'id': self.id, 'status': self.status, 'done': self.done, 'total': self.total,
+                'matched': bool(self.filename), 'error': self.error}
+
+
+def _prune_finished_jobs():
+    """Forget the finished jobs of every watch once they are older than EXTRACT_REGEX_JOB_KEEP_SECONDS, call with _jobs_lock held"""
+    expired = time.time() - int(os.getenv('EXTRACT_REGEX_JOB_KEEP_SECONDS', 3600))
+    for job_id in [j.id for j in _jobs.values() if j.finished_at is not None and j.finished_at < expired]:
+        del _jobs[job_id]
+
+
+def start_extraction(watch, regex):
+    """Start (or join an already running) background extraction of the RegEx"""
+    with _jobs_lock:
+        _prune_finished_jobs()
+        for job in _jobs.values():
+            if job.watch_uuid == watch.get('uuid') and job.regex == regex and job.status == 'running':
+                return job
+
+        # Only the latest job per watch is kept around
+        for job_id in [j.id for j in _jobs.values() if j.watch_uuid == watch.get('uuid') and j.status != 'running']:
+            del _jobs[job_id]
+
+        job = ExtractionJob(watch, regex)
+        _jobs[job.id] = job
+
+    threading.Thread(target=job.run, args=(watch,), daemon=True, name=f"ExtractRegex-{job.id}").start()
+    return job
+
+
+def get_job(job_id):
+    with _jobs_lock:
+        _prune_finished_jobs()
+        return _jobs.get(job_id)
@@ -0,0 +1,145 @@
+"""
+Per-host politeness for the fetch workers.
+
+Sits between the update queue and the workers, before a worker fetches a watch it asks for a slot for the
+(proxy, hostname) the request will go out on. When that host is at its in-flight limit, out of tokens or backing off
+after a 429/503 the worker hands the item back to the queue with a delay and carries on with the next item,
+so one throttled host never keeps the workers from checking other hosts.
+
+Configuration (environment)
+- FETCH_MAX_INFLIGHT_PER_HOST   Maximum fetches running at the same time for one host (0 = no limit), default 4
+- FETCH_HOST_REQUESTS_PER_MINUTE  Token bucket refill rate per host (0 = no rate limit), default 0
+- FETCH_HOST_BURST              Token bucket size, how many requests can go out at once, default 5
+- FETCH_HOST_BACKOFF_SECONDS    First backoff after a 429/503, doubles on every consecutive one, default 30
+- FETCH_HOST_BACKOFF_MAX_SECONDS  Longest backoff (also caps any Retry-After header), default 3600
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from loguru import logger
+
+# Reply codes that mean "slow down"
+BACKOFF_STATUS_CODES = (429, 503)
+
+# How long to hold an item that is waiting for a free in-flight slot
+INFLIGHT_RETRY_SECONDS = 1.0
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header, which is either a number of seconds or an HTTP date"""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostState:
+    __slots__ = ('in_flight', 'tokens', 'last_refill', 'backoff_until', 'consecutive_backoffs')
+
+    def __init__(self, burst):
+        self.in_flight = 0
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.backoff_until = 0.0
+        self.consecutive_backoffs = 0
+
+
+class HostPolitenessScheduler:
+    def __init__(self, max_inflight_per_host=4, requests_per_minute=0, burst=5, backoff_seconds=30, backoff_max_seconds=3600):
+        self.max_inflight_per_host = max_inflight_per_host
+        self.requests_per_minute = requests_per_minute
+        self.burst = max(1, burst)
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.lock = threading.Lock()
+        self._hosts = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_inflight_per_host=int(os.getenv('FETCH_MAX_INFLIGHT_PER_HOST', 4)),
+                   requests_per_minute=float(os.getenv('FETCH_HOST_REQUESTS_PER_MINUTE', 0)),
+                   burst=int(os.getenv('FETCH_HOST_BURST', 5)),
+                   backoff_seconds=int(os.getenv('FETCH_HOST_BACKOFF_SECONDS', 30)),
+                   backoff_max_seconds=int(os.getenv('FETCH_HOST_BACKOFF_MAX_SECONDS', 3600)))
+
+    @staticmethod
+    def key_for(url, proxy=None):
+        """Limits are per hostname and per proxy, the same host through another proxy is another source address"""
+        hostname = (urlparse(url).hostname or '') if url else ''
+        return f"{proxy or 'direct'}|{hostname.lower()}"
+
+    def _state(self, key):
+        state = self._hosts.get(key)
+        if state is None:
+            state = self._hosts[key] = _HostState(self.burst)
+        return state
+
+    def _refill(self, state, now):
+        if self.requests_per_minute > 0:
+            state.tokens = min(self.burst, state.tokens + (now - state.last_refill) * self.requests_per_minute / 60)
+        state.last_refill = now
+
+    def try_acquire(self, key):
+        """
+        Take a fetch slot for the host.
+
+        :return: 0 when the fetch can go ahead (call release() when done), otherwise how many seconds to wait before trying again
+        """
+        now = time.monotonic()
+        with self.lock:
+            state = self._state(key)
+
+            if state.backoff_until > now:
+                return state.backoff_until - now
+
+            if self.max_inflight_per_host and state.in_flight >= self.max_inflight_per_host:
+                return INFLIGHT_RETRY_SECONDS
+
+            if self.requests_per_minute > 0:
+                self._refill(state, now)
+                if state.tokens < 1:
+                    return (1 - state.tokens) * 60 / self.requests_per_minute
+                state.tokens -= 1
+
+            state.in_flight += 1
+            return 0
+
+    def release(self, key, status_code=None, retry_after=None):
+        """Give back the slot, a 429/503 reply puts the host into (exponential) backoff"""
+        with self.lock:
+            state = self._state(key)
+            state.in_flight = max(0, state.in_flight - 1)
+
+            if status_code in BACKOFF_STATUS_CODES:
+                state.consecutive_backoffs += 1
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = self.backoff_seconds * (2 ** (state.consecutive_backoffs - 1))
+                delay = min(delay, self.backoff_max_seconds)
+                state.backoff_until = time.monotonic() + delay
+                logger.warning(f"Host '{key}' replied {status_code}, backing off for {delay:.0f}s")
+            elif status_code:
+                state.consecutive_backoffs = 0
+
+            # Forget idle hosts so the table does not grow with every host ever seen (token buckets have to be kept)
+            if not state.in_flight and not state.consecutive_backoffs and self.requests_per_minute <= 0:
+                del self._hosts[key]
+
+    def get_stats(self):
+        now = time.monotonic()
+        with self.lock:
+            return {key: {'in_flight': state.in_flight,
+                          'backoff_seconds_remaining': round(max(0, state.backoff_until - now), 1)}
+                    for key, state in self._hosts.items()}
+
+
+host_scheduler = HostPolitenessScheduler.from_env()
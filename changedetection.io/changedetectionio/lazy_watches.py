@@ -0,0 +1,155 @@
+"""
+The datastore's dict of watches, where a watch can stay as the plain dict it was loaded from the JSON until it is used.
+
+Rehydrating a watch into its Watch.model (copying the defaults, reading its history index) is most of the cost of
+starting on a large datastore, with LAZY_WATCH_LOAD the datastore only stores the loaded dicts and each watch is
+rehydrated the first time it is accessed.
+
+- Lookups, .get(), .items() and .values() always return the rehydrated watch, .items() and .values() are views that
+  only rehydrate each watch as the iteration reaches it
+- peek() returns whatever is stored without rehydrating, for the start up indexes and the recheck ticker
+- Iterating and `in` only need the UUIDs, they do not rehydrate anything
+- deepcopy() (the JSON save) copies the watches that were never used as the dicts they were loaded from
+
+Configuration (environment)
+- LAZY_WATCH_LOAD  Rehydrate each watch on first access instead of all of them at start up, default False
+"""
+
+import threading
+from collections.abc import ItemsView, ValuesView
+from copy import deepcopy
+
+
+class _LazyItemsView(ItemsView):
+    def __iter__(self):
+        return self._mapping._iter_resolved()
+
+
+class _LazyValuesView(ValuesView):
+    def __iter__(self):
+        return (watch for uuid, watch in self._mapping._iter_resolved())
+
+
+class LazyWatchDict(dict):
+
+    def __init__(self, materialise):
+        """
+        :param materialise: Called with (uuid, loaded dict), returns the watch object to store instead
+        """
+        super().__init__()
+        self._materialise = materialise
+        self._pending = set()
+        self._lock = threading.RLock()
+
+    @property
+    def pending_count(self):
+        """How many watches are still waiting to be rehydrated"""
+        return len(self._pending)
+
+    def set_unmaterialised(self, uuid, entity):
+        """Store the loaded dict, it is only rehydrated when the watch is first accessed"""
+        with self._lock:
+            dict.__setitem__(self, uuid, entity)
+            self._pending.add(uuid)
+
+    def is_pending(self, uuid):
+        """True while the watch is still the dict it was loaded from"""
+        return uuid in self._pending
+
+    def peek(self, uuid, default=None):
+        """Whatever is stored for the UUID without rehydrating it, the loaded dict or the watch object"""
+        return dict.get(self, uuid, default)
+
+    def _resolve(self, uuid):
+        if uuid not in self._pending:
+            return dict.__getitem__(self, uuid)
+
+        with self._lock:
+            if uuid in self._pending:
+                watch = self._materialise(uuid, dict.__getitem__(self, uuid))
+                dict.__setitem__(self, uuid, watch)
+                self._pending.discard(uuid)
+            return dict.__getitem__(self, uuid)
+
+    def materialise_all(self):
+        for uuid in list(self._pending):
+            try:
+                self._resolve(uuid)
+            except KeyError:
+                # Deleted meanwhile
+                continue
+
+    def __getitem__(self, uuid):
+        return self._resolve(uuid)
+
+    def get(self, uuid, default=None):
+        try:
+            return self._resolve(uuid)
+        except KeyError:
+            return default
+
+    def __setitem__(self, uuid, watch):
+        with self._lock:
+            dict.__setitem__(self, uuid, watch)
+            self._pending.discard(uuid)
+
+    def __delitem__(self, uuid):
+        with self._lock:
+            dict.__delitem__(self, uuid)
+            self._pending.discard(uuid)
+
+    # Overriding __iter__ also stops dict(watches) and {**watches} from copying the stored values directly
+    def __iter__(self):
+        return iter(dict.keys(self))
+
+    def _iter_resolved(self):
+        # Over a snapshot of the UUIDs, watches can be added or deleted while iterating
+        for uuid in list(dict.keys(self)):
+            try:
+                yield uuid, self._resolve(uuid)
+            except KeyError:
+                # Deleted meanwhile
+                continue
+
+    def items(self):
+        return _LazyItemsView(self)
+
+    def values(self):
+        return _LazyValuesView(self)
+
+    def pop(self, uuid, *default):
+        with self._lock:
+            if dict.__contains__(self, uuid):
+                watch = self._resolve(uuid)
+                del self[uuid]
+                return watch
+        if default:
+            return default[0]
+        raise KeyError(uuid)
+
+    def setdefault(self, uuid, default=None):
+        with self._lock:
+            if not dict.__contains__(self, uuid):
+                self[uuid] = default
+            return self._resolve(uuid)
+
+    def update(self, *args, **kwargs):
+        for uuid, watch in dict(*args, **kwargs).items():
+            self[uuid] = watch
+
+    def clear(self):
+        with self._lock:
+            dict.clear(self)
+            self._pending.clear()
+
+    def copy(self):
+        return dict(self._iter_resolved())
+
+    def __deepcopy__(self, memo):
+        # A plain dict, the watches that were never used stay the dicts they were loaded from, so saving the JSON
+        # does not have to rehydrate every watch
+        return {uuid: deepcopy(dict.get(self, uuid), memo) for uuid in list(dict.keys(self))}
+
+    # Pickled (and copied) as a plain dict of the watch objects
+    def __reduce__(self):
+        return dict, (dict(self._iter_resolved()),)
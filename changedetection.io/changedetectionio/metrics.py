@@ -0,0 +1,300 @@
+"""
+Timings and gauges of the check pipeline, to find out what limits how many checks per minute get done.
+
+Every check goes through the queue, the per-host politeness, the fetcher, the processor stages (filters, text
+extraction, checksum, diff), saving the snapshot files and maybe a notification, each of those is timed into a
+histogram, queue depths, in-flight fetches per host and busy workers are read when the metrics are collected.
+
+Exposed in the Prometheus text format on /metrics (same API key as the API when that is enabled) and as a summary in
+/api/v1/systeminfo, no prometheus_client needed.
+
+Processor stage timings are taken in the process that runs the processor and handed back with the result
+(see processors.process_pool), so they also work with PROCESSOR_POOL_WORKERS.
+
+Configuration (environment)
+- METRICS_ENABLED    Collect the timings, default True
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from changedetectionio.strtobool import strtobool
+
+# Seconds, from a cached checksum compare up to a slow browser fetch
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+STAGE_FILTERS = 'filters'
+STAGE_TEXT_EXTRACTION = 'text_extraction'
+STAGE_CHECKSUM = 'checksum'
+STAGE_DIFF = 'diff'
+STAGE_SAVE = 'save'
+
+
+def enabled():
+    return strtobool(os.getenv('METRICS_ENABLED', 'True'))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self):
+        """[(suffix, label values, extra label pair or None, value)]"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, values, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            return [('', key, None, value) for key, value in sorted(self._values.items())]
+
+    def summary(self):
+        with self._lock:
+            return {','.join(key) or 'total': round(value, 3) for key, value in sorted(self._values.items())}
+
+
+class Gauge(_Metric):
+    """A value that is read when the metrics are collected, from set() or from the function given to set_function()"""
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        """
+        :param function: Returns the value, or {label value tuple: value} for a gauge with labels
+        """
+        self._function = function
+
+    def _current(self):
+        if self._function is None:
+            with self._lock:
+                return dict(self._values)
+        try:
+            value = self._function()
+        except Exception:
+            # The queue or the workers are not there (yet), nothing to report
+            return {}
+        if isinstance(value, dict):
+            return {tuple(str(k) for k in (key if isinstance(key, tuple) else (key,))): v for key, v in value.items()}
+        return {(): value}
+
+    def _samples(self):
+        return [('', key, None, value) for key, value in sorted(self._current().items())]
+
+    def summary(self):
+        return {','.join(key) or 'value': value for key, value in sorted(self._current().items())}
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per bucket (not cumulative) counts, then count, sum and the slowest one
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0, 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += 1
+            state[2] += value
+            state[3] = max(state[3], value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, count, total, _) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip((*self.buckets, float('inf')), counts):
+                    cumulative += n
+                    samples.append(('_bucket', key, ('le', _format_value(bound)), cumulative))
+                samples.append(('_sum', key, None, total))
+                samples.append(('_count', key, None, count))
+        return samples
+
+    def summary(self):
+        with self._lock:
+            return {','.join(key) or 'total': {'count': count,
+                                               'avg_seconds': round(total / count, 4) if count else 0,
+                                               'max_seconds': round(slowest, 4),
+                                               'total_seconds': round(total, 3)}
+                    for key, (counts, count, total, slowest) in sorted(self._values.items())}
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """A small JSON friendly version, the histograms as count/avg/max/total per label set"""
+        return {name: metric.summary() for name, metric in self._metrics.items()}
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+class StageTimings:
+    """
+    Lap timer for the processor stages, each lap() adds the time since the previous one to that stage,
+    so a stage that is visited more than once in a check (the text filters run before and after the checksum) adds up.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+
+registry = Registry()
+
+FETCH_SECONDS = registry.register(Histogram(
+    'changedetection_fetch_seconds', 'Time to fetch a page, per fetcher backend and result',
+    labelnames=('fetcher', 'result')))
+
+PROCESSING_STAGE_SECONDS = registry.register(Histogram(
+    'changedetection_processing_stage_seconds', 'Time spent in each stage of processing a fetched page',
+    labelnames=('processor', 'stage')))
+
+QUEUE_WAIT_SECONDS = registry.register(Histogram(
+    'changedetection_queue_wait_seconds', 'Time from queueing a check until a worker starts it (includes host politeness delays)',
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 3600.0)))
+
+CHECK_SECONDS = registry.register(Histogram(
+    'changedetection_check_seconds', 'Time a worker spent on one check, fetch to saved',
+    labelnames=('processor',)))
+
+NOTIFICATION_SEND_SECONDS = registry.register(Histogram(
+    'changedetection_notification_send_seconds', 'Time to render and send one notification to all its URLs',
+    labelnames=('result',)))
+
+DATASTORE_SAVE_SECONDS = registry.register(Histogram(
+    'changedetection_datastore_save_seconds', 'Time to write the datastore JSON'))
+
+CHECKS_TOTAL = registry.register(Counter(
+    'changedetection_checks_total', 'Checks done, per result (changed, unchanged, error)',
+    labelnames=('result',)))
+
+WORKER_BUSY_SECONDS = registry.register(Counter(
+    'changedetection_worker_busy_seconds_total', 'Seconds the workers spent on checks, rate() of it divided by the workers is the utilisation'))
+
+QUEUE_DEPTH = registry.register(Gauge(
+    'changedetection_queue_depth', 'Items waiting in each queue',
+    labelnames=('queue',)))
+
+HOST_IN_FLIGHT = registry.register(Gauge(
+    'changedetection_host_in_flight', 'Fetches running right now per proxy|hostname',
+    labelnames=('host',)))
+
+WORKERS = registry.register(Gauge(
+    'changedetection_workers', 'Fetch workers, running and busy with a check',
+    labelnames=('state',)))
+
+
+def observe(histogram, seconds, **labels):
+    if enabled():
+        histogram.observe(seconds, **labels)
+
+
+def observe_stages(processor, stage_timings):
+    """Record the StageTimings.seconds of a processed check"""
+    if not stage_timings or not enabled():
+        return
+    for stage, seconds in stage_timings.items():
+        PROCESSING_STAGE_SECONDS.observe(seconds, processor=processor, stage=stage)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Time the block into the histogram (when metrics are enabled)"""
+    if not enabled():
+        yield
+        return
+    with histogram.time(**labels):
+        yield
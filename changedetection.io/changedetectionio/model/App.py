@@ -22,6 +22,9 @@ class model(dict):
                 'headers': {
                 },
                 'requests': {
+                    'adaptive_recheck': False, # Estimate the recheck time from how often each watch changes
+                    'adaptive_recheck_max_minutes': 1440,
+                    'adaptive_recheck_min_minutes': 5,
                     'extra_proxies': [], # Configurable extra proxies via the UI
                     'extra_browsers': [],  # Configurable extra proxies via the UI
                     'jitter_seconds': 0,
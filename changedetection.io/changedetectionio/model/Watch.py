@@ -5,11 +5,14 @@ from changedetectionio.safe_jinja import render as jinja_render
 from . import watch_base
 import os
 import re
+import time
 from pathlib import Path
 from loguru import logger
 
 from .. import safe_jinja
 from ..html_tools import TRANSLATE_WHITESPACE_TABLE
+from ..search_index import WATCH_INDEXED_FIELDS
+from ..snapshot_cache import snapshot_cache
 
 # Allowable protocols, protects against javascript: etc
 # file:// is further checked by ALLOW_FILE_URI
@@ -18,6 +21,12 @@ SAFE_PROTOCOL_REGEX='^(http|https|ftp|file):'
 minimum_seconds_recheck_time = int(os.getenv('MINIMUM_SECONDS_RECHECK_TIME', 3))
 mtable = {'seconds': 1, 'minutes': 60, 'hours': 3600, 'days': 86400, 'weeks': 86400 * 7}
 
+# Adaptive recheck, how many snapshots are needed before the change rate is trusted, how many of the most recent
+# changes it is estimated from and how many checks to aim for per expected change
+ADAPTIVE_MIN_SNAPSHOTS = 3
+ADAPTIVE_HISTORY_WINDOW = 20
+ADAPTIVE_CHECKS_PER_CHANGE = 2
+
 
 def is_safe_url(test_url):
     # See https://github.com/dgtlmoon/changedetection.io/issues/1358
@@ -38,6 +47,7 @@ def is_safe_url(test_url):
 class model(watch_base):
     __newest_history_key = None
     __history_n = 0
+    __change_timestamps_cache = None
     jitter_seconds = 0
 
     def __init__(self, *arg, **kw):
@@ -56,6 +66,29 @@ class model(watch_base):
         # Be sure the cached timestamp is ready
         bump = self.history
 
+    # Let the datastore keep its search and sort indexes fresh when any of the indexed fields are written
+    def __setitem__(self, key, value):
+        super(model, self).__setitem__(key, value)
+        if key in WATCH_INDEXED_FIELDS:
+            self._indexed_fields_changed()
+
+    def update(self, *args, **kwargs):
+        if args and not hasattr(args[0], 'keys'):
+            # Iterable of key/value pairs, it can only be read once
+            args = (dict(args[0]),) + args[1:]
+        super(model, self).update(*args, **kwargs)
+
+        keys = set(kwargs.keys())
+        if args:
+            keys.update(args[0].keys())
+        if not keys.isdisjoint(WATCH_INDEXED_FIELDS):
+            self._indexed_fields_changed()
+
+    def _indexed_fields_changed(self):
+        watch_index_fields_changed = signal('watch_index_fields_changed')
+        if watch_index_fields_changed.receivers:
+            watch_index_fields_changed.send(self, watch_uuid=self.get('uuid'))
+
     @property
     def viewed(self):
         # Don't return viewed when last_viewed is 0 and newest_key is 0
@@ -110,6 +143,8 @@ class model(watch_base):
         for item in pathlib.Path(str(self.watch_data_dir)).rglob("*.*"):
             os.unlink(item)
 
+        snapshot_cache.discard(self.get('uuid'))
+
         # Force the attr to recalculate
         bump = self.history
 
@@ -217,6 +252,8 @@ class model(watch_base):
 
                         tmp_history[k] = v
 
+        previous_last_changed = self.last_changed
+
         if len(tmp_history):
             self.__newest_history_key = list(tmp_history.keys())[-1]
         else:
@@ -224,6 +261,9 @@ class model(watch_base):
 
         self.__history_n = len(tmp_history)
 
+        if self.last_changed != previous_last_changed:
+            self._indexed_fields_changed()
+
         return tmp_history
 
     @property
@@ -286,9 +326,9 @@ class model(watch_base):
         # When the 'last viewed' timestamp is less than the oldest snapshot, return oldest
         return sorted_keys[-1]
 
-    def get_history_snapshot(self, timestamp):
+    @staticmethod
+    def _read_snapshot_file(filepath):
         import brotli
-        filepath = self.history[timestamp]
 
         # See if a brotli versions exists and switch to that
         if not filepath.endswith('.br') and os.path.isfile(f"{filepath}.br"):
@@ -308,11 +348,44 @@ class model(watch_base):
         with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
             return f.read()
 
+    def get_history_snapshot(self, timestamp):
+        # Snapshots never change, so a cached copy is always good (and saves reading the history index)
+        text = snapshot_cache.get(self.get('uuid'), timestamp)
+        if text is None:
+            text = self._read_snapshot_file(self.history[timestamp])
+            snapshot_cache.put(self.get('uuid'), timestamp, text)
+        return text
+
+    def get_history_snapshots(self, timestamps, skip_unreadable=False):
+        """
+        Several snapshots at once, the history index is read at most once for all of them.
+
+        :param skip_unreadable: Leave out (and log) the snapshots that can not be read instead of raising
+        :return: dict of timestamp -> snapshot text, in the order given
+        """
+        snapshots = {}
+        history = None
+        for timestamp in timestamps:
+            text = snapshot_cache.get(self.get('uuid'), timestamp)
+            if text is None:
+                try:
+                    if history is None:
+                        history = self.history
+                    text = self._read_snapshot_file(history[timestamp])
+                except Exception as e:
+                    if not skip_unreadable:
+                        raise
+                    logger.warning(f"Unable to read snapshot {timestamp} of watch {self.get('uuid')} - {str(e)}")
+                    continue
+                snapshot_cache.put(self.get('uuid'), timestamp, text)
+            snapshots[timestamp] = text
+        return snapshots
+
    # Save some text file to the appropriate path and bump the history
     # result_obj from fetch_site_status.run()
     def save_history_text(self, contents, timestamp, snapshot_id):
-        import brotli
         import tempfile
+        from changedetectionio.storage_compression import compress, ARTIFACT_SNAPSHOT_TEXT
         logger.trace(f"{self.get('uuid')} - Updating history.txt with timestamp {timestamp}")
 
         self.ensure_data_dir_exists()
@@ -323,7 +396,7 @@ class model(watch_base):
         # Decide on snapshot filename and destination path
         if not skip_brotli and len(contents) > threshold:
             snapshot_fname = f"{snapshot_id}.txt.br"
-            encoded_data = brotli.compress(contents.encode('utf-8'), mode=brotli.MODE_TEXT)
+            encoded_data = compress(ARTIFACT_SNAPSHOT_TEXT, contents.encode('utf-8'))
         else:
             snapshot_fname = f"{snapshot_id}.txt"
             encoded_data = contents.encode('utf-8')
@@ -339,6 +412,9 @@ class model(watch_base):
                 tmp_path = tmp.name
             os.rename(tmp_path, dest)
 
+        # The same timestamp could be written again (the newest history.txt line wins)
+        snapshot_cache.discard(self.get('uuid'), timestamp)
+
         # Append to history.txt atomically
         index_fname = os.path.join(self.watch_data_dir, "history.txt")
         index_line = f"{timestamp},{snapshot_fname}\n"
@@ -353,6 +429,8 @@ class model(watch_base):
         # Update internal state
         self.__newest_history_key = timestamp
         self.__history_n += 1
+        # last_changed moved
+        self._indexed_fields_changed()
 
         # @todo bump static cache of the last timestamp so we dont need to examine the file to set a proper ''viewed'' status
         return snapshot_fname
@@ -372,6 +450,42 @@ class model(watch_base):
                 seconds += x * n
         return seconds
 
+    def _change_timestamps(self):
+        """Sorted epoch times of the snapshots (every snapshot is a change), re-read only when the history grew"""
+        cache_key = (self.__history_n, self.__newest_history_key)
+        if self.__change_timestamps_cache and self.__change_timestamps_cache[0] == cache_key:
+            return self.__change_timestamps_cache[1]
+
+        history = self.history
+        timestamps = sorted(int(k) for k in history.keys()) if history else []
+        # self.history may have refreshed the counters
+        self.__change_timestamps_cache = ((self.__history_n, self.__newest_history_key), timestamps)
+        return timestamps
+
+    def adaptive_threshold_seconds(self, base_seconds, min_seconds, max_seconds, now=None):
+        """
+        Recheck interval estimated from how often this watch has changed.
+
+        The typical (median) time between the recent changes is the expected change interval, once the page has been
+        quiet for longer than that the quiet time is used instead, so a page that stopped changing is checked less and
+        less often. The watch is checked ADAPTIVE_CHECKS_PER_CHANGE times per expected change, clamped to min/max.
+
+        Without enough history to estimate from the base interval is used.
+        """
+        timestamps = self._change_timestamps()
+        if len(timestamps) < ADAPTIVE_MIN_SNAPSHOTS:
+            return base_seconds
+
+        recent = timestamps[-(ADAPTIVE_HISTORY_WINDOW + 1):]
+        intervals = sorted(b - a for a, b in zip(recent, recent[1:]))
+        expected_change_interval = intervals[len(intervals) // 2]
+
+        quiet_seconds = (now if now is not None else time.time()) - timestamps[-1]
+        expected_change_interval = max(expected_change_interval, quiet_seconds)
+
+        seconds = expected_change_interval / ADAPTIVE_CHECKS_PER_CHANGE
+        return int(max(min_seconds, min(seconds, max(min_seconds, max_seconds))))
+
     # Iterate over all history texts and see if something new exists
     # Always applying .strip() to start/end but optionally replace any other whitespace
     def lines_contain_something_unique_compared_to_history(self, lines: list, ignore_whitespace=False):
@@ -489,49 +603,10 @@ class model(watch_base):
         return []
 
 
-    def extract_regex_from_all_history(self, regex):
-        import csv
-        import re
-        import datetime
-        csv_output_filename = False
-        csv_writer = False
-        f = None
-
-        # self.history will be keyed with the full path
-        for k, fname in self.history.items():
-            if os.path.isfile(fname):
-                if True:
-                    contents = self.get_history_snapshot(k)
-                    res = re.findall(regex, contents, re.MULTILINE)
-                    if res:
-                        if not csv_writer:
-                            # A file on the disk can be transferred much faster via flask than a string reply
-                            csv_output_filename = 'report.csv'
-                            f = open(os.path.join(self.watch_data_dir, csv_output_filename), 'w')
-                            # @todo some headers in the future
-                            #fieldnames = ['Epoch seconds', 'Date']
-                            csv_writer = csv.writer(f,
-                                                    delimiter=',',
-                                                    quotechar='"',
-                                                    quoting=csv.QUOTE_MINIMAL,
-                                                    #fieldnames=fieldnames
-                                                    )
-                            csv_writer.writerow(['Epoch seconds', 'Date'])
-                            # csv_writer.writeheader()
-
-                        date_str = datetime.datetime.fromtimestamp(int(k)).strftime('%Y-%m-%d %H:%M:%S')
-                        for r in res:
-                            row = [k, date_str]
-                            if isinstance(r, str):
-                                row.append(r)
-                            else:
-                                row+=r
-                            csv_writer.writerow(row)
-
-        if f:
-            f.close()
-
-        return csv_output_filename
+    def extract_regex_from_all_history(self, regex, progress_callback=None):
+        # A file on the disk can be transferred much faster via flask than a string reply
+        from changedetectionio.history_extract import extract_regex_to_csv
+        return extract_regex_to_csv(self, regex, progress_callback=progress_callback)
 
 
     def has_special_diff_filter_options_set(self):
@@ -555,7 +630,7 @@ class model(watch_base):
 
     def save_xpath_data(self, data, as_error=False):
         import json
-        import zlib
+        from changedetectionio.storage_compression import compress, ARTIFACT_XPATH_DATA
 
         if as_error:
             target_path = os.path.join(str(self.watch_data_dir), "elements-error.deflate")
@@ -566,9 +641,9 @@ class model(watch_base):
 
         with open(target_path, 'wb') as f:
             if not isinstance(data, str):
-                f.write(zlib.compress(json.dumps(data).encode()))
+                f.write(compress(ARTIFACT_XPATH_DATA, json.dumps(data).encode()))
             else:
-                f.write(zlib.compress(data.encode()))
+                f.write(compress(ARTIFACT_XPATH_DATA, data.encode()))
             f.close()
 
     # Save as PNG, PNG is larger but better for doing visual diff in the future
@@ -602,13 +677,13 @@ class model(watch_base):
             return(brotli.decompress(f.read()).decode('utf-8'))
 
     def save_last_text_fetched_before_filters(self, contents):
-        import brotli
+        from changedetectionio.storage_compression import compress, ARTIFACT_LAST_FETCHED_TEXT
         filepath = os.path.join(self.watch_data_dir, 'last-fetched.br')
         with open(filepath, 'wb') as f:
-            f.write(brotli.compress(contents, mode=brotli.MODE_TEXT))
+            f.write(compress(ARTIFACT_LAST_FETCHED_TEXT, contents))
 
     def save_last_fetched_html(self, timestamp, contents):
-        import brotli
+        from changedetectionio.storage_compression import compress, ARTIFACT_FETCHED_HTML
 
         self.ensure_data_dir_exists()
         snapshot_fname = f"{timestamp}.html.br"
@@ -617,7 +692,7 @@ class model(watch_base):
         with open(filepath, 'wb') as f:
             contents = contents.encode('utf-8') if isinstance(contents, str) else contents
             try:
-                f.write(brotli.compress(contents))
+                f.write(compress(ARTIFACT_FETCHED_HTML, contents))
             except Exception as e:
                 logger.warning(f"{self.get('uuid')} - Unable to compress snapshot, saving as raw data to {filepath}")
                 logger.warning(e)
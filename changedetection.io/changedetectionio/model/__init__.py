@@ -5,6 +5,8 @@ from changedetectionio import strtobool
 default_notification_format_for_watch = 'System default'
 
 class watch_base(dict):
+    # Bumped on every write, tells the datastore when what it resolved from this watch or tag is stale
+    revision = 0
 
     def __init__(self, *arg, **kw):
         self.update({
@@ -133,4 +135,16 @@ class watch_base(dict):
         super(watch_base, self).__init__(*arg, **kw)
 
         if self.get('default'):
-            del self['default']
\ No newline at end of file
+            del self['default']
+
+    def __setitem__(self, key, value):
+        super(watch_base, self).__setitem__(key, value)
+        self.revision += 1
+
+    def __delitem__(self, key):
+        super(watch_base, self).__delitem__(key)
+        self.revision += 1
+
+    def update(self, *args, **kwargs):
+        super(watch_base, self).update(*args, **kwargs)
+        self.revision += 1
@@ -37,9 +37,12 @@ class NotificationService:
             dates = list(watch_history.keys())
             trigger_text = watch.get('trigger_text', [])
 
+        # Read the newest (and the one before for the diff) together
+        snapshots = watch.get_history_snapshots(dates[-2:]) if len(dates) else {}
+
         # Add text that was triggered
         if len(dates):
-            snapshot_contents = watch.get_history_snapshot(dates[-1])
+            snapshot_contents = snapshots[dates[-1]]
         else:
             snapshot_contents = "No snapshot/history available, the watch should fetch atleast once."
 
@@ -73,8 +76,8 @@ class NotificationService:
         current_snapshot = "Example text: example test\nExample text: change detection is fantastic\nExample text: even more examples\nExample text: a lot more examples"
 
         if len(dates) > 1:
-            prev_snapshot = watch.get_history_snapshot(dates[-2])
-            current_snapshot = watch.get_history_snapshot(dates[-1])
+            prev_snapshot = snapshots[dates[-2]]
+            current_snapshot = snapshots[dates[-1]]
 
         n_object.update({
             'current_snapshot': snapshot_contents,
@@ -116,12 +119,9 @@ class NotificationService:
 
             return v
 
-        tags = self.datastore.get_all_tags_for_watch(uuid=watch.get('uuid'))
-        if tags:
-            for tag_uuid, tag in tags.items():
-                v = tag.get(var_name)
-                if v and not tag.get('notification_muted'):
-                    return v
+        v = self.datastore.get_effective_config_for_watch(uuid=watch.get('uuid')).tag_setting(var_name)
+        if v:
+            return v
 
         if self.datastore.data['settings']['application'].get(var_name):
             return self.datastore.data['settings']['application'].get(var_name)
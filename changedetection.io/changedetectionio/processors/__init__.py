@@ -16,6 +16,8 @@ class difference_detection_processor():
     datastore = None
     fetcher = None
     screenshot = None
+    # metrics.StageTimings of the last run_changedetection()
+    stage_timings = None
     watch = None
     xpath_data = None
     preferred_proxy = None
@@ -0,0 +1,96 @@
+"""
+Checksums for the skip-unchanged fast path.
+
+Before any filters run, the fetched content is hashed together with everything that decides how it is processed
+(the watch, its tags and the global settings that change the filtered text). When that hash is the same as the
+last successful check the filters would produce exactly the same text again, so the processing can be skipped.
+
+Some pages change on every request in ways that never reach the filtered text (CSRF tokens, CSP nonces, cache busting
+timestamps on scripts and images), those can be blanked out of HTML before hashing. Only for watches without
+include filters, an attribute filter like //img/@src can select exactly those values.
+
+Configuration (environment)
+- SKIP_UNCHANGED_CONTENT            Enable the fast path, default True
+- SKIP_UNCHANGED_NORMALISE_VOLATILE Blank out volatile tokens before hashing HTML, default True
+"""
+
+import hashlib
+import json
+import re
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Watch fields that are the result of checking, not settings, they don't change how the content is processed
+WATCH_STATE_FIELDS = frozenset([
+    'browser_steps_last_error_step',
+    'check_count',
+    'consecutive_filter_failures',
+    'content-type',
+    'content_type',
+    'fetch_time',
+    'has_ldjson_price_data',
+    'last_check_status',
+    'last_checked',
+    'last_error',
+    'last_notification_error',
+    'last_viewed',
+    'notification_alert_count',
+    'previous_md5',
+    'previous_md5_before_filters',
+    'remote_server_reply',
+    'title',
+])
+
+# Global settings that change the filtered text
+PROCESSING_APPLICATION_SETTINGS = (
+    'empty_pages_are_a_change',
+    'global_ignore_text',
+    'global_subtractive_selectors',
+    'ignore_whitespace',
+    'render_anchor_tag_content',
+)
+
+# Tokens that only ever live inside tag attributes of HTML
+VOLATILE_TOKEN_PATTERNS = [
+    # <input type="hidden" name="csrf_token" value="..."> (either attribute order)
+    (re.compile(r'''(<input\b[^>]*?\bname\s*=\s*["']?[\w\-\[\]]*(?:csrf|xsrf|authenticity|verificationtoken|nonce|_token)[\w\-\[\]]*["']?[^>]*?\bvalue\s*=\s*)(["'])[^"']*\2''', re.IGNORECASE), r'\1\2\2'),
+    (re.compile(r'''(<input\b[^>]*?\bvalue\s*=\s*)(["'])[^"']*\2([^>]*?\bname\s*=\s*["']?[\w\-\[\]]*(?:csrf|xsrf|authenticity|verificationtoken|nonce|_token))''', re.IGNORECASE), r'\1\2\2\3'),
+    # <meta name="csrf-token" content="...">
+    (re.compile(r'''(<meta\b[^>]*?\bname\s*=\s*["']?[\w\-]*(?:csrf|xsrf)[\w\-]*["']?[^>]*?\bcontent\s*=\s*)(["'])[^"']*\2''', re.IGNORECASE), r'\1\2\2'),
+    # CSP nonce="..." on script and style tags
+    (re.compile(r'''(\bnonce\s*=\s*)(["'])[^"']*\2''', re.IGNORECASE), r'\1\2\2'),
+    # Cache busting timestamps in script/image sources, ?v=1700000000 or &_=1700000000000
+    (re.compile(r'''(\bsrc(?:set)?\s*=\s*["'][^"']*?[?&][\w\-]+=)\d{10,13}\b''', re.IGNORECASE), r'\1'),
+]
+
+
+def fast_hash(data):
+    """Non-cryptographic content hash, xxh3-128 when the xxhash package is installed, otherwise blake2b"""
+    if isinstance(data, str):
+        data = data.encode('utf-8', errors='surrogatepass')
+    if xxhash:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def normalise_volatile_tokens(html):
+    for pattern, replacement in VOLATILE_TOKEN_PATTERNS:
+        html = pattern.sub(replacement, html)
+    return html
+
+
+def processing_config_fingerprint(watch, datastore):
+    """Everything except the content that decides what the filters produce, as one string"""
+    from changedetectionio import __version__
+
+    application = datastore.data['settings']['application']
+    config = {
+        'version': __version__,
+        'watch': {k: v for k, v in watch.items() if k not in WATCH_STATE_FIELDS},
+        'tags': datastore.get_all_tags_for_watch(uuid=watch.get('uuid')),
+        'settings': {k: application.get(k) for k in PROCESSING_APPLICATION_SETTINGS},
+    }
+    return json.dumps(config, sort_keys=True, default=str)
@@ -0,0 +1,214 @@
+"""
+Runs the post-fetch processing stage (run_changedetection) away from the async workers' event loop.
+
+The fetch is async, but the processing (HTML parsing, text extraction, jq/jsonpath, regex, diffing) is plain CPU work,
+run on the event loop thread it stalls every other worker coroutine while one large page is processed.
+
+- By default the processing runs on a thread, so the event loop keeps serving the other workers
+- With PROCESSOR_POOL_WORKERS set it runs in a pool of worker processes, so processing scales across CPU cores
+
+For the process pool only what the processor reads is sent, the fetched content (and raw bytes) go through a temporary
+file when they are larger than PROCESSOR_POOL_INLINE_BYTES, the screenshot and xpath data stay in this process.
+
+Configuration (environment)
+- PROCESSOR_POOL_WORKERS              Number of worker processes, 0 = process on a thread instead, default 0
+- PROCESSOR_POOL_MAX_TASKS_PER_CHILD  Replace a worker process after this many checks (0 = never), default 0
+- PROCESSOR_POOL_INLINE_BYTES         Fetched content larger than this goes through a temporary file, default 65536
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from loguru import logger
+
+from changedetectionio.effective_config import EffectiveWatchConfig
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """The shared processing pool, None when PROCESSOR_POOL_WORKERS is not set"""
+    global _pool
+    workers = int(os.getenv('PROCESSOR_POOL_WORKERS', 0))
+    if workers <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            max_tasks_per_child = int(os.getenv('PROCESSOR_POOL_MAX_TASKS_PER_CHILD', 0)) or None
+            # 'spawn', forking the app with its running threads and event loops is not safe
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        max_tasks_per_child=max_tasks_per_child)
+            logger.info(f"Started processing pool with {workers} worker processes")
+        return _pool
+
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+class ProcessingDatastore:
+    """
+    The part of the datastore a processor reads while processing one watch, the global settings, the watch and its
+    tags, small enough to send along with every check.
+    """
+
+    def __init__(self, datastore, watch):
+        uuid = watch.get('uuid')
+        settings = datastore.data['settings']
+        application = {k: v for k, v in settings['application'].items() if k != 'tags'}
+        application['tags'] = datastore.get_all_tags_for_watch(uuid=uuid)
+
+        self.datastore_path = datastore.datastore_path
+        self.data = {
+            'settings': {'application': application, 'headers': settings['headers'], 'requests': settings['requests']},
+            'watching': {uuid: watch},
+        }
+        self._effective_config = EffectiveWatchConfig(application['tags'])
+
+    def get_effective_config_for_watch(self, uuid):
+        if self.data['watching'].get(uuid):
+            return self._effective_config
+        return EffectiveWatchConfig({})
+
+    def get_all_tags_for_watch(self, uuid):
+        return self.get_effective_config_for_watch(uuid).tags
+
+    def get_tag_overrides_for_watch(self, uuid, attr):
+        return self.get_effective_config_for_watch(uuid).tag_overrides(attr)
+
+
+class _Payload:
+    """Large fetched content goes through a temporary file instead of the pool's pipe"""
+
+    def __init__(self, value, inline_bytes):
+        self.value = value
+        self.path = None
+        if value is not None and len(value) > inline_bytes:
+            with tempfile.NamedTemporaryFile(prefix='cdio-processing-', delete=False) as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                self.path = f.name
+            self.value = None
+
+    def take(self):
+        if self.path:
+            with open(self.path, 'rb') as f:
+                self.value = pickle.load(f)
+            self.discard()
+        return self.value
+
+    def discard(self):
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+class _RaisedException:
+    """
+    Exceptions are sent back by class and attributes, not all of them can be pickled the usual way
+    (their __init__ does not take their own .args)
+    """
+
+    def __init__(self, e):
+        self.cls = type(e)
+        self.args = e.args
+        self.attrs = dict(e.__dict__)
+
+    def rebuild(self):
+        e = self.cls.__new__(self.cls)
+        e.args = self.args
+        e.__dict__.update(self.attrs)
+        return e
+
+
+class ProcessingJob:
+    def __init__(self, update_handler, watch):
+        inline_bytes = int(os.getenv('PROCESSOR_POOL_INLINE_BYTES', 65536))
+        fetcher = update_handler.fetcher
+
+        self.processor_module = type(update_handler).__module__
+        self.processor_class = type(update_handler).__name__
+        self.datastore = ProcessingDatastore(update_handler.datastore, watch)
+        self.watch = watch
+        self.content = _Payload(fetcher.content, inline_bytes)
+        self.raw_content = _Payload(getattr(fetcher, 'raw_content', None), inline_bytes)
+        self.headers = dict(fetcher.headers or {})
+        self.status_code = fetcher.get_last_status_code()
+        self.instock_data = fetcher.instock_data
+
+    def discard(self):
+        self.content.discard()
+        self.raw_content.discard()
+
+
+def _run_job(job):
+    """Runs in the worker process, returns (result tuple or _RaisedException, processed content payload, stage timings)"""
+    processor_module = importlib.import_module(job.processor_module)
+    update_handler = getattr(processor_module, job.processor_class)(datastore=job.datastore, watch_uuid=job.watch.get('uuid'))
+
+    fetcher = update_handler.fetcher
+    fetcher.content = job.content.take()
+    fetcher.raw_content = job.raw_content.take()
+    fetcher.headers = job.headers
+    fetcher.status_code = job.status_code
+    fetcher.instock_data = job.instock_data
+    original_content = fetcher.content
+
+    try:
+        result = update_handler.run_changedetection(watch=job.watch)
+    except Exception as e:
+        result = _RaisedException(e)
+
+    # Processors can rewrite the content (PDF to HTML, RSS CDATA etc), the worker stores the processed version
+    content = None if fetcher.content is original_content else _Payload(fetcher.content, int(os.getenv('PROCESSOR_POOL_INLINE_BYTES', 65536)))
+    return result, content, update_handler.stage_timings
+
+
+async def run_changedetection(update_handler, watch):
+    """
+    update_handler.run_changedetection(watch=watch) without blocking the event loop.
+
+    Exceptions from the processor are raised here the same as calling it directly, screenshot and xpath data
+    are filled in from this process, the stage timings are copied back to update_handler.stage_timings.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    if not pool:
+        return await loop.run_in_executor(None, lambda: update_handler.run_changedetection(watch=watch))
+
+    fetcher = update_handler.fetcher
+    update_handler.screenshot = fetcher.screenshot
+    update_handler.xpath_data = fetcher.xpath_data
+
+    job = ProcessingJob(update_handler, watch)
+    try:
+        result, content, update_handler.stage_timings = await asyncio.wrap_future(pool.submit(_run_job, job))
+    finally:
+        job.discard()
+
+    if content is not None:
+        fetcher.content = content.take()
+
+    if isinstance(result, _RaisedException):
+        e = result.rebuild()
+        for attr in ('screenshot', 'xpath_data'):
+            if hasattr(e, attr) and not getattr(e, attr):
+                setattr(e, attr, getattr(fetcher, attr))
+        raise e
+
+    return result
@@ -1,8 +1,13 @@
 from .. import difference_detection_processor
+from ... import metrics
 from ..exceptions import ProcessorException
 from . import Restock
 from loguru import logger
 
+from collections import OrderedDict
+import json
+import re
+import threading
 import urllib3
 import time
 
@@ -50,39 +55,129 @@ def _deduplicate_prices(data):
     return list(unique_data)
 
 
+# Cheap lower-case markers, a syntax is only handed to extruct when one of its markers is in the HTML
+STRUCTURED_DATA_MARKERS = {
+    'dublincore': ('"dc.', '"dcterms.'),
+    'json-ld': ('application/ld+json',),
+    'microdata': ('itemprop', 'itemscope'),
+    'microformat': ('h-product', 'hproduct', 'p-price'),
+    'opengraph': ('og:', 'product:'),
+}
+
+JSON_LD_SCRIPT_RE = re.compile(r'<script[^>]*?type\s*=\s*["\']?application/ld\+json[^>]*>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+# Same clean-up as extruct does when the JSON-LD does not decode
+HTML_OR_JS_COMMENTLINE_RE = re.compile(r"^\s*(//.*|<!--.*-->)", re.MULTILINE)
+
+# Hostname -> strategy, remembers which sites have JSON-LD that only extruct can read so they skip the fast path
+MAX_SITE_STRATEGIES = 5000
+_site_strategies = OrderedDict()
+_site_strategies_lock = threading.Lock()
+
+_jsonpath_expressions = {}
+
+
+def _jsonpath(expression):
+    # Building the jsonpath parser is slow, only do it once per expression
+    from jsonpath_ng import parse
+    if expression not in _jsonpath_expressions:
+        _jsonpath_expressions[expression] = parse(expression)
+    return _jsonpath_expressions[expression]
+
+
+def _site_key(url):
+    from urllib.parse import urlparse
+    return urlparse(url).hostname if url else None
+
+
+def _get_site_strategy(site):
+    with _site_strategies_lock:
+        return dict(_site_strategies.get(site, {}))
+
+
+def _set_site_strategy(site, **kwargs):
+    if not site:
+        return
+    with _site_strategies_lock:
+        _site_strategies.setdefault(site, {}).update(kwargs)
+        _site_strategies.move_to_end(site)
+        while len(_site_strategies) > MAX_SITE_STRATEGIES:
+            _site_strategies.popitem(last=False)
+
+
+def detect_structured_data_syntaxes(html_content):
+    """Which structured data syntaxes could be in the HTML, found with plain sub-string searches"""
+    lower = html_content.lower()
+    return [syntax for syntax, markers in STRUCTURED_DATA_MARKERS.items() if any(marker in lower for marker in markers)]
+
+
+def extract_json_ld(html_content):
+    """
+    JSON-LD items straight from the <script> blocks without building a document tree, the same items as extruct gives.
+    Raises ValueError when a block can not be decoded.
+    """
+    items = []
+    for script in JSON_LD_SCRIPT_RE.findall(html_content):
+        try:
+            data = json.loads(script, strict=False)
+        except ValueError:
+            import jstyleson
+            data = jstyleson.loads(HTML_OR_JS_COMMENTLINE_RE.sub("", script), strict=False)
+        if isinstance(data, list):
+            items.extend(item for item in data if item)
+        elif isinstance(data, dict) and data:
+            items.append(data)
+    return items
+
+
+def extract_structured_data(html_content, url=None):
+    """
+    The same dict as extruct.extract() would return for the syntaxes we use, but only the syntaxes that are present are
+    parsed and JSON-LD is decoded directly, so a page with only JSON-LD never builds an lxml tree.
+    """
+    syntaxes = detect_structured_data_syntaxes(html_content)
+    data = {}
+    site = _site_key(url)
+
+    if 'json-ld' in syntaxes and not _get_site_strategy(site).get('json_ld_needs_extruct'):
+        try:
+            data['json-ld'] = extract_json_ld(html_content)
+            syntaxes.remove('json-ld')
+        except Exception as e:
+            logger.debug(f"Direct JSON-LD decode failed ({str(e)}), using extruct for JSON-LD from '{site}' from now on")
+            _set_site_strategy(site, json_ld_needs_extruct=True)
+
+    if syntaxes:
+        import extruct
+        data.update(extruct.extract(html_content, syntaxes=syntaxes))
+
+    return data
+
+
 # should return Restock()
 # add casting?
-def get_itemprop_availability(html_content) -> Restock:
+def get_itemprop_availability(html_content, url=None) -> Restock:
     """
     Kind of funny/cool way to find price/availability in one many different possibilities.
-    Use 'extruct' to find any possible RDFa/microdata/json-ld data, make a JSON string from the output then search it.
+    Find any possible microdata/json-ld/opengraph data (only the syntaxes that are actually in the page), then search it.
     """
-    from jsonpath_ng import parse
-
-    import re
     now = time.time()
-    import extruct
-    logger.trace(f"Imported extruct module in {time.time() - now:.3f}s")
 
-    now = time.time()
-
-    # Extruct is very slow, I'm wondering if some ML is going to be faster (800ms on my i7), 'rdfa' seems to be the heaviest.
-    syntaxes = ['dublincore', 'json-ld', 'microdata', 'microformat', 'opengraph']
+    # Extruct is very slow, I'm wondering if some ML is going to be faster (800ms on my i7), so only what's needed is parsed
     try:
-        data = extruct.extract(html_content, syntaxes=syntaxes)
+        data = extract_structured_data(html_content, url=url)
     except Exception as e:
         logger.warning(f"Unable to extract data, document parsing with extruct failed with {type(e).__name__} - {str(e)}")
         return Restock()
 
-    logger.trace(f"Extruct basic extract of all metadata done in {time.time() - now:.3f}s")
+    logger.trace(f"Basic extract of all metadata ({', '.join(data.keys()) or 'none found'}) done in {time.time() - now:.3f}s")
 
     # First phase, dead simple scanning of anything that looks useful
     value = Restock()
-    if data:
+    if any(data.values()):
         logger.debug("Using jsonpath to find price/availability/etc")
-        price_parse = parse('$..(price|Price)')
-        pricecurrency_parse = parse('$..(pricecurrency|currency|priceCurrency )')
-        availability_parse = parse('$..(availability|Availability)')
+        price_parse = _jsonpath('$..(price|Price)')
+        pricecurrency_parse = _jsonpath('$..(pricecurrency|currency|priceCurrency )')
+        availability_parse = _jsonpath('$..(availability|Availability)')
 
         price_result = _deduplicate_prices(price_parse.find(data))
         if price_result:
@@ -111,7 +206,7 @@ def get_itemprop_availability(html_content) -> Restock:
         # Second, go dig OpenGraph which is something that jsonpath_ng cant do because of the tuples and double-dots (:)
         if not value.get('price') or value.get('availability'):
             logger.debug("Alternatively digging through OpenGraph properties for restock/price info..")
-            jsonpath_expr = parse('$..properties')
+            jsonpath_expr = _jsonpath('$..properties')
 
             for match in jsonpath_expr.find(data):
                 if not value.get('price'):
@@ -120,7 +215,7 @@ def get_itemprop_availability(html_content) -> Restock:
                     value['availability'] = _search_prop_by_value([match.value], "product:availability")
                 if not value.get('currency'):
                     value['currency'] = _search_prop_by_value([match.value], "price:currency")
-    logger.trace(f"Processed with Extruct in {time.time()-now:.3f}s")
+    logger.trace(f"Processed structured data in {time.time()-now:.3f}s")
 
     return value
 
@@ -150,6 +245,8 @@ class perform_site_check(difference_detection_processor):
         if not watch:
             raise Exception("Watch no longer exists.")
 
+        self.stage_timings = metrics.StageTimings()
+
         # Unset any existing notification error
         update_obj = {'last_notification_error': False, 'last_error': False, 'restock':  Restock()}
 
@@ -164,6 +261,7 @@ class perform_site_check(difference_detection_processor):
         # Otherwise it will assume "in stock" because nothing suggesting the opposite was found
         from ...html_tools import html_to_text
         text = html_to_text(self.fetcher.content)
+        self.stage_timings.lap(metrics.STAGE_TEXT_EXTRACTION)
         logger.debug(f"Length of text after conversion: {len(text)}")
         if not len(text):
             from ...content_fetchers.exceptions import ReplyWithContentButNoText
@@ -188,7 +286,7 @@ class perform_site_check(difference_detection_processor):
 
         itemprop_availability = {}
         try:
-            itemprop_availability = get_itemprop_availability(self.fetcher.content)
+            itemprop_availability = get_itemprop_availability(self.fetcher.content, url=watch.get('url'))
         except MoreThanOnePriceFound as e:
             # Add the real data
             raise ProcessorException(message="Cannot run, more than one price detected, this plugin is only for product pages with ONE product, try the content-change detection mode.",
@@ -253,8 +351,11 @@ class perform_site_check(difference_detection_processor):
         price = update_obj.get('restock').get('price') if update_obj.get('restock').get('price') else ""
         snapshot_content = f"In Stock: {update_obj.get('restock').get('in_stock')} - Price: {price}"
 
+        self.stage_timings.lap(metrics.STAGE_FILTERS)
+
         # Main detection method
         fetched_md5 = hashlib.md5(snapshot_content.encode('utf-8')).hexdigest()
+        self.stage_timings.lap(metrics.STAGE_CHECKSUM)
 
         # The main thing that all this at the moment comes down to :)
         changed_detected = False
@@ -310,5 +411,6 @@ class perform_site_check(difference_detection_processor):
 
         # Always record the new checksum
         update_obj["previous_md5"] = fetched_md5
+        self.stage_timings.lap(metrics.STAGE_DIFF)
 
         return changed_detected, update_obj, snapshot_content.strip()
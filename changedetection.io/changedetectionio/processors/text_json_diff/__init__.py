@@ -72,6 +72,7 @@ def prepare_filter_prevew(datastore, watch_uuid, form_data):
                                                                  )
             # Use the last loaded HTML as the input
             update_handler.datastore = datastore
+            update_handler.skip_unchanged_content = False
             update_handler.fetcher.content = str(decompressed_data) # str() because playwright/puppeteer/requests return string
             update_handler.fetcher.headers['content-type'] = tmp_watch.get('content-type')
 
@@ -8,8 +8,10 @@ import urllib3
 
 from changedetectionio.conditions import execute_ruleset_against_all_plugins
 from changedetectionio.processors import difference_detection_processor
+from changedetectionio.processors.checksum import fast_hash, normalise_volatile_tokens, processing_config_fingerprint
+from changedetectionio.strtobool import strtobool
 from changedetectionio.html_tools import PERL_STYLE_REGEX, cdata_in_document_to_text, TRANSLATE_WHITESPACE_TABLE
-from changedetectionio import html_tools, content_fetchers
+from changedetectionio import html_tools, content_fetchers, metrics
 from changedetectionio.blueprint.price_data_follower import PRICE_DATA_TRACK_ACCEPT, PRICE_DATA_TRACK_REJECT
 from loguru import logger
 
@@ -36,6 +38,23 @@ class PDFToHTMLToolNotFound(ValueError):
 # (set_proxy_from_list)
 class perform_site_check(difference_detection_processor):
 
+    # Return early when the content and settings are the same as the last check (the preview always wants the text)
+    skip_unchanged_content = True
+
+    def content_checksum(self, watch):
+        """Checksum of the fetched content plus everything that decides how it is filtered"""
+        content = self.fetcher.content or ''
+        content_type = self.fetcher.get_all_headers().get('content-type', '').lower()
+
+        # Volatile tokens are only in the markup, which can reach the result with 'source:' or any include filter
+        # (//input[@name="csrf"]/@value, //img/@src, json etc), so only the plain page text is normalised
+        if strtobool(os.getenv('SKIP_UNCHANGED_NORMALISE_VOLATILE', 'True')) and 'html' in content_type and not watch.is_source_type_url:
+            include_filters = watch.get('include_filters', []) + self.datastore.get_tag_overrides_for_watch(uuid=watch.get('uuid'), attr='include_filters')
+            if not any(f.strip() for f in include_filters):
+                content = normalise_volatile_tokens(content)
+
+        return fast_hash(f"{content_type}\n{processing_config_fingerprint(watch, self.datastore)}\n{content}")
+
     def run_changedetection(self, watch):
         changed_detected = False
         html_content = ""
@@ -45,6 +64,8 @@ class perform_site_check(difference_detection_processor):
         if not watch:
             raise Exception("Watch no longer exists.")
 
+        self.stage_timings = timings = metrics.StageTimings()
+
         # Unset any existing notification error
         update_obj = {'last_notification_error': False, 'last_error': False}
 
@@ -56,9 +77,18 @@ class perform_site_check(difference_detection_processor):
         # Track the content type
         update_obj['content_type'] = self.fetcher.get_all_headers().get('content-type', '').lower()
 
-        # Watches added automatically in the queue manager will skip if its the same checksum as the previous run
+        # Same content and same settings as the last check will give the same filtered text, skip all the filters
         # Saves a lot of CPU
-        update_obj['previous_md5_before_filters'] = hashlib.md5(self.fetcher.content.encode('utf-8')).hexdigest()
+        # (Not with the added/removed/replaced filters, their text is a diff against the previous fetch)
+        content_checksum = self.content_checksum(watch)
+        update_obj['previous_md5_before_filters'] = content_checksum
+        timings.lap(metrics.STAGE_CHECKSUM)
+        if self.skip_unchanged_content and strtobool(os.getenv('SKIP_UNCHANGED_CONTENT', 'True')) \
+                and watch.history_n and watch.get('previous_md5') and not watch.has_special_diff_filter_options_set() \
+                and watch.get('previous_md5_before_filters') == content_checksum:
+            logger.debug(f"Watch UUID {watch.get('uuid')} content and settings unchanged since the last check, skipping filters")
+            update_obj["last_check_status"] = self.fetcher.get_last_status_code()
+            return False, update_obj, b''
 
         # Fetching complete, now filters
 
@@ -194,14 +224,18 @@ class perform_site_check(difference_detection_processor):
                     stripped_text_from_html = html_content
                 else:
                     # extract text
+                    timings.lap(metrics.STAGE_FILTERS)
                     do_anchor = self.datastore.data["settings"]["application"].get("render_anchor_tag_content", False)
                     stripped_text_from_html = html_tools.html_to_text(html_content=html_content,
                                                                       render_anchor_tag_content=do_anchor,
                                                                       is_rss=is_rss)  # 1874 activate the <title workaround hack
+                    timings.lap(metrics.STAGE_TEXT_EXTRACTION)
 
         if watch.get('trim_text_whitespace'):
             stripped_text_from_html = '\n'.join(line.strip() for line in stripped_text_from_html.replace("\n\n", "\n").splitlines())
 
+        timings.lap(metrics.STAGE_FILTERS)
+
         # Re #340 - return the content before the 'ignore text' was applied
         # Also used to calculate/show what was removed
         text_content_before_ignored_filter = stripped_text_from_html
@@ -223,6 +257,7 @@ class perform_site_check(difference_detection_processor):
                                              include_replaced=watch.get('filter_text_replaced', True),
                                              line_feed_sep="\n",
                                              include_change_type_prefix=False)
+            timings.lap(metrics.STAGE_DIFF)
 
             watch.save_last_text_fetched_before_filters(text_content_before_ignored_filter.encode('utf-8'))
 
@@ -294,6 +329,8 @@ class perform_site_check(difference_detection_processor):
             stripped_text_from_html = stripped_text_from_html.replace("\n\n", "\n")
             stripped_text_from_html = '\n'.join(sorted(stripped_text_from_html.splitlines(), key=lambda x: x.lower()))
 
+        timings.lap(metrics.STAGE_FILTERS)
+
 ### CALCULATE MD5
         # If there's text to ignore
         text_to_ignore = watch.get('ignore_text', []) + self.datastore.data['settings']['application'].get('global_ignore_text', [])
@@ -308,6 +345,7 @@ class perform_site_check(difference_detection_processor):
             fetched_md5 = hashlib.md5(text_for_checksuming.translate(TRANSLATE_WHITESPACE_TABLE).encode('utf-8')).hexdigest()
         else:
             fetched_md5 = hashlib.md5(text_for_checksuming.encode('utf-8')).hexdigest()
+        timings.lap(metrics.STAGE_CHECKSUM)
 
         ############ Blocking rules, after checksum #################
         blocked = False
@@ -349,6 +387,8 @@ class perform_site_check(difference_detection_processor):
                 # Conditions say "Condition not met" so we block it.
                 blocked = True
 
+        timings.lap(metrics.STAGE_FILTERS)
+
         # Looks like something changed, but did it match all the rules?
         if blocked:
             changed_detected = False
@@ -381,6 +421,7 @@ class perform_site_check(difference_detection_processor):
                     changed_detected = False
                 else:
                     logger.debug(f"check_unique_lines: UUID {watch.get('uuid')} had unique content")
+            timings.lap(metrics.STAGE_DIFF)
 
 
         # stripped_text_from_html - Everything after filters and NO 'ignored' content
@@ -1,3 +1,4 @@
+import time
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -8,3 +9,5 @@ from typing import Any
 class PrioritizedItem:
     priority: int
     item: Any=field(compare=False)
+    # For the queue wait time metric
+    queued_at: float=field(default_factory=time.monotonic, compare=False)
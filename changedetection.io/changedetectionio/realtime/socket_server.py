@@ -34,8 +34,14 @@ class SignalHandler:
         notification_event_signal.connect(self.handle_notification_event, weak=False)
         logger.info("SignalHandler: Connected to notification_event signal")
 
-        # Create and start the queue update thread using standard threading
+        # Watch updates are coalesced and emitted as deltas by the batcher thread
         import threading
+        self.batcher = WatchUpdateBatcher(socketio_instance, datastore)
+        self.batcher_thread = threading.Thread(target=self.batcher.run, daemon=True)
+        self.batcher_thread.start()
+        self.socketio_instance.batcher_thread = self.batcher_thread
+
+        # Create and start the queue update thread using standard threading
         self.polling_emitter_thread = threading.Thread(
             target=self.polling_emit_running_or_queued_watches_threaded, 
             daemon=True
@@ -50,28 +56,19 @@ class SignalHandler:
         logger.trace(f"SignalHandler: Signal received with {len(args)} args and {len(kwargs)} kwargs")
         # Safely extract the watch UUID from kwargs
         watch_uuid = kwargs.get('watch_uuid')
-        app_context = kwargs.get('app_context')
 
         if watch_uuid:
-            # Get the watch object from the datastore
-            watch = self.datastore.data['watching'].get(watch_uuid)
-            if watch:
-                if app_context:
-                    # note
-                    with app_context.app_context():
-                        with app_context.test_request_context():
-                            # Forward to handle_watch_update with the watch parameter
-                            handle_watch_update(self.socketio_instance, watch=watch, datastore=self.datastore)
-                else:
-                    handle_watch_update(self.socketio_instance, watch=watch, datastore=self.datastore)
-
-                logger.trace(f"Signal handler processed watch UUID {watch_uuid}")
+            if self.datastore.data['watching'].get(watch_uuid):
+                # Don't build the payload here, the batcher collapses bursts of signals for the same watch into one emit
+                self.batcher.mark_dirty(watch_uuid)
+                logger.trace(f"Signal handler queued watch UUID {watch_uuid} for the next batch")
             else:
                 logger.warning(f"Watch UUID {watch_uuid} not found in datastore")
 
     def handle_deleted_signal(self, *args, **kwargs):
         watch_uuid = kwargs.get('watch_uuid')
         if watch_uuid:
+            self.batcher.forget(watch_uuid)
             # Emit the queue size to all connected clients
             self.socketio_instance.emit("watch_deleted", {
                 "uuid": watch_uuid,
@@ -159,20 +156,17 @@ class SignalHandler:
                 
                 # Update tracking for next iteration
                 previous_running_uuids = running_uuids
-                
-                # Sleep between polling cycles, but check exit flag every 0.5 seconds for fast shutdown
-                for _ in range(20):  # 20 * 0.5 = 10 seconds total
-                    if exit_event.is_set():
-                        break
-                    time.sleep(0.5)
-                
+
+                # The aggregate counters are maintained incrementally, re-count now and then in case something
+                # changed a watch without sending a signal
+                self.batcher.resync_counters()
+
+                # Sleep between polling cycles, wait() returns straight away when shutdown is requested
+                exit_event.wait(10)
+
             except Exception as e:
                 logger.error(f"Error in threading polling: {str(e)}")
-                # Even during error recovery, check for exit quickly
-                for _ in range(1):  # 1 * 0.5 = 0.5 seconds
-                    if exit_event.is_set():
-                        break
-                    time.sleep(0.5)
+                exit_event.wait(0.5)
         
         # Check if we're in pytest environment - if so, be more gentle with logging
         import sys
@@ -182,69 +176,188 @@ class SignalHandler:
             logger.info("Queue update thread stopped (threading mode)")
 
 
-def handle_watch_update(socketio, **kwargs):
-    """Handle watch update signal from blinker"""
-    try:
-        watch = kwargs.get('watch')
-        datastore = kwargs.get('datastore')
+def build_watch_data(watch, running_uuids, queued_uuids):
+    """Build the full set of client-facing fields for a watch"""
+    from changedetectionio.flask_app import _jinja2_filter_datetime
+
+    # Get the error texts from the watch
+    error_texts = watch.compile_error_texts()
+
+    return {
+        'checking_now': True if watch.get('uuid') in running_uuids else False,
+        'fetch_time': watch.get('fetch_time'),
+        'has_error': True if error_texts else False,
+        'last_changed': watch.get('last_changed'),
+        'last_checked': watch.get('last_checked'),
+        'error_text': error_texts,
+        'history_n': watch.history_n,
+        'last_checked_text': _jinja2_filter_datetime(watch),
+        'last_changed_text': timeago.format(int(watch.last_changed), time.time()) if watch.history_n >= 2 and int(watch.last_changed) > 0 else 'Not yet',
+        'queued': True if watch.get('uuid') in queued_uuids else False,
+        'paused': True if watch.get('paused') else False,
+        'notification_muted': True if watch.get('notification_muted') else False,
+        'unviewed': watch.has_unviewed,
+        'uuid': watch.get('uuid'),
+    }
+
+
+class WatchUpdateBatcher:
+    """
+    Coalesces watch update signals and emits compact 'watch_update' events.
+
+    Signals only mark a watch as dirty, every SOCKETIO_BATCH_INTERVAL_MS the dirty watches are rendered once and
+    only the fields that changed since the last emit for that watch are sent (plus 'uuid' and 'event_timestamp').
+    'general_stats' is kept up to date from per-watch state instead of scanning every watch, and is only included
+    when it changed.
+
+    A client that connects later starts from the rows of the page the server rendered for it, which are at least as
+    fresh as the last emit, so it is only sent the current 'general_stats' from emit_general_stats().
+    """
+
+    def __init__(self, socketio_instance, datastore, interval_ms=None):
+        import threading
+        self.socketio_instance = socketio_instance
+        self.datastore = datastore
+        if interval_ms is None:
+            interval_ms = int(os.getenv('SOCKETIO_BATCH_INTERVAL_MS', 250))
+        self.interval = max(interval_ms, 0) / 1000
+
+        self.lock = threading.Lock()
+        self.dirty_event = threading.Event()
+        self.dirty_uuids = set()
+
+        # Last emitted fields per watch UUID
+        self.last_sent = {}
+        self.errored_uuids = set()
+        self.unviewed_uuids = set()
+        self.last_general_stats = None
+        self.resync_counters()
+
+    def mark_dirty(self, uuid):
+        with self.lock:
+            self.dirty_uuids.add(uuid)
+        self.dirty_event.set()
+
+    def forget(self, uuid):
+        """Drop all state for a deleted watch, the next emit will carry the new counters"""
+        with self.lock:
+            self.dirty_uuids.discard(uuid)
+            self.last_sent.pop(uuid, None)
+            self.errored_uuids.discard(uuid)
+            self.unviewed_uuids.discard(uuid)
+
+    def _update_counters(self, uuid, watch):
+        if watch.get('last_error'):
+            self.errored_uuids.add(uuid)
+        else:
+            self.errored_uuids.discard(uuid)
+
+        if watch.has_unviewed:
+            self.unviewed_uuids.add(uuid)
+        else:
+            self.unviewed_uuids.discard(uuid)
+
+    def resync_counters(self):
+        """Re-count the aggregates from scratch, O(watches) so only called from the slow polling loop"""
+        errored = set()
+        unviewed = set()
+        for uuid, watch in list(self.datastore.data['watching'].items()):
+            if watch.get('last_error'):
+                errored.add(uuid)
+            if watch.has_unviewed:
+                unviewed.add(uuid)
+
+        with self.lock:
+            self.errored_uuids = errored
+            self.unviewed_uuids = unviewed
+
+    def general_stats(self):
+        return {
+            'count_errors': len(self.errored_uuids),
+            'has_unviewed': bool(self.unviewed_uuids)
+        }
+
+    def emit_general_stats(self, to):
+        """Send the current counters to a newly connected client, O(1) however many watches there are"""
+        with self.lock:
+            general_stats = self.general_stats()
+        self.socketio_instance.emit("general_stats", general_stats, room=to)
 
-        # Emit the watch update to all connected clients
+    def flush(self):
+        """Emit deltas for all dirty watches, returns the number of events emitted"""
         from changedetectionio.flask_app import update_q
-        from changedetectionio.flask_app import _jinja2_filter_datetime
         from changedetectionio import worker_handler
 
-        # Get list of watches that are currently running
-        running_uuids = worker_handler.get_running_uuids()
-
-        # Get list of watches in the queue
-        queue_list = []
-        for q_item in update_q.queue:
-            if hasattr(q_item, 'item') and 'uuid' in q_item.item:
-                queue_list.append(q_item.item['uuid'])
-
-        # Get the error texts from the watch
-        error_texts = watch.compile_error_texts()
-        # Create a simplified watch data object to send to clients
-
-        watch_data = {
-            'checking_now': True if watch.get('uuid') in running_uuids else False,
-            'fetch_time': watch.get('fetch_time'),
-            'has_error': True if error_texts else False,
-            'last_changed': watch.get('last_changed'),
-            'last_checked': watch.get('last_checked'),
-            'error_text': error_texts,
-            'history_n': watch.history_n,
-            'last_checked_text': _jinja2_filter_datetime(watch),
-            'last_changed_text': timeago.format(int(watch.last_changed), time.time()) if watch.history_n >= 2 and int(watch.last_changed) > 0 else 'Not yet',
-            'queued': True if watch.get('uuid') in queue_list else False,
-            'paused': True if watch.get('paused') else False,
-            'notification_muted': True if watch.get('notification_muted') else False,
-            'unviewed': watch.has_unviewed,
-            'uuid': watch.get('uuid'),
-            'event_timestamp': time.time()
-        }
+        with self.lock:
+            dirty = self.dirty_uuids
+            self.dirty_uuids = set()
 
-        errored_count = 0
-        for watch_uuid_iter, watch_iter in datastore.data['watching'].items():
-            if watch_iter.get('last_error'):
-                errored_count += 1
-
-        general_stats = {
-            'count_errors': errored_count,
-            'has_unviewed': datastore.has_unviewed
-        }
+        if not dirty:
+            return 0
 
-        # Debug what's being emitted
-        # logger.debug(f"Emitting 'watch_update' event for {watch.get('uuid')}, data: {watch_data}")
+        # Looked up once per batch rather than once per signal
+        running_uuids = set(worker_handler.get_running_uuids())
+        queued_uuids = update_q.queued_uuids()
 
-        # Emit to all clients (no 'broadcast' parameter needed - it's the default behavior)
-        socketio.emit("watch_update", {'watch': watch_data, 'general_stats': general_stats})
+        deltas = []
+        for uuid in dirty:
+            watch = self.datastore.data['watching'].get(uuid)
+            if not watch:
+                continue
+            try:
+                watch_data = build_watch_data(watch, running_uuids, queued_uuids)
+            except Exception as e:
+                logger.error(f"Socket.IO error building update for watch {uuid}: {str(e)}")
+                continue
+
+            with self.lock:
+                self._update_counters(uuid, watch)
+                previous = self.last_sent.get(uuid, {})
+                delta = {k: v for k, v in watch_data.items() if k not in previous or previous[k] != v}
+                self.last_sent[uuid] = watch_data
+
+            if delta:
+                delta['uuid'] = uuid
+                deltas.append(delta)
+
+        general_stats = self.general_stats()
+        stats_changed = general_stats != self.last_general_stats
+        self.last_general_stats = general_stats
+
+        emitted = 0
+        for delta in deltas:
+            delta['event_timestamp'] = time.time()
+            payload = {'watch': delta}
+            # Only the first event of the batch needs to carry the new counters
+            if stats_changed and not emitted:
+                payload['general_stats'] = general_stats
+            self.socketio_instance.emit("watch_update", payload)
+            emitted += 1
+            logger.trace(f"Socket.IO: Emitted update for watch {delta['uuid']}, fields: {list(delta.keys())}")
+
+        return emitted
+
+    def run(self):
+        """Batcher thread, sleeps until something is dirty then waits out the batch interval and flushes"""
+        from changedetectionio.flask_app import app
+        import threading
 
-        # Log after successful emit - use watch_data['uuid'] to avoid variable shadowing issues
-        logger.trace(f"Socket.IO: Emitted update for watch {watch_data['uuid']}, Checking now: {watch_data['checking_now']}")
+        exit_event = getattr(app.config, 'exit', threading.Event())
+        logger.info(f"Watch update batcher started ({self.interval * 1000:.0f}ms interval)")
 
-    except Exception as e:
-        logger.error(f"Socket.IO error in handle_watch_update: {str(e)}")
+        while not exit_event.is_set():
+            if not self.dirty_event.wait(timeout=1.0):
+                continue
+            # Let the burst collect
+            exit_event.wait(self.interval)
+            self.dirty_event.clear()
+            try:
+                # url_for() in the error texts needs a request context
+                with app.app_context():
+                    with app.test_request_context():
+                        self.flush()
+            except Exception as e:
+                logger.error(f"Socket.IO error in watch update batcher: {str(e)}")
 
 
 def init_socketio(app, datastore):
@@ -335,6 +448,12 @@ def init_socketio(app, datastore):
             logger.warning("Socket.IO: Rejecting unauthenticated connection")
             return False  # Reject the connection
 
+        # The watch rows come from the server rendered page, the counters may have changed since it was rendered
+        try:
+            signal_handler.batcher.emit_general_stats(to=request.sid)
+        except Exception as e:
+            logger.error(f"Socket.IO error sending the general stats: {str(e)}")
+
         # Send the current queue size to the newly connected client
         try:
             queue_size = update_q.qsize()
@@ -372,6 +491,9 @@ def init_socketio(app, datastore):
         try:
             logger.info("Socket.IO: Fast shutdown initiated...")
 
+            if hasattr(socketio, 'batcher_thread') and socketio.batcher_thread.is_alive():
+                socketio.batcher_thread.join(timeout=1.0)
+
             # For threading mode, give the thread a very short time to exit gracefully
             if hasattr(socketio, 'polling_emitter_thread'):
                 if socketio.polling_emitter_thread.is_alive():
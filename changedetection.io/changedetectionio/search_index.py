@@ -0,0 +1,420 @@
+import base64
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+# Watch fields that can be searched, everything is matched lower-case
+SEARCH_INDEXED_FIELDS = ('url', 'title', 'last_error')
+
+# Watch fields that the sort keys are built from, 'last_changed' is derived from the history and signalled by the model
+SORT_INDEXED_FIELDS = ('date_created', 'last_checked', 'title', 'url')
+
+# Any write to these fields should refresh the datastore indexes
+WATCH_INDEXED_FIELDS = tuple(set(SEARCH_INDEXED_FIELDS + SORT_INDEXED_FIELDS))
+
+# Same names as the watch overview sort links, 'title' is accepted as an alias of 'label'
+SORT_ATTRIBUTES = ('date_created', 'label', 'last_changed', 'last_checked')
+# Internal attribute, the order watches were added (same as the datastore order)
+SORT_INSERTION_ORDER = 'insertion'
+
+SEARCH_MODE_EXACT = 'exact'
+SEARCH_MODE_PREFIX = 'prefix'
+SEARCH_MODE_PARTIAL = 'partial'
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _LockedIndex:
+    """The datastore is sometimes pickled into a worker process (preview rendering etc), the lock can not be"""
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+
+class WatchSearchIndex(_LockedIndex):
+    """
+    In-memory index of the searchable watch text (URL, title and last error).
+
+    - Exact matches are a single dict lookup of the lower-cased field value
+    - Prefix and partial (sub-string) matches intersect the trigram posting lists of the query to find the candidate
+      watches, only the candidates are then compared against the query
+
+    So the cost of a search depends on the number of candidates, not on the number of watches.
+    Queries shorter than 3 characters have no trigram and fall back to checking every indexed watch.
+
+    Results are always returned in the order the watches were added to the index (the same order as the datastore).
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._seq = 0
+        # uuid -> (insertion sequence, {field: lower-cased value})
+        self._docs = {}
+        # lower-cased value -> set of uuids
+        self._exact = defaultdict(set)
+        # trigram -> set of uuids
+        self._trigrams = defaultdict(set)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, uuid):
+        return uuid in self._docs
+
+    @staticmethod
+    def _fields_for_watch(watch):
+        fields = {}
+        for field in SEARCH_INDEXED_FIELDS:
+            value = watch.get(field)
+            # last_error is False when there is no error, title can be None
+            if value and isinstance(value, str):
+                fields[field] = value.lower()
+        return fields
+
+    def _unindex(self, uuid, fields):
+        for value in fields.values():
+            postings = self._exact.get(value)
+            if postings is not None:
+                postings.discard(uuid)
+                if not postings:
+                    del self._exact[value]
+
+        for trigram in set().union(*(_trigrams(value) for value in fields.values())):
+            postings = self._trigrams.get(trigram)
+            if postings is not None:
+                postings.discard(uuid)
+                if not postings:
+                    del self._trigrams[trigram]
+
+    def add(self, uuid, watch):
+        """Add or refresh a watch in the index, a no-op when none of the indexed fields changed"""
+        fields = self._fields_for_watch(watch)
+
+        with self.lock:
+            existing = self._docs.get(uuid)
+            if existing:
+                seq, old_fields = existing
+                if old_fields == fields:
+                    return
+                self._unindex(uuid, old_fields)
+            else:
+                seq = self._seq
+                self._seq += 1
+
+            self._docs[uuid] = (seq, fields)
+            for value in fields.values():
+                self._exact[value].add(uuid)
+                for trigram in _trigrams(value):
+                    self._trigrams[trigram].add(uuid)
+
+    def update(self, uuid, watch):
+        """Refresh a watch only if it is already indexed, used by the model change signal"""
+        with self.lock:
+            if uuid not in self._docs:
+                return
+            self.add(uuid, watch)
+
+    def remove(self, uuid):
+        with self.lock:
+            existing = self._docs.pop(uuid, None)
+            if existing:
+                self._unindex(uuid, existing[1])
+
+    def clear(self):
+        with self.lock:
+            self._docs = {}
+            self._exact = defaultdict(set)
+            self._trigrams = defaultdict(set)
+
+    def _candidates(self, query):
+        """uuids that contain every trigram of the query, None means 'could be anything'"""
+        trigrams = _trigrams(query)
+        if not trigrams:
+            return None
+
+        # Start from the rarest trigram so the intersection stays small
+        postings = sorted((self._trigrams.get(t, set()) for t in trigrams), key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            if not candidates:
+                break
+            candidates &= p
+        return candidates
+
+    def search(self, query, mode=SEARCH_MODE_EXACT):
+        """
+        Find watches where the URL, title or last error matches the query.
+
+        Args:
+            query (str): Text to search for, case-insensitive
+            mode (str): 'exact' (whole field value), 'prefix' (field starts with) or 'partial' (sub-string)
+
+        Returns:
+            list: UUIDs of the matching watches, in the order they were added
+        """
+        query = query.lower().strip()
+        if not query:
+            return []
+
+        with self.lock:
+            if mode == SEARCH_MODE_EXACT:
+                matches = set(self._exact.get(query, set()))
+            else:
+                candidates = self._candidates(query)
+                if candidates is None:
+                    candidates = self._docs.keys()
+
+                if mode == SEARCH_MODE_PREFIX:
+                    matches = {uuid for uuid in candidates if any(v.startswith(query) for v in self._docs[uuid][1].values())}
+                else:
+                    matches = {uuid for uuid in candidates if any(query in v for v in self._docs[uuid][1].values())}
+
+            return sorted(matches, key=lambda uuid: self._docs[uuid][0])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class StoredWatch:
+    """
+    The sort keys and history of a watch that is still the dict it was loaded from (LAZY_WATCH_LOAD), without
+    rehydrating it.
+
+    Same as Watch.model's label, last_changed, watch_data_dir and history, the last two are all the background
+    snapshot recompression needs.
+    """
+
+    def __init__(self, entity, watch_data_dir):
+        self._entity = entity
+        self._watch_data_dir = watch_data_dir
+
+    def get(self, key, default=None):
+        return self._entity.get(key, default)
+
+    @property
+    def watch_data_dir(self):
+        return self._watch_data_dir
+
+    @property
+    def history(self):
+        """{timestamp: snapshot path} from the watch's history.txt, read the same way as Watch.model.history"""
+        history = {}
+        fname = os.path.join(self._watch_data_dir, "history.txt")
+        if not os.path.isfile(fname):
+            return history
+
+        with open(fname, "r") as f:
+            for line in f:
+                if ',' in line:
+                    k, v = line.strip().split(',', 2)
+                    if not '/' in v and not '\'' in v:
+                        v = os.path.join(self._watch_data_dir, v)
+                    else:
+                        # A datadir moved on an older version, the snapshot may be in this watch's directory
+                        proposed_new_path = os.path.join(self._watch_data_dir, v.split('/')[-1])
+                        if not os.path.exists(v) and os.path.exists(proposed_new_path):
+                            v = proposed_new_path
+                    history[k] = v
+        return history
+
+    @property
+    def label(self):
+        return self._entity.get('title') if self._entity.get('title') else self._entity.get('url')
+
+    @property
+    def last_changed(self):
+        fname = os.path.join(self._watch_data_dir, "history.txt")
+        if not os.path.isfile(fname):
+            return 0
+
+        # Keyed like Watch.history, a repeated timestamp keeps its first position
+        keys = {}
+        with open(fname, "r") as f:
+            for line in f:
+                if ',' in line:
+                    keys[line.strip().split(',', 2)[0]] = None
+
+        # When we have just one snapshot, it should be 0
+        if len(keys) <= 1:
+            return 0
+        return int(next(reversed(keys)))
+
+
+class WatchSortIndex(_LockedIndex):
+    """
+    Keeps the watch UUIDs pre-sorted by each of SORT_ATTRIBUTES, so listing a page does not need to sort every watch.
+
+    Each attribute has a sorted list of (sort key, insertion sequence, uuid), a changed watch is moved with a bisect
+    instead of re-sorting. The insertion sequence breaks ties so the order (and cursors) are stable.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._seq = 0
+        # uuid -> {attribute: entry}
+        self._entries = {}
+        self._sorted = {attr: [] for attr in SORT_ATTRIBUTES + (SORT_INSERTION_ORDER,)}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, uuid):
+        return uuid in self._entries
+
+    @staticmethod
+    def _sort_keys(watch):
+        return {
+            'date_created': watch.get('date_created') or 0,
+            # Case-insensitive, like the Jinja2 sort filter
+            'label': (watch.label or '').lower(),
+            'last_changed': watch.last_changed,
+            'last_checked': watch.get('last_checked') or 0,
+            SORT_INSERTION_ORDER: 0,
+        }
+
+    def _remove_entries(self, entries):
+        for attr, entry in entries.items():
+            sorted_entries = self._sorted[attr]
+            i = bisect_left(sorted_entries, entry)
+            if i < len(sorted_entries) and sorted_entries[i] == entry:
+                del sorted_entries[i]
+
+    def add(self, uuid, watch):
+        """Add or re-position a watch, a no-op when none of the sort keys changed"""
+        keys = self._sort_keys(watch)
+
+        with self.lock:
+            existing = self._entries.get(uuid)
+            if existing:
+                seq = next(iter(existing.values()))[1]
+                if all(existing[attr][0] == key for attr, key in keys.items()):
+                    return
+                self._remove_entries(existing)
+            else:
+                seq = self._seq
+                self._seq += 1
+
+            entries = {attr: (key, seq, uuid) for attr, key in keys.items()}
+            for attr, entry in entries.items():
+                sorted_entries = self._sorted[attr]
+                sorted_entries.insert(bisect_right(sorted_entries, entry), entry)
+            self._entries[uuid] = entries
+
+    def update(self, uuid, watch):
+        """Refresh a watch only if it is already indexed, used by the model change signal"""
+        with self.lock:
+            if uuid not in self._entries:
+                return
+            self.add(uuid, watch)
+
+    def remove(self, uuid):
+        with self.lock:
+            existing = self._entries.pop(uuid, None)
+            if existing:
+                self._remove_entries(existing)
+
+    def clear(self):
+        with self.lock:
+            self._entries = {}
+            self._sorted = {attr: [] for attr in self._sorted.keys()}
+
+    @staticmethod
+    def normalise_attribute(attr):
+        if attr == 'title':
+            return 'label'
+        if attr in SORT_ATTRIBUTES:
+            return attr
+        return None
+
+    @staticmethod
+    def _iter_entries(sorted_entries, reverse, after=None):
+        """
+        Walk the entries in sort order, optionally starting after the (key, seq) position.
+
+        Descending order reverses the keys but keeps equal keys in insertion order, the same as a stable
+        sorted(reverse=True) which is what the watch overview always did.
+        """
+        def sort_key(e):
+            return e[0]
+
+        if not reverse:
+            i = bisect_right(sorted_entries, after, key=lambda e: (e[0], e[1])) if after else 0
+            yield from sorted_entries[i:]
+            return
+
+        if after:
+            key, seq = after
+            # The rest of the cursor's own group first
+            group_end = bisect_right(sorted_entries, key, key=sort_key)
+            yield from sorted_entries[bisect_right(sorted_entries, (key, seq), key=lambda e: (e[0], e[1])):group_end]
+            j = bisect_left(sorted_entries, key, key=sort_key) - 1
+        else:
+            j = len(sorted_entries) - 1
+
+        while j >= 0:
+            group_start = bisect_left(sorted_entries, sorted_entries[j][0], key=sort_key)
+            yield from sorted_entries[group_start:j + 1]
+            j = group_start - 1
+
+    def uuids(self, attr=SORT_INSERTION_ORDER, reverse=False):
+        """A snapshot list of every indexed UUID in sort order"""
+        with self.lock:
+            return [entry[2] for entry in self._iter_entries(self._sorted[attr], reverse)]
+
+    @staticmethod
+    def encode_cursor(attr, reverse, entry):
+        raw = json.dumps([attr, bool(reverse), entry[0], entry[1]]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor, attr, reverse):
+        try:
+            c_attr, c_reverse, key, seq = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except Exception:
+            raise InvalidCursor("Cursor could not be decoded")
+        if c_attr != attr or c_reverse != bool(reverse):
+            raise InvalidCursor("Cursor was created with a different sort order")
+        return key, seq
+
+    def page(self, attr=SORT_INSERTION_ORDER, reverse=False, limit=50, cursor=None, predicate=None):
+        """
+        One page of UUIDs in sort order, starting after the cursor.
+
+        Args:
+            attr (str): One of SORT_ATTRIBUTES or SORT_INSERTION_ORDER
+            reverse (bool): Descending order
+            limit (int): Page size
+            cursor (str, optional): The next_cursor returned by the previous page
+            predicate (callable, optional): Only UUIDs where predicate(uuid) is true are returned
+
+        Returns:
+            tuple: (list of UUIDs, next cursor or None when this was the last page)
+        """
+        results = []
+        last_entry = None
+        has_more = False
+
+        with self.lock:
+            after = self.decode_cursor(cursor, attr, reverse) if cursor else None
+            for entry in self._iter_entries(self._sorted[attr], reverse, after=after):
+                if predicate and not predicate(entry[2]):
+                    continue
+                if len(results) >= limit:
+                    has_more = True
+                    break
+                results.append(entry[2])
+                last_entry = entry
+
+        next_cursor = self.encode_cursor(attr, reverse, last_entry) if has_more and last_entry else None
+        return results, next_cursor
@@ -0,0 +1,88 @@
+"""
+Process-wide cache of decompressed history snapshots.
+
+A snapshot never changes once it is written, so the diff page, preview, notifications, RSS and the conditions plugins
+can all share the same decompressed text instead of each re-reading the history index, probing for the .br variant
+and brotli-decompressing the file again.
+
+Entries are keyed by (watch uuid, history timestamp) and the cache is bounded by the total size of the cached text,
+the least recently used snapshots are dropped first.
+
+Configuration (environment)
+- SNAPSHOT_CACHE_MAX_BYTES  Total size of the cached snapshot text, 0 disables the cache, default 67108864 (64MB)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class SnapshotCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_bytes=int(os.getenv('SNAPSHOT_CACHE_MAX_BYTES', 64 * 1024 * 1024)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, uuid, timestamp):
+        """The cached text or None"""
+        key = (uuid, str(timestamp))
+        with self.lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, uuid, timestamp, text):
+        size = len(text)
+        # Anything bigger than a quarter of the cache would just push everything else out
+        if not self.max_bytes or size > self.max_bytes // 4:
+            return
+
+        key = (uuid, str(timestamp))
+        with self.lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = text
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, dropped = self._entries.popitem(last=False)
+                self._bytes -= len(dropped)
+
+    def discard(self, uuid, timestamp=None):
+        """Forget one snapshot, or every snapshot of the watch"""
+        with self.lock:
+            if timestamp is not None:
+                keys = [(uuid, str(timestamp))]
+            else:
+                keys = [k for k in self._entries.keys() if k[0] == uuid]
+            for key in keys:
+                text = self._entries.pop(key, None)
+                if text is not None:
+                    self._bytes -= len(text)
+
+    def clear(self):
+        with self.lock:
+            self._entries = OrderedDict()
+            self._bytes = 0
+
+    def get_stats(self):
+        with self.lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+snapshot_cache = SnapshotCache.from_env()
@@ -107,47 +107,78 @@ $(document).ready(function () {
             // Listen for periodically emitted watch data
             console.log('Adding watch_update event listener');
 
+            // Tabs at bottom of list
+            function updateGeneralStats(general_stats) {
+                $('#post-list-mark-views').toggleClass("has-unviewed", general_stats.has_unviewed);
+                $('#post-list-with-errors').toggleClass("has-error", general_stats.count_errors !== 0)
+                $('#post-list-with-errors a').text(`With errors (${ general_stats.count_errors })`);
+            }
+
+            // Sent on connect, the watch_update events after it only carry changes
+            socket.on('general_stats', updateGeneralStats);
+
+            // watch_update only carries the fields that changed since the last update (plus uuid/event_timestamp),
+            // general_stats is only present when the counters changed
             socket.on('watch_update', function (data) {
                 const watch = data.watch;
                 const general_stats = data.general_stats;
 
-                // Log the entire watch object for debugging
-                console.log('!!! WATCH UPDATE EVENT RECEIVED !!!');
-                console.log(`${watch.event_timestamp} - Watch update ${watch.uuid} - Checking now - ${watch.checking_now} - UUID in URL ${window.location.href.includes(watch.uuid)}`);
-                console.log('Watch data:', watch);
-                console.log('General stats:', general_stats);
-                
+                console.log(`${watch.event_timestamp} - Watch update ${watch.uuid} - Changed fields`, Object.keys(watch));
+
                 // Updating watch table rows
                 const $watchRow = $('tr[data-watch-uuid="' + watch.uuid + '"]');
-                console.log('Found watch row elements:', $watchRow.length);
-                
+
                 if ($watchRow.length) {
-                    $($watchRow).toggleClass('checking-now', watch.checking_now);
-                    $($watchRow).toggleClass('queued', watch.queued);
-                    $($watchRow).toggleClass('unviewed', watch.unviewed);
-                    $($watchRow).toggleClass('has-error', watch.has_error);
-                    $($watchRow).toggleClass('notification_muted', watch.notification_muted);
-                    $($watchRow).toggleClass('paused', watch.paused);
-                    $($watchRow).toggleClass('single-history', watch.history_n === 1);
-                    $($watchRow).toggleClass('multiple-history', watch.history_n >= 2);
-
-                    $('td.title-col .error-text', $watchRow).html(watch.error_text)
-
-                    $('td.last-changed', $watchRow).text(watch.last_changed_text)
-
-                    $('td.last-checked .innertext', $watchRow).text(watch.last_checked_text)
-                    $('td.last-checked', $watchRow).data('timestamp', watch.last_checked).data('fetchduration', watch.fetch_time);
-                    $('td.last-checked', $watchRow).data('eta_complete', watch.last_checked + watch.fetch_time);
-                    
-                    console.log('Updated UI for watch:', watch.uuid);
+                    const classFields = {
+                        'checking_now': 'checking-now',
+                        'queued': 'queued',
+                        'unviewed': 'unviewed',
+                        'has_error': 'has-error',
+                        'notification_muted': 'notification_muted',
+                        'paused': 'paused'
+                    };
+                    for (const [field, className] of Object.entries(classFields)) {
+                        if (field in watch) {
+                            $watchRow.toggleClass(className, watch[field]);
+                        }
+                    }
+
+                    if ('history_n' in watch) {
+                        $watchRow.toggleClass('single-history', watch.history_n === 1);
+                        $watchRow.toggleClass('multiple-history', watch.history_n >= 2);
+                    }
+
+                    if ('error_text' in watch) {
+                        $('td.title-col .error-text', $watchRow).html(watch.error_text)
+                    }
+
+                    if ('last_changed_text' in watch) {
+                        $('td.last-changed', $watchRow).text(watch.last_changed_text)
+                    }
+
+                    if ('last_checked_text' in watch) {
+                        $('td.last-checked .innertext', $watchRow).text(watch.last_checked_text)
+                    }
+
+                    const $lastChecked = $('td.last-checked', $watchRow);
+                    if ('last_checked' in watch) {
+                        $lastChecked.data('timestamp', watch.last_checked);
+                    }
+                    if ('fetch_time' in watch) {
+                        $lastChecked.data('fetchduration', watch.fetch_time);
+                    }
+                    if ('last_checked' in watch || 'fetch_time' in watch) {
+                        $lastChecked.data('eta_complete', $lastChecked.data('timestamp') + $lastChecked.data('fetchduration'));
+                    }
                 }
 
-                // Tabs at bottom of list
-                $('#post-list-mark-views').toggleClass("has-unviewed", general_stats.has_unviewed);
-                $('#post-list-with-errors').toggleClass("has-error", general_stats.count_errors !== 0)
-                $('#post-list-with-errors a').text(`With errors (${ general_stats.count_errors })`);
+                if (general_stats) {
+                    updateGeneralStats(general_stats);
+                }
 
-                $('body').toggleClass('checking-now', watch.checking_now && window.location.href.includes(watch.uuid));
+                if ('checking_now' in watch) {
+                    $('body').toggleClass('checking-now', watch.checking_now && window.location.href.includes(watch.uuid));
+                }
             });
 
         } catch (e) {
@@ -0,0 +1,205 @@
+"""
+How each kind of file a check writes is compressed.
+
+Every check can write the text snapshot, the text before filters (last-fetched.br), the fetched HTML and the xpath
+element data, all inside the update worker. Brotli at its default quality 11 on a multi-MB page costs hundreds of ms
+of CPU per check, so the check itself uses fast levels and, optionally, text snapshots that are no longer new are
+recompressed later at a high quality by a background thread.
+
+The file formats do not change (brotli .br and zlib .deflate), only how hard the compressor works, so everything that
+reads these files, and older versions, still can.
+
+Configuration (environment)
+- COMPRESSION_SNAPSHOT_TEXT_QUALITY       Brotli quality (0-11) for history text snapshots, default 5
+- COMPRESSION_LAST_FETCHED_TEXT_QUALITY   Brotli quality for the text before filters (last-fetched.br), default 3
+- COMPRESSION_FETCHED_HTML_QUALITY        Brotli quality for the fetched HTML snapshots, default 3
+- COMPRESSION_XPATH_DATA_LEVEL            zlib level (0-9) for the xpath element data, default 1
+- SNAPSHOT_RECOMPRESS_AFTER_DAYS          Recompress text snapshots older than this many days, 0 = never, default 0
+- SNAPSHOT_RECOMPRESS_QUALITY             Brotli quality for the recompressed snapshots, default 11
+
+Benchmark the policy against the files of an existing datastore, CPU-ms and bytes per artifact type and level
+
+    python3 -m changedetectionio.storage_compression /datastore
+"""
+
+import os
+import tempfile
+import time
+
+from loguru import logger
+
+ARTIFACT_SNAPSHOT_TEXT = 'snapshot_text'
+ARTIFACT_LAST_FETCHED_TEXT = 'last_fetched_text'
+ARTIFACT_FETCHED_HTML = 'fetched_html'
+ARTIFACT_XPATH_DATA = 'xpath_data'
+
+# artifact -> (codec, env variable, default level)
+POLICY = {
+    ARTIFACT_SNAPSHOT_TEXT: ('brotli_text', 'COMPRESSION_SNAPSHOT_TEXT_QUALITY', 5),
+    ARTIFACT_LAST_FETCHED_TEXT: ('brotli_text', 'COMPRESSION_LAST_FETCHED_TEXT_QUALITY', 3),
+    ARTIFACT_FETCHED_HTML: ('brotli', 'COMPRESSION_FETCHED_HTML_QUALITY', 3),
+    ARTIFACT_XPATH_DATA: ('zlib', 'COMPRESSION_XPATH_DATA_LEVEL', 1),
+}
+
+# Marks how far (newest history key) the text snapshots of a watch have been recompressed
+RECOMPRESSED_MARKER_FILENAME = 'snapshots-recompressed.txt'
+
+
+def level_for(artifact):
+    codec, env_name, default = POLICY[artifact]
+    max_level = 9 if codec == 'zlib' else 11
+    return max(0, min(max_level, int(os.getenv(env_name, default))))
+
+
+def _compress_with(codec, data, level):
+    if codec == 'zlib':
+        import zlib
+        return zlib.compress(data, level)
+
+    import brotli
+    if codec == 'brotli_text':
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=level)
+    return brotli.compress(data, quality=level)
+
+
+def compress(artifact, data):
+    """Compress the bytes the way the policy says for this kind of file"""
+    return _compress_with(POLICY[artifact][0], data, level_for(artifact))
+
+
+def recompress_cold_snapshots(watch, older_than_seconds=None, quality=None, now=None):
+    """
+    Recompress the brotli text snapshots of the watch that are older than the cut-off at a high quality.
+
+    Snapshots are replaced atomically and only when the result is smaller, how far it got is kept in the watch data
+    directory so each snapshot is only recompressed once.
+
+    :return: Bytes saved
+    """
+    import brotli
+
+    if older_than_seconds is None:
+        older_than_seconds = float(os.getenv('SNAPSHOT_RECOMPRESS_AFTER_DAYS', 0)) * 86400
+    if quality is None:
+        quality = int(os.getenv('SNAPSHOT_RECOMPRESS_QUALITY', 11))
+    if not older_than_seconds or not watch.watch_data_dir or not os.path.isdir(watch.watch_data_dir):
+        return 0
+
+    cutoff = (now or time.time()) - older_than_seconds
+    marker_path = os.path.join(watch.watch_data_dir, RECOMPRESSED_MARKER_FILENAME)
+    done_until = 0
+    if os.path.isfile(marker_path):
+        with open(marker_path, 'r') as f:
+            done_until = int(f.read().strip() or 0)
+
+    saved = 0
+    newest_done = done_until
+    for timestamp, filepath in watch.history.items():
+        timestamp = int(timestamp)
+        if timestamp <= done_until:
+            continue
+        if timestamp > cutoff:
+            break
+        newest_done = timestamp
+
+        if not filepath.endswith('.br') or not os.path.isfile(filepath):
+            continue
+
+        with open(filepath, 'rb') as f:
+            compressed = f.read()
+        recompressed = brotli.compress(brotli.decompress(compressed), mode=brotli.MODE_TEXT, quality=quality)
+        if len(recompressed) >= len(compressed):
+            continue
+
+        with tempfile.NamedTemporaryFile('wb', delete=False, dir=watch.watch_data_dir) as tmp:
+            tmp.write(recompressed)
+            tmp_path = tmp.name
+        os.replace(tmp_path, filepath)
+        saved += len(compressed) - len(recompressed)
+
+    if newest_done != done_until:
+        with open(marker_path, 'w') as f:
+            f.write(str(newest_done))
+        if saved:
+            logger.debug(f"{watch.get('uuid')} - Recompressed snapshots up to {newest_done}, saved {saved} bytes")
+
+    return saved
+
+
+def _artifact_samples(datastore_path, limit_per_artifact=50):
+    """Uncompressed samples of each artifact type from the watch directories of a datastore"""
+    import brotli
+    import zlib
+
+    samples = {artifact: [] for artifact in POLICY}
+    for entry in sorted(os.scandir(datastore_path), key=lambda e: e.name):
+        if not entry.is_dir():
+            continue
+        for f in os.scandir(entry.path):
+            if f.name.endswith('.txt.br') or (f.name.endswith('.txt') and f.name not in ('history.txt', 'last-error.txt', RECOMPRESSED_MARKER_FILENAME)):
+                artifact = ARTIFACT_SNAPSHOT_TEXT
+            elif f.name == 'last-fetched.br':
+                artifact = ARTIFACT_LAST_FETCHED_TEXT
+            elif f.name.endswith('.html.br'):
+                artifact = ARTIFACT_FETCHED_HTML
+            elif f.name.endswith('.deflate'):
+                artifact = ARTIFACT_XPATH_DATA
+            else:
+                continue
+
+            if len(samples[artifact]) >= limit_per_artifact:
+                continue
+            try:
+                with open(f.path, 'rb') as fp:
+                    data = fp.read()
+                if f.name.endswith('.br'):
+                    data = brotli.decompress(data)
+                elif f.name.endswith('.deflate'):
+                    data = zlib.decompress(data)
+            except Exception as e:
+                logger.warning(f"Skipping {f.path} - {str(e)}")
+                continue
+            samples[artifact].append(data)
+    return samples
+
+
+def benchmark(datastore_path, limit_per_artifact=50):
+    """
+    Compress samples of each artifact type from a datastore at the policy level and at the other levels worth
+    comparing against.
+
+    :return: List of {'artifact', 'level', 'files', 'raw_bytes', 'compressed_bytes', 'cpu_ms'}
+    """
+    results = []
+    for artifact, samples in _artifact_samples(datastore_path, limit_per_artifact).items():
+        if not samples:
+            continue
+        codec = POLICY[artifact][0]
+        max_level = 9 if codec == 'zlib' else 11
+        for level in sorted({level_for(artifact), 1, max_level // 2, max_level}):
+            start = time.process_time()
+            compressed_bytes = sum(len(_compress_with(codec, data, level)) for data in samples)
+            results.append({
+                'artifact': artifact,
+                'level': level,
+                'files': len(samples),
+                'raw_bytes': sum(len(data) for data in samples),
+                'compressed_bytes': compressed_bytes,
+                'cpu_ms': round((time.process_time() - start) * 1000, 1),
+            })
+    return results
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python3 -m changedetectionio.storage_compression <datastore path> [files per artifact]")
+        sys.exit(1)
+
+    rows = benchmark(sys.argv[1], limit_per_artifact=int(sys.argv[2]) if len(sys.argv) > 2 else 50)
+    print(f"{'artifact':<20}{'level':>6}{'files':>7}{'raw bytes':>14}{'bytes':>14}{'ratio':>8}{'cpu ms':>10}{'policy':>8}")
+    for row in rows:
+        ratio = row['raw_bytes'] / row['compressed_bytes'] if row['compressed_bytes'] else 0
+        policy = '*' if row['level'] == level_for(row['artifact']) else ''
+        print(f"{row['artifact']:<20}{row['level']:>6}{row['files']:>7}{row['raw_bytes']:>14}{row['compressed_bytes']:>14}{ratio:>8.2f}{row['cpu_ms']:>10}{policy:>8}")
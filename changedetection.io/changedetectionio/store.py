@@ -4,7 +4,10 @@ from flask import (
     flash
 )
 
+from . import metrics
+from .effective_config import EffectiveWatchConfig
 from .html_tools import TRANSLATE_WHITESPACE_TABLE
+from .lazy_watches import LazyWatchDict
 from . model import App, Watch
 from copy import deepcopy, copy
 from os import path, unlink
@@ -22,10 +25,15 @@ from blinker import signal
 
 from .processors import get_custom_watch_obj_for_processor
 from .processors.restock_diff import Restock
+from .search_index import WatchSearchIndex, WatchSortIndex, StoredWatch, SEARCH_MODE_EXACT, SEARCH_MODE_PARTIAL
+from .snapshot_cache import snapshot_cache
 
 # Because the server will run as a daemon and wont know the URL for notification links when firing off a notification
 BASE_URL_NOT_SET_TEXT = '("Base URL" not set - see settings - notifications)'
 
+# State of an existing watch, never copied from the extras into a new watch
+NEW_WATCH_IGNORED_EXTRAS = frozenset(['uuid', 'history', 'last_checked', 'last_changed', 'newest_history_key', 'previous_md5', 'viewed'])
+
 dictfilt = lambda x, y: dict([ (i,x[i]) for i in x if i in set(y) ])
 
 # Is there an existing library to ensure some data store (JSON etc) is in sync with CRUD methods?
@@ -45,11 +53,21 @@ class ChangeDetectionStore:
         # Should only be active for docker
         # logging.basicConfig(filename='/dev/stdout', level=logging.INFO)
         self.__data = App.model()
+        self.__data['watching'] = LazyWatchDict(self._materialise_watch)
         self.datastore_path = datastore_path
         self.json_store_path = os.path.join(self.datastore_path, "url-watches.json")
         logger.info(f"Datastore path is '{self.json_store_path}'")
         self.needs_write = False
+        self.search_index = WatchSearchIndex()
+        self._sort_index = WatchSortIndex()
+        # uuid -> (what it was resolved from, EffectiveWatchConfig)
+        self._effective_config_cache = {}
+        # uuid -> epoch time, imported watches waiting for their wave of first checks
+        self._first_check_not_before = {}
         self.start_time = time.time()
+        start_rss = self._current_rss()
+        # Only rehydrate each watch into its Watch object when it is first used, see lazy_watches.py
+        lazy_watch_load = strtobool(os.getenv('LAZY_WATCH_LOAD', 'False'))
         self.stop_thread = False
         # Base definition for all watchers
         # deepcopy part of #569 - not sure why its needed exactly
@@ -69,7 +87,8 @@ class ChangeDetectionStore:
                 # @todo isnt there a way todo this dict.update recursively?
                 # Problem here is if the one on the disk is missing a sub-struct, it wont be present anymore.
                 if 'watching' in from_disk:
-                    self.__data['watching'].update(from_disk['watching'])
+                    for uuid, watch in from_disk.pop('watching').items():
+                        self.__data['watching'].set_unmaterialised(uuid, watch)
 
                 if 'app_guid' in from_disk:
                     self.__data['app_guid'] = from_disk['app_guid']
@@ -84,10 +103,9 @@ class ChangeDetectionStore:
                     if 'application' in from_disk['settings']:
                         self.__data['settings']['application'].update(from_disk['settings']['application'])
 
-                # Convert each existing watch back to the Watch.model object
-                for uuid, watch in self.__data['watching'].items():
-                    self.__data['watching'][uuid] = self.rehydrate_entity(uuid, watch)
-                    logger.info(f"Watching: {uuid} {watch['url']}")
+                # Convert each existing watch back to the Watch.model object, or leave that to the first access
+                if not lazy_watch_load:
+                    self.__data['watching'].materialise_all()
 
                 # And for Tags also, should be Restock type because it has extra settings
                 for uuid, tag in self.__data['settings']['application']['tags'].items():
@@ -115,6 +133,23 @@ class ChangeDetectionStore:
 
         self.__data['version_tag'] = version_tag
 
+        # Build the search and sort indexes once everything is loaded and updated, after that the Watch model keeps them fresh
+        # Both are built from the loaded dicts of not yet used watches, so the lazy start up does not rehydrate them
+        self._build_indexes()
+        signal('watch_index_fields_changed').connect(self.on_watch_index_fields_changed)
+
+        self.startup_stats = {
+            'lazy_watch_load': bool(lazy_watch_load),
+            'seconds': round(time.time() - self.start_time, 3),
+            'rss_mb': self._current_rss(),
+            'rss_increase_mb': round(self._current_rss() - start_rss, 1),
+            'watches': len(self.__data['watching']),
+            'watches_not_rehydrated': self.__data['watching'].pending_count,
+        }
+        logger.info(f"Datastore loaded {self.startup_stats['watches']} watches in {self.startup_stats['seconds']}s "
+                    f"({self.startup_stats['watches_not_rehydrated']} not rehydrated yet), "
+                    f"RSS {self.startup_stats['rss_mb']}MB (+{self.startup_stats['rss_increase_mb']}MB)")
+
         # Just to test that proxies.json if it exists, doesnt throw a parsing error on startup
         test_list = self.proxy_list
 
@@ -145,6 +180,30 @@ class ChangeDetectionStore:
         # Finally start the thread that will manage periodic data saves to JSON
         save_data_thread = threading.Thread(target=self.save_datastore).start()
 
+    @staticmethod
+    def _current_rss():
+        """Resident memory of this process in MB"""
+        import psutil
+        return round(psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024, 1)
+
+    def _materialise_watch(self, uuid, entity):
+        return self.rehydrate_entity(uuid, entity)
+
+    def _build_indexes(self):
+        start = time.time()
+        for uuid in self.__data['watching'].keys():
+            watch = self.__data['watching'].peek(uuid)
+            self.search_index.add(uuid, watch)
+            if not isinstance(watch, Watch.model):
+                # Still the loaded dict, last_changed is read from its history index without rehydrating it
+                watch = StoredWatch(watch, os.path.join(self.datastore_path, uuid))
+            self._sort_index.add(uuid, watch)
+        logger.debug(f"Search and sort indexes of {len(self._sort_index)} watches built in {time.time() - start:.2f}s")
+
+    @property
+    def sort_index(self):
+        return self._sort_index
+
     def rehydrate_entity(self, uuid, entity, processor_override=None):
         """Set the dict back to the dict Watch object"""
         entity['uuid'] = uuid
@@ -170,6 +229,13 @@ class ChangeDetectionStore:
         if watch_check_update:
             watch_check_update.send(watch_uuid=uuid)
 
+    def on_watch_index_fields_changed(self, watch, watch_uuid=None):
+        # Ignore copies of the watch (deepcopy() for previews etc), only the stored object is indexed
+        # peek(), this is also signalled while a watch is being rehydrated
+        if watch_uuid and self.__data['watching'].peek(watch_uuid) is watch:
+            self.search_index.update(watch_uuid, watch)
+            self._sort_index.update(watch_uuid, watch)
+
     def remove_password(self):
         self.__data['settings']['application']['password'] = False
         self.needs_write = True
@@ -201,6 +267,45 @@ class ChangeDetectionStore:
                 seconds += x * n
         return seconds
 
+    def recheck_threshold_seconds(self, watch, system_seconds=None, now=None):
+        """
+        Seconds between checks for this watch, either its own setting or the system default.
+        With adaptive recheck enabled, watches on the system default use the interval estimated from their history.
+        """
+        if not watch.get('time_between_check_use_default'):
+            return watch.threshold_seconds()
+
+        if system_seconds is None:
+            system_seconds = self.threshold_seconds
+
+        requests_settings = self.__data['settings']['requests']
+        if not requests_settings.get('adaptive_recheck'):
+            return system_seconds
+
+        return watch.adaptive_threshold_seconds(base_seconds=system_seconds,
+                                                min_seconds=int(requests_settings.get('adaptive_recheck_min_minutes') or 0) * 60,
+                                                max_seconds=int(requests_settings.get('adaptive_recheck_max_minutes') or 0) * 60,
+                                                now=now)
+
+    def stored_recheck_threshold_seconds(self, stored, system_seconds=None):
+        """
+        recheck_threshold_seconds() from the fields of a watch that is still the dict it was loaded from (LAZY_WATCH_LOAD),
+        None when it can only be worked out from the watch's history (adaptive recheck)
+        """
+        if not stored.get('time_between_check_use_default', True):
+            return sum((x or 0) * Watch.mtable[m] for m, x in (stored.get('time_between_check') or {}).items() if m in Watch.mtable)
+
+        if self.__data['settings']['requests'].get('adaptive_recheck'):
+            return None
+
+        return self.threshold_seconds if system_seconds is None else system_seconds
+
+    def next_check_time(self, watch):
+        """Predicted epoch time of the next check, None when the watch is paused"""
+        if watch.get('paused'):
+            return None
+        return int(watch.get('last_checked', 0) + self.recheck_threshold_seconds(watch) + watch.jitter_seconds)
+
     @property
     def has_unviewed(self):
         if not self.__data.get('watching'):
@@ -236,7 +341,12 @@ class ChangeDetectionStore:
 
         with self.lock:
             if uuid == 'all':
-                self.__data['watching'] = {}
+                self.__data['watching'] = LazyWatchDict(self._materialise_watch)
+                self.search_index.clear()
+                self._sort_index.clear()
+                self._effective_config_cache.clear()
+                self._first_check_not_before.clear()
+                snapshot_cache.clear()
                 time.sleep(1) # Mainly used for testing to allow all items to flush before running next test
 
                 # GitHub #30 also delete history records
@@ -250,6 +360,11 @@ class ChangeDetectionStore:
                 if os.path.exists(path):
                     shutil.rmtree(path)
                 del self.data['watching'][uuid]
+                self.search_index.remove(uuid)
+                self._sort_index.remove(uuid)
+                self._effective_config_cache.pop(uuid, None)
+                self._first_check_not_before.pop(uuid, None)
+                snapshot_cache.discard(uuid)
 
         self.needs_write_urgent = True
         watch_delete_signal = signal('watch_deleted')
@@ -270,10 +385,10 @@ class ChangeDetectionStore:
         return new_uuid
 
     def url_exists(self, url):
-
-        # Probably their should be dict...
-        for watch in self.data['watching'].values():
-            if watch['url'].lower() == url.lower():
+        # The search index has every URL lower-cased, the candidates are only checked in case it matched a title
+        for uuid in self.search_index.search(url, mode=SEARCH_MODE_EXACT):
+            watch = self.__data['watching'].peek(uuid)
+            if watch and watch.get('url', '').lower() == url.lower():
                 return True
 
         return False
@@ -286,6 +401,10 @@ class ChangeDetectionStore:
     def add_watch(self, url, tag='', extras=None, tag_uuids=None, write_to_disk_now=True):
         import requests
 
+        # Before anything is fetched or any tag is created for it
+        if not self._url_is_permitted(url):
+            return None
+
         if extras is None:
             extras = {}
 
@@ -336,11 +455,6 @@ class ChangeDetectionStore:
                 logger.error(f"Error fetching metadata for shared watch link {url} {str(e)}")
                 flash("Error fetching metadata for {}".format(url), 'error')
                 return False
-        from .model.Watch import is_safe_url
-        if not is_safe_url(url):
-            flash('Watch protocol is not permitted by SAFE_PROTOCOL_REGEX', 'error')
-            return None
-
         if tag and type(tag) == str:
             # Then it's probably a string of the actual tag by name, split and add it
             for t in tag.split(','):
@@ -351,38 +465,166 @@ class ChangeDetectionStore:
 
         # Or if UUIDs given directly
         if tag_uuids:
-            for t in tag_uuids:
-                apply_extras['tags'] = list(set(apply_extras['tags'] + [t.strip()]))
+            apply_extras['tags'] += tag_uuids
+
+        new_uuid = self._store_new_watch(url=url, extras=apply_extras, tags=apply_extras.pop('tags'))
 
-        # Make any uuids unique
-        if apply_extras.get('tags'):
-            apply_extras['tags'] = list(set(apply_extras.get('tags')))
+        if write_to_disk_now:
+            self.sync_to_json()
+
+        logger.debug(f"Added '{url}'")
+
+        return new_uuid
 
+    @staticmethod
+    def _url_is_permitted(url):
+        """is_safe_url() with the error flashed, checked before the tags of a new watch are created"""
+        from .model.Watch import is_safe_url
+        if not is_safe_url(url):
+            flash('Watch protocol is not permitted by SAFE_PROTOCOL_REGEX', 'error')
+            return False
+        return True
+
+    def _store_new_watch(self, url, extras, tags, watch_class=None):
+        """
+        Create a watch from the extras (settings from the form, import or share link) and add it to the datastore
+        and its indexes, shared by add_watch() and add_watches_bulk().
+
+        The URL is checked with _url_is_permitted() by the caller, before it creates any tags for the watch.
+
+        Args:
+            url (str): URL to watch
+            extras (dict): Settings for the new watch, the fields that are state of an existing watch are ignored
+            tags (list): Tag UUIDs, duplicates are dropped
+            watch_class: Watch class of the processor, looked up from extras['processor'] when not given
+
+        Returns:
+            str: The new watch UUID
+        """
         # If the processor also has its own Watch implementation
-        watch_class = get_custom_watch_obj_for_processor(apply_extras.get('processor'))
+        if watch_class is None:
+            watch_class = get_custom_watch_obj_for_processor(extras.get('processor'))
         new_watch = watch_class(datastore_path=self.datastore_path, url=url)
 
         new_uuid = new_watch.get('uuid')
 
         logger.debug(f"Adding URL '{url}' - {new_uuid}")
 
-        for k in ['uuid', 'history', 'last_checked', 'last_changed', 'newest_history_key', 'previous_md5', 'viewed']:
-            if k in apply_extras:
-                del apply_extras[k]
-
+        apply_extras = {k: v for k, v in extras.items() if k not in NEW_WATCH_IGNORED_EXTRAS}
+        # Make any uuids unique, keeping the order they were given in
+        apply_extras['tags'] = list(dict.fromkeys(t.strip() for t in tags))
         if not apply_extras.get('date_created'):
             apply_extras['date_created'] = int(time.time())
 
         new_watch.update(apply_extras)
         new_watch.ensure_data_dir_exists()
         self.__data['watching'][new_uuid] = new_watch
+        self.search_index.add(new_uuid, new_watch)
+        self._sort_index.add(new_uuid, new_watch)
+
+        return new_uuid
+
+    def add_watches_bulk(self, entries, extras=None, tag_uuids=None, dedupe=False, write_to_disk_now=True):
+        """
+        Add many watches in one go, for the URL list import and /api/v1/import.
+
+        Each watch is stored the same way as add_watch() does, but tags are looked up by name once, existing URLs come
+        from the search index, and the JSON is written once at the end.
+
+        Args:
+            entries (iterable): (url, tag) pairs, tag is a comma separated string of tag names (or '')
+            extras (dict): Settings for every new watch (processor, proxy etc)
+            tag_uuids (list): Tag UUIDs for every new watch
+            dedupe (bool): Skip URLs that are already watched (or already in this import)
+
+        Returns:
+            tuple: (list of new UUIDs, list of URLs that were skipped)
+        """
+        base_extras = deepcopy(extras) if extras else {}
+        base_extras_mutable = any(isinstance(v, (dict, list)) for v in base_extras.values())
+        base_tags = (tag_uuids or []) + (base_extras.pop('tags', None) or [])
+
+        watch_class = get_custom_watch_obj_for_processor(base_extras.get('processor'))
+        tag_uuids_by_name = {tag.get('title', '').lower().strip(): uuid for uuid, tag in self.__data['settings']['application']['tags'].items()}
+        seen_urls = set()
+        added = []
+        skipped = []
+
+        for url, tag in entries:
+            url = url.strip()
+            if not url:
+                continue
+
+            if url.startswith("https://changedetection.io/share/"):
+                # Needs the share link fetched, the same as adding it on its own
+                new_uuid = self.add_watch(url=url, tag=tag, extras=extras, tag_uuids=tag_uuids, write_to_disk_now=False)
+                if new_uuid:
+                    added.append(new_uuid)
+                else:
+                    skipped.append(url)
+                continue
+
+            if not self._url_is_permitted(url):
+                skipped.append(url)
+                continue
+
+            if dedupe:
+                if url.lower() in seen_urls or self.url_exists(url):
+                    skipped.append(url)
+                    continue
+                seen_urls.add(url.lower())
+
+            watch_tags = list(base_tags)
+            if tag and isinstance(tag, str):
+                for name in tag.split(','):
+                    n = name.strip().lower()
+                    if not n:
+                        continue
+                    tag_uuid = tag_uuids_by_name.get(n)
+                    if not tag_uuid:
+                        tag_uuid = tag_uuids_by_name[n] = self.add_tag(name)
+                    watch_tags.append(tag_uuid)
+
+            added.append(self._store_new_watch(url=url,
+                                               extras=deepcopy(base_extras) if base_extras_mutable else base_extras,
+                                               tags=watch_tags,
+                                               watch_class=watch_class))
+
+        logger.debug(f"Bulk added {len(added)} watches, skipped {len(skipped)}")
 
         if write_to_disk_now:
             self.sync_to_json()
 
-        logger.debug(f"Added '{url}'")
+        return added, skipped
 
-        return new_uuid
+    def schedule_first_checks_in_waves(self, uuids, wave_size=None, wave_seconds=None):
+        """
+        Spread the first check of newly added watches out, so a large import does not queue every one of them at once.
+
+        The first wave is due straight away and returned, the recheck ticker holds each later wave back for another
+        IMPORT_CHECK_WAVE_SECONDS (default 10) per IMPORT_CHECK_WAVE_SIZE (default 100) watches.
+        """
+        if wave_size is None:
+            wave_size = int(os.getenv('IMPORT_CHECK_WAVE_SIZE', 100))
+        if wave_seconds is None:
+            wave_seconds = float(os.getenv('IMPORT_CHECK_WAVE_SECONDS', 10))
+        wave_size = max(1, wave_size)
+
+        now = time.time()
+        for i, uuid in enumerate(uuids[wave_size:], start=wave_size):
+            self._first_check_not_before[uuid] = now + (i // wave_size) * wave_seconds
+
+        return list(uuids[:wave_size])
+
+    def first_check_is_held(self, uuid, now=None):
+        """True while the watch is waiting for its wave, see schedule_first_checks_in_waves()"""
+        not_before = self._first_check_not_before.get(uuid)
+        if not_before is None:
+            return False
+        if (now or time.time()) >= not_before:
+            self._first_check_not_before.pop(uuid, None)
+            return False
+        return True
 
     def visualselector_data_is_ready(self, watch_uuid):
         output_path = os.path.join(self.datastore_path, watch_uuid)
@@ -395,6 +637,7 @@ class ChangeDetectionStore:
 
     def sync_to_json(self):
         logger.info("Saving JSON..")
+        save_started = time.perf_counter()
         try:
             data = deepcopy(self.__data)
         except RuntimeError as e:
@@ -418,6 +661,7 @@ class ChangeDetectionStore:
 
             self.needs_write = False
             self.needs_write_urgent = False
+            metrics.observe(metrics.DATASTORE_SAVE_SECONDS, time.perf_counter() - save_started)
 
     # Thread runner, this helps with thread/write issues when there are many operations that want to update the JSON
     # by just running periodically in one thread, according to python, dict updates are threadsafe.
@@ -574,16 +818,28 @@ class ChangeDetectionStore:
 
         return headers
 
-    def get_tag_overrides_for_watch(self, uuid, attr):
-        tags = self.get_all_tags_for_watch(uuid=uuid)
-        ret = []
+    def get_effective_config_for_watch(self, uuid):
+        """What the watch inherits from its tags, resolved again only when its tag list or one of its tags changed"""
+        watch = self.__data['watching'].get(uuid)
+        if not watch:
+            return EffectiveWatchConfig({})
 
-        if tags:
-            for tag_uuid, tag in tags.items():
-                if attr in tag and tag[attr]:
-                    ret=[*ret, *tag[attr]]
+        all_tags = self.__data['settings']['application']['tags']
+        tag_uuids = tuple(watch.get('tags') or ())
+        resolved_from = tuple((tag_uuid, id(tag), getattr(tag, 'revision', 0))
+                              for tag_uuid, tag in ((t, all_tags.get(t)) for t in tag_uuids))
+
+        cached = self._effective_config_cache.get(uuid)
+        if cached and cached[0] == resolved_from:
+            return cached[1]
 
-        return ret
+        wanted = set(tag_uuids)
+        config = EffectiveWatchConfig({tag_uuid: tag for tag_uuid, tag in all_tags.items() if tag_uuid in wanted})
+        self._effective_config_cache[uuid] = (resolved_from, config)
+        return config
+
+    def get_tag_overrides_for_watch(self, uuid, attr):
+        return self.get_effective_config_for_watch(uuid).tag_overrides(attr)
 
     def add_tag(self, title):
         # If name exists, return that
@@ -614,13 +870,8 @@ class ChangeDetectionStore:
 
     def get_all_tags_for_watch(self, uuid):
         """This should be in Watch model but Watch doesn't have access to datastore, not sure how to solve that yet"""
-        watch = self.data['watching'].get(uuid)
-
         # Should return a dict of full tag info linked by UUID
-        if watch:
-            return dictfilt(self.__data['settings']['application']['tags'], watch.get('tags', []))
-
-        return {}
+        return self.get_effective_config_for_watch(uuid).tags
 
     @property
     def extra_browsers(self):
@@ -646,38 +897,38 @@ class ChangeDetectionStore:
                 return True
         return False
         
-    def search_watches_for_url(self, query, tag_limit=None, partial=False):
+    def search_watches_for_url(self, query, tag_limit=None, partial=False, mode=None):
         """Search watches by URL, title, or error messages
         
         Args:
             query (str): Search term to match against watch URLs, titles, and error messages
             tag_limit (str, optional): Optional tag name to limit search results
             partial: (bool, optional): sub-string matching
+            mode (str, optional): 'exact', 'prefix' or 'partial', overrides partial
 
         Returns:
             list: List of UUIDs of watches that match the search criteria
         """
-        matching_uuids = []
-        query = query.lower().strip()
-        tag = self.tag_exists_by_name(tag_limit) if tag_limit else False
+        if not mode:
+            mode = SEARCH_MODE_PARTIAL if partial else SEARCH_MODE_EXACT
 
-        for uuid, watch in self.data['watching'].items():
-            # Filter by tag if requested
-            if tag_limit:
-                if not tag.get('uuid') in watch.get('tags', []):
-                    continue
+        tag_uuid = None
+        if tag_limit:
+            tag = self.tag_exists_by_name(tag_limit)
+            if not tag:
+                return []
+            tag_uuid = tag.get('uuid')
 
-            # Search in URL, title, or error messages
-            if partial:
-                if ((watch.get('title') and query in watch.get('title').lower()) or
-                    query in watch.get('url', '').lower() or
-                    (watch.get('last_error') and query in watch.get('last_error').lower())):
-                    matching_uuids.append(uuid)
-            else:
-                if ((watch.get('title') and query == watch.get('title').lower()) or
-                        query == watch.get('url', '').lower() or
-                        (watch.get('last_error') and query == watch.get('last_error').lower())):
-                    matching_uuids.append(uuid)
+        matching_uuids = []
+        for uuid in self.search_index.search(query, mode=mode):
+            watch = self.__data['watching'].get(uuid)
+            # The index can briefly know about a watch that was just removed
+            if not watch:
+                continue
+            # Filter by tag if requested
+            if tag_uuid and not tag_uuid in watch.get('tags', []):
+                continue
+            matching_uuids.append(uuid)
 
         return matching_uuids
 
@@ -709,11 +960,11 @@ class ChangeDetectionStore:
 
 
     def get_updates_available(self):
-        import inspect
         updates_available = []
-        for i, o in inspect.getmembers(self, predicate=inspect.ismethod):
-            m = re.search(r'update_(\d+)$', i)
-            if m:
+        # Only the class, reading every attribute of the instance would also evaluate its properties
+        for name in dir(type(self)):
+            m = re.search(r'update_(\d+)$', name)
+            if m and callable(getattr(type(self), name)):
                 updates_available.append(int(m.group(1)))
         updates_available.sort()
 
@@ -726,6 +977,11 @@ class ChangeDetectionStore:
     def run_updates(self):
         import shutil
         updates_available = self.get_updates_available()
+        # Nothing to do on an up to date datastore, and with the lazy start up the watches are left as they were loaded
+        if updates_available and self.__data['settings']['application']['schema_version'] >= updates_available[-1]:
+            logger.debug(f"Datastore schema version {updates_available[-1]} is current, no updates to apply")
+            return
+
         for update_n in updates_available:
             if update_n > self.__data['settings']['application']['schema_version']:
                 logger.critical(f"Applying update_{update_n}")
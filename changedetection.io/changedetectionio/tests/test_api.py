@@ -170,6 +170,8 @@ def test_api_simple(client, live_server, measure_memory_usage):
     watch = res.json
     # @todo how to handle None/default global values?
     assert watch['history_n'] == 2, "Found replacement history section, which is in its own API"
+    # Default 3 hours between checks, no adaptive recheck
+    assert watch['next_check'] == int(watch['last_checked'] + 3 * 3600)
 
     assert watch.get('viewed') == False
     # Loading the most recent snapshot should force viewed to become true
@@ -191,6 +193,14 @@ def test_api_simple(client, live_server, measure_memory_usage):
     )
     assert res.json.get('watch_count') == 1
     assert res.json.get('uptime') > 0.5
+    assert res.json['metrics']['changedetection_fetch_seconds']
+
+    # Same metrics in the Prometheus format, with the API key
+    res = client.get(url_for("metrics"))
+    assert res.status_code == 403
+    res = client.get(url_for("metrics"), headers={'x-api-key': api_key})
+    assert b'# TYPE changedetection_fetch_seconds histogram' in res.data
+    assert b'changedetection_queue_depth{queue="update"}' in res.data
 
     ######################################################
     # Mute and Pause, check it worked
@@ -244,6 +254,52 @@ def test_api_simple(client, live_server, measure_memory_usage):
     )
     assert len(res.json) == 0, "Watch list should be empty"
 
+def test_api_watch_list_pagination(client, live_server, measure_memory_usage):
+    api_key = live_server.app.config['DATASTORE'].data['settings']['application'].get('api_access_token')
+
+    uuids = []
+    for i in range(5):
+        res = client.post(
+            url_for("createwatch"),
+            data=json.dumps({"url": f"https://example.com/page-{i}", "title": f"Title {4 - i}", "paused": True}),
+            headers={'content-type': 'application/json', 'x-api-key': api_key},
+        )
+        assert res.status_code == 201
+        uuids.append(res.json.get('uuid'))
+
+    # No limit, everything in the order it was added
+    res = client.get(url_for("createwatch"), headers={'x-api-key': api_key})
+    assert list(res.json.keys()) == uuids
+    assert not res.headers.get('X-Next-Cursor')
+
+    # Follow the cursor through every page
+    seen = []
+    cursor = None
+    while True:
+        args = {'sort': 'title', 'limit': 2}
+        if cursor:
+            args['cursor'] = cursor
+        res = client.get(url_for("createwatch", **args), headers={'x-api-key': api_key})
+        assert res.status_code == 200
+        assert len(res.json) <= 2
+        seen += list(res.json.keys())
+        cursor = res.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert seen == list(reversed(uuids))
+
+    res = client.get(url_for("createwatch", sort='title', order='desc', limit=1), headers={'x-api-key': api_key})
+    assert list(res.json.keys()) == [uuids[0]]
+
+    res = client.get(url_for("createwatch", sort='last_changed', limit=1, cursor='garbage'), headers={'x-api-key': api_key})
+    assert res.status_code == 400
+
+    res = client.get(url_for("createwatch", sort='nothing'), headers={'x-api-key': api_key})
+    assert res.status_code == 400
+
+    client.get(url_for("ui.form_delete", uuid="all"), follow_redirects=True)
+
+
 def test_access_denied(client, live_server, measure_memory_usage):
     # `config_api_token_enabled` Should be On by default
     res = client.get(
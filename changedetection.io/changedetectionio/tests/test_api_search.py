@@ -99,3 +99,28 @@ def test_api_search(client, live_server):
     assert len(res.json) == 1
     assert list(res.json.values())[0]['url'] == urls[2]
 
+
+    # Test search by prefix, matches the start of the URL but not the middle
+    res = client.get(url_for("search") + "?q=https://example.&prefix=true", headers={'x-api-key': api_key, 'content-type': 'application/json'})
+    assert len(res.json) == 2
+    res = client.get(url_for("search") + "?q=example.org&prefix=true", headers={'x-api-key': api_key, 'content-type': 'application/json'})
+    assert len(res.json) == 0
+
+    # Test pagination of the results
+    res = client.get(url_for("search") + "?q=example&partial=true&limit=2", headers={'x-api-key': api_key, 'content-type': 'application/json'})
+    assert len(res.json) == 2
+    assert res.headers.get('X-Total-Count') == '3'
+    first_page = list(res.json.keys())
+    res = client.get(url_for("search") + "?q=example&partial=true&limit=2&offset=2", headers={'x-api-key': api_key, 'content-type': 'application/json'})
+    assert len(res.json) == 1
+    assert list(res.json.keys())[0] not in first_page
+
+    # Renaming a watch is picked up by the search index
+    uuid = first_page[0]
+    client.put(
+        url_for("watch", uuid=uuid),
+        headers={'x-api-key': api_key, 'content-type': 'application/json'},
+        data=json.dumps({'title': 'Renamed For Search'}),
+    )
+    res = client.get(url_for("search") + "?q=renamed for search", headers={'x-api-key': api_key, 'content-type': 'application/json'})
+    assert list(res.json.keys()) == [uuid]
@@ -3,7 +3,8 @@
 from .util import set_original_response, live_server_setup, wait_for_all_checks
 from flask import url_for
 import io
-from zipfile import ZipFile
+from zipfile import ZipFile, ZIP_STORED
+import json
 import re
 import time
 
@@ -61,6 +62,41 @@ def test_backup(client, live_server, measure_memory_usage):
     # Should be two txt files in the archive (history and the snapshot)
     assert len(newlist) == 2
 
+    # Already compressed snapshots are stored as-is
+    for info in backup.infolist():
+        if info.filename.endswith('.br'):
+            assert info.compress_type == ZIP_STORED
+    assert 'backup-manifest.json' in l
+
+    # Nothing changed, so an incremental backup has only the index/settings and not the watch data
+    time.sleep(1)
+    client.get(
+        url_for("backups.request_backup", incremental=1),
+        follow_redirects=True
+    )
+    time.sleep(2)
+    res = client.get(
+        url_for("backups.download_backup", filename="latest"),
+        follow_redirects=True
+    )
+    assert res.content_type == "application/zip"
+    incremental = ZipFile(io.BytesIO(res.data))
+    assert 'url-watches.json' in incremental.namelist()
+    assert not list(filter(uuid4hex.match, incremental.namelist()))
+    manifest = json.loads(incremental.read('backup-manifest.json'))
+    assert manifest['incremental']
+    assert set(newlist).issubset(set(manifest['files'].keys()))
+
+    res = client.get(url_for("backups.index"))
+    assert b'-incremental.zip' in res.data
+
+    # Streamed straight to the browser without being written to disk first
+    res = client.get(url_for("backups.download_backup_now"))
+    assert res.content_type == "application/zip"
+    streamed = ZipFile(io.BytesIO(res.data))
+    assert len(list(filter(uuid4hex.match, streamed.namelist()))) == 2
+    assert 'url-watches.json' in streamed.namelist()
+
     # Get the latest one
     res = client.get(
         url_for("backups.remove_backups"),
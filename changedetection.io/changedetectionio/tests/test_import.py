@@ -34,6 +34,34 @@ https://example.com tag1, other tag"""
     res = client.get( url_for("watchlist.index"))
     res = client.get( url_for("watchlist.index"))
 
+def test_import_bulk_tags_and_waves(client, live_server, measure_memory_usage):
+    datastore = live_server.app.config['DATASTORE']
+    urls = "\n".join(f"https://example.com/page{i} bulk-tag, Other Bulk" for i in range(250))
+
+    res = client.post(
+        url_for("imports.import_page"),
+        data={"distill-io": "", "urls": urls},
+        follow_redirects=True,
+    )
+    assert b"250 Imported" in res.data
+
+    # Each tag name was only created once
+    titles = [tag.get('title') for tag in datastore.data['settings']['application']['tags'].values()]
+    assert titles.count('bulk-tag') == 1
+    assert titles.count('Other Bulk') == 1
+    tag_uuids = {tag.get('title'): uuid for uuid, tag in datastore.data['settings']['application']['tags'].items()}
+    for watch in datastore.data['watching'].values():
+        assert set(watch['tags']) == {tag_uuids['bulk-tag'], tag_uuids['Other Bulk']}
+
+    # The first 100 are checked straight away, the rest wait for their wave
+    held = [uuid for uuid in datastore.data['watching'].keys() if datastore.first_check_is_held(uuid)]
+    assert len(held) == 150
+
+    res = client.get(url_for("ui.form_delete", uuid="all"), follow_redirects=True)
+    # Clear flask alerts
+    res = client.get(url_for("watchlist.index"))
+    res = client.get(url_for("watchlist.index"))
+
 def xtest_import_skip_url(client, live_server, measure_memory_usage):
 
 
@@ -104,6 +104,26 @@ def test_rss_and_token(client, live_server, measure_memory_usage):
     assert b"Access denied, bad token" not in res.data
     assert b"Random content" in res.data
 
+    # Nothing changed, so the same ETag should come back as 304 Not Modified
+    etag = res.headers.get('ETag')
+    assert etag
+    res = client.get(
+        url_for("rss.feed", token=rss_token, _external=True),
+        headers={'If-None-Match': etag}
+    )
+    assert res.status_code == 304
+
+    # Viewing the diff removes the watch from the feed, so the ETag must change
+    uuid = extract_UUID_from_client(client)
+    client.get(url_for("ui.ui_views.diff_history_page", uuid=uuid))
+    res = client.get(
+        url_for("rss.feed", token=rss_token, _external=True),
+        headers={'If-None-Match': etag}
+    )
+    assert res.status_code == 200
+    assert res.headers.get('ETag') != etag
+    assert b"Random content" not in res.data
+
     client.get(url_for("ui.form_delete", uuid="all"), follow_redirects=True)
 
 def test_basic_cdata_rss_markup(client, live_server, measure_memory_usage):
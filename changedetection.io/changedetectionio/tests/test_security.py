@@ -72,6 +72,23 @@ def test_bad_access(client, live_server, measure_memory_usage):
 
     assert b'Watch protocol is not permitted by SAFE_PROTOCOL_REGEX' in res.data
 
+    # A rejected URL does not leave its tags behind, for one watch or in an import
+    res = client.post(
+        url_for("ui.ui_views.form_quick_watch_add"),
+        data={"url": 'javascript:alert(123)', "tags": 'rejected-quick-add-tag'},
+        follow_redirects=True
+    )
+    assert b'Watch protocol is not permitted by SAFE_PROTOCOL_REGEX' in res.data
+
+    datastore = live_server.app.config['DATASTORE']
+    with live_server.app.test_request_context():
+        datastore.add_watch(url='javascript:alert(123)', tag='rejected-add-tag', write_to_disk_now=False)
+        datastore.add_watches_bulk([('javascript:alert(123)', 'rejected-import-tag')], write_to_disk_now=False)
+    tag_titles = [tag.get('title') for tag in datastore.data['settings']['application']['tags'].values()]
+    assert 'rejected-quick-add-tag' not in tag_titles
+    assert 'rejected-add-tag' not in tag_titles
+    assert 'rejected-import-tag' not in tag_titles
+
 
 def _runner_test_various_file_slash(client, file_uri):
 
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_adaptive_recheck
+
+import shutil
+import tempfile
+import unittest
+import uuid as uuid_builder
+
+from changedetectionio.model import Watch
+
+
+class TestAdaptiveRecheck(unittest.TestCase):
+
+    def setUp(self):
+        self.datastore_path = tempfile.mkdtemp()
+        self.watch = Watch.model(datastore_path=self.datastore_path, default={})
+        self.watch.ensure_data_dir_exists()
+
+    def tearDown(self):
+        shutil.rmtree(self.datastore_path, ignore_errors=True)
+
+    def add_snapshots(self, timestamps):
+        for t in timestamps:
+            self.watch.save_history_text(contents=f"content {t}", timestamp=t, snapshot_id=str(uuid_builder.uuid4()))
+
+    def test_not_enough_history_uses_base(self):
+        self.add_snapshots([1000, 2000])
+        self.assertEqual(self.watch.adaptive_threshold_seconds(3600, 60, 86400, now=2100), 3600)
+
+    def test_volatile_page_is_checked_more_often(self):
+        # Changes every 10 minutes
+        self.add_snapshots([i * 600 for i in range(1, 11)])
+        seconds = self.watch.adaptive_threshold_seconds(3600, 60, 86400, now=6000 + 10)
+        self.assertEqual(seconds, 300)
+
+    def test_clamped_to_the_minimum(self):
+        self.add_snapshots([i * 10 for i in range(1, 11)])
+        self.assertEqual(self.watch.adaptive_threshold_seconds(3600, 300, 86400, now=101), 300)
+
+    def test_quiet_page_backs_off_to_the_maximum(self):
+        self.add_snapshots([i * 600 for i in range(1, 11)])
+        # Nothing changed for a day, the quiet time wins over the old change rate
+        self.assertEqual(self.watch.adaptive_threshold_seconds(3600, 60, 86400, now=6000 + 86400), 86400 // 2)
+        # And never longer than the maximum
+        self.assertEqual(self.watch.adaptive_threshold_seconds(3600, 60, 86400, now=6000 + 86400 * 30), 86400)
+
+    def test_new_snapshot_refreshes_the_estimate(self):
+        self.add_snapshots([i * 600 for i in range(1, 11)])
+        self.assertEqual(self.watch.adaptive_threshold_seconds(3600, 60, 86400, now=6010), 300)
+        # A burst of quick changes pulls the median down
+        self.add_snapshots([6000 + i * 60 for i in range(1, 21)])
+        self.assertEqual(self.watch.adaptive_threshold_seconds(3600, 10, 86400, now=7210), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
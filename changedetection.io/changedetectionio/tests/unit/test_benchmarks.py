@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_benchmarks
+
+import unittest
+from unittest import mock
+
+from changedetectionio import benchmarks
+from changedetectionio.benchmarks import fixtures
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.cleaned_up = False
+        # Only the benchmarks registered here
+        registered = {}
+        for patcher in (mock.patch.object(benchmarks, 'BENCHMARKS', registered),
+                        mock.patch.object(benchmarks, 'load_all', lambda: registered)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        @benchmarks.benchmark(params=[10, 100], rounds=3)
+        def sort_numbers(n):
+            data = list(range(n))[::-1]
+            return lambda: len(sorted(data))
+
+        @benchmarks.benchmark()
+        def with_cleanup():
+            yield lambda: None
+            self.cleaned_up = True
+
+    def test_run(self):
+        results = benchmarks.run(progress=None)
+        self.assertEqual(set(results['benchmarks']), {'sort_numbers[10]', 'sort_numbers[100]', 'with_cleanup'})
+        row = results['benchmarks']['sort_numbers[100]']
+        self.assertEqual(row['rounds'], 3)
+        self.assertEqual(row['items_per_call'], 100)
+        self.assertLessEqual(row['min_seconds'], row['median_seconds'])
+        self.assertNotIn('items_per_call', results['benchmarks']['with_cleanup'])
+        self.assertTrue(self.cleaned_up)
+
+    def test_quick_and_select(self):
+        results = benchmarks.run(select=['sort'], quick=True, progress=None)
+        self.assertEqual(list(results['benchmarks']), ['sort_numbers[10]'])
+        self.assertEqual(results['benchmarks']['sort_numbers[10]']['rounds'], 1)
+
+    def test_compare(self):
+        before = {'benchmarks': {'a': {'median_seconds': 1.0}, 'b': {'median_seconds': 1.0}, 'gone': {'median_seconds': 1.0}}}
+        after = {'benchmarks': {'a': {'median_seconds': 1.1}, 'b': {'median_seconds': 2.0}, 'new': {'median_seconds': 1.0}}}
+        rows = {name: slower for name, _, _, _, slower in benchmarks.compare(before, after, threshold=1.15)}
+        self.assertEqual(rows, {'a': False, 'b': True})
+
+
+
+class TestFixtures(unittest.TestCase):
+
+    def tearDown(self):
+        fixtures.cleanup()
+
+    def test_datastore_scheduler_tick(self):
+        # The same path as the scheduler_tick benchmark, on a small datastore
+        from changedetectionio.custom_queue import SignalPriorityQueue
+        from changedetectionio.flask_app import queue_due_watches
+
+        store = fixtures.datastore(50)
+        self.assertEqual(len(store.data['watching']), 50)
+
+        update_q = SignalPriorityQueue()
+        queued = queue_due_watches(store, update_q, queue_item=lambda q, item: q.put(item))
+        # last_checked is spread over two recheck intervals, so some but not all are due
+        self.assertGreater(queued, 0)
+        self.assertLess(queued, 50)
+        self.assertEqual(update_q.qsize(), queued)
+
+
+if __name__ == '__main__':
+    unittest.main()
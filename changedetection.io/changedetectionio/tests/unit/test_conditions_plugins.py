@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_conditions_plugins
+
+import shutil
+import tempfile
+import time
+import unittest
+
+from changedetectionio.conditions import execute_ruleset_against_all_plugins, get_plugin_execution_stats, _compile_ruleset
+from changedetectionio.store import ChangeDetectionStore
+
+
+class TestConditionsPlugins(unittest.TestCase):
+    def setUp(self):
+        self.test_datastore_path = tempfile.mkdtemp()
+        self.store = ChangeDetectionStore(datastore_path=self.test_datastore_path, include_default_watches=False)
+        self.watch_uuid = self.store.add_watch(url="https://example.com")
+
+    def tearDown(self):
+        self.store.stop_thread = True
+        time.sleep(0.5)
+        shutil.rmtree(self.test_datastore_path)
+
+    def test_only_referenced_plugins_run(self):
+        self.store.data['watching'][self.watch_uuid].update({
+            "conditions_match_logic": "ALL",
+            "conditions": [{"operator": ">=", "field": "word_count", "value": "3"}]
+        })
+
+        levenshtein_runs = get_plugin_execution_stats().get('levenshtein_plugin', {}).get('runs', 0)
+
+        result = execute_ruleset_against_all_plugins(current_watch_uuid=self.watch_uuid,
+                                                     application_datastruct=self.store.data,
+                                                     ephemeral_data={'text': "one two three four"})
+        self.assertTrue(result.get('result'))
+        self.assertEqual(result['executed_data'].get('word_count'), 4)
+        # No rule uses the Levenshtein fields, so the plugin never ran
+        self.assertNotIn('levenshtein_ratio', result['executed_data'])
+        self.assertEqual(get_plugin_execution_stats().get('levenshtein_plugin', {}).get('runs', 0), levenshtein_runs)
+        self.assertGreaterEqual(get_plugin_execution_stats()['wordcount_plugin']['runs'], 1)
+
+        result = execute_ruleset_against_all_plugins(current_watch_uuid=self.watch_uuid,
+                                                     application_datastruct=self.store.data,
+                                                     ephemeral_data={'text': "one two"})
+        self.assertFalse(result.get('result'))
+
+    def test_ruleset_is_cached_until_edited(self):
+        watch = self.store.data['watching'][self.watch_uuid]
+        watch.update({"conditions_match_logic": "ALL",
+                      "conditions": [{"operator": "in", "field": "page_filtered_text", "value": "rock"}]})
+
+        hits = _compile_ruleset.cache_info().hits
+        for i in range(3):
+            result = execute_ruleset_against_all_plugins(current_watch_uuid=self.watch_uuid,
+                                                         application_datastruct=self.store.data,
+                                                         ephemeral_data={'text': "I saw 500 people at a rock show"})
+            self.assertTrue(result.get('result'))
+        self.assertEqual(_compile_ruleset.cache_info().hits, hits + 2)
+
+        # An edited rule is compiled again
+        watch.update({"conditions": [{"operator": "in", "field": "page_filtered_text", "value": "jazz"}]})
+        result = execute_ruleset_against_all_plugins(current_watch_uuid=self.watch_uuid,
+                                                     application_datastruct=self.store.data,
+                                                     ephemeral_data={'text': "I saw 500 people at a rock show"})
+        self.assertFalse(result.get('result'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_effective_config
+
+import unittest
+
+from changedetectionio.effective_config import EffectiveWatchConfig
+from changedetectionio.model import Tag
+
+
+class TestEffectiveWatchConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.config = EffectiveWatchConfig({
+            't1': {'title': 'one', 'ignore_text': ['a', 'b'], 'notification_body': 'muted body', 'notification_muted': True},
+            't2': {'title': 'two', 'ignore_text': ['c'], 'notification_body': 'tag body', 'include_filters': []},
+        })
+
+    def test_tag_overrides(self):
+        self.assertEqual(self.config.tag_overrides('ignore_text'), ['a', 'b', 'c'])
+        self.assertEqual(self.config.tag_overrides('include_filters'), [])
+
+        # Callers extend what they get back, that must not change what is resolved
+        overrides = self.config.tag_overrides('ignore_text')
+        overrides += ['from the watch']
+        self.assertEqual(self.config.tag_overrides('ignore_text'), ['a', 'b', 'c'])
+
+    def test_tag_setting_skips_muted_tags(self):
+        self.assertEqual(self.config.tag_setting('notification_body'), 'tag body')
+        self.assertIsNone(self.config.tag_setting('notification_title'))
+
+
+class TestRevision(unittest.TestCase):
+
+    def test_every_write_is_counted(self):
+        tag = Tag.model(default={'title': 'one'})
+        revision = tag.revision
+        tag['notification_muted'] = True
+        self.assertGreater(tag.revision, revision)
+
+        revision = tag.revision
+        tag.update({'ignore_text': ['x']})
+        self.assertGreater(tag.revision, revision)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_history_extract
+
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+import uuid as uuid_builder
+from unittest import mock
+
+from changedetectionio import history_extract
+from changedetectionio.model import Watch
+
+
+class TestHistoryExtract(unittest.TestCase):
+
+    def setUp(self):
+        self.datastore_path = tempfile.mkdtemp()
+        self.watch = Watch.model(datastore_path=self.datastore_path, default={})
+        self.watch.ensure_data_dir_exists()
+        for t in range(100, 110):
+            self.watch.save_history_text(contents=f"Price is {t}.50 today\n" * 50, timestamp=t, snapshot_id=str(uuid_builder.uuid4()))
+
+    def tearDown(self):
+        shutil.rmtree(self.datastore_path, ignore_errors=True)
+
+    def _read_report(self, filename):
+        with open(os.path.join(self.watch.watch_data_dir, filename), newline='') as f:
+            return list(csv.reader(f))
+
+    def test_rows_in_history_order(self):
+        with mock.patch.dict(os.environ, {'EXTRACT_REGEX_CHUNK_SNAPSHOTS': '3'}):
+            filename = self.watch.extract_regex_from_all_history(r"Price is ([0-9\.]+)")
+
+        rows = self._read_report(filename)
+        self.assertEqual(rows[0], ['Epoch seconds', 'Date'])
+        # 10 snapshots with 50 matches each
+        self.assertEqual(len(rows), 1 + 10 * 50)
+        self.assertEqual(rows[1][0], '100')
+        self.assertEqual(rows[-1][0], '109')
+        self.assertEqual(rows[-1][2], '109.50')
+
+    def test_nothing_matches(self):
+        self.assertFalse(self.watch.extract_regex_from_all_history(r"not on the page"))
+
+    def test_cached_per_regex_and_newest_history(self):
+        regex = r"Price is ([0-9\.]+)"
+        progress = []
+        filename = self.watch.extract_regex_from_all_history(regex)
+        self.assertEqual(history_extract.cached_report(self.watch, regex), filename)
+
+        # Same RegEx and history, nothing is searched again
+        self.assertEqual(self.watch.extract_regex_from_all_history(regex, progress_callback=lambda *a: progress.append(a)), filename)
+        self.assertEqual(progress, [])
+
+        # A new snapshot makes a new report and the old one is removed
+        self.watch.save_history_text(contents="Price is 200.50 today", timestamp=200, snapshot_id=str(uuid_builder.uuid4()))
+        self.assertIsNone(history_extract.cached_report(self.watch, regex))
+        new_filename = self.watch.extract_regex_from_all_history(regex)
+        self.assertNotEqual(new_filename, filename)
+        self.assertFalse(os.path.isfile(os.path.join(self.watch.watch_data_dir, filename)))
+        self.assertEqual(self._read_report(new_filename)[-1][2], '200.50')
+
+    def test_background_job_reports_progress(self):
+        with mock.patch.dict(os.environ, {'EXTRACT_REGEX_INLINE_SNAPSHOTS': '0', 'EXTRACT_REGEX_CHUNK_SNAPSHOTS': '4', 'EXTRACT_REGEX_WORKERS': '2'}):
+            job = history_extract.start_extraction(self.watch, r"Price is ([0-9\.]+)")
+            self.assertIs(history_extract.get_job(job.id), job)
+            for t in list(history_extract.threading.enumerate()):
+                if t.name == f"ExtractRegex-{job.id}":
+                    t.join(timeout=60)
+
+        result = job.as_dict()
+        self.assertEqual(result['status'], 'done')
+        self.assertTrue(result['matched'])
+        self.assertEqual(result['done'], 10)
+        self.assertEqual(result['total'], 10)
+        self.assertEqual(len(self._read_report(job.filename)), 1 + 10 * 50)
+
+        # Finished jobs of any watch are forgotten after EXTRACT_REGEX_JOB_KEEP_SECONDS
+        self.assertIs(history_extract.get_job(job.id), job)
+        with mock.patch.dict(os.environ, {'EXTRACT_REGEX_JOB_KEEP_SECONDS': '60'}):
+            job.finished_at -= 61
+            self.assertIsNone(history_extract.get_job(job.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_host_politeness
+
+import asyncio
+import unittest
+
+from changedetectionio import queuedWatchMetaData
+from changedetectionio.custom_queue import AsyncSignalPriorityQueue
+from changedetectionio.host_politeness import HostPolitenessScheduler, parse_retry_after
+
+
+class TestHostPoliteness(unittest.TestCase):
+
+    def test_key(self):
+        self.assertEqual(HostPolitenessScheduler.key_for("https://Example.com:8080/path"), "direct|example.com")
+        self.assertEqual(HostPolitenessScheduler.key_for("https://example.com/", proxy="proxy-one"), "proxy-one|example.com")
+
+    def test_max_in_flight(self):
+        scheduler = HostPolitenessScheduler(max_inflight_per_host=2)
+        key = scheduler.key_for("https://example.com")
+        self.assertEqual(scheduler.try_acquire(key), 0)
+        self.assertEqual(scheduler.try_acquire(key), 0)
+        self.assertGreater(scheduler.try_acquire(key), 0)
+        # Other hosts are not affected
+        self.assertEqual(scheduler.try_acquire(scheduler.key_for("https://other.com")), 0)
+
+        scheduler.release(key, status_code=200)
+        self.assertEqual(scheduler.try_acquire(key), 0)
+
+    def test_token_bucket(self):
+        scheduler = HostPolitenessScheduler(max_inflight_per_host=0, requests_per_minute=60, burst=2)
+        key = scheduler.key_for("https://example.com")
+        self.assertEqual(scheduler.try_acquire(key), 0)
+        self.assertEqual(scheduler.try_acquire(key), 0)
+        wait = scheduler.try_acquire(key)
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 1)
+
+    def test_backoff(self):
+        scheduler = HostPolitenessScheduler(backoff_seconds=30)
+        key = scheduler.key_for("https://example.com")
+
+        scheduler.try_acquire(key)
+        scheduler.release(key, status_code=429)
+        self.assertGreater(scheduler.try_acquire(key), 25)
+
+        # Retry-After is used when given
+        key = scheduler.key_for("https://other.com")
+        scheduler.try_acquire(key)
+        scheduler.release(key, status_code=503, retry_after="5")
+        self.assertLessEqual(scheduler.try_acquire(key), 5)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("120"), 120)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_deferred_item_stays_queued(self):
+        async def run():
+            q = AsyncSignalPriorityQueue()
+            item = queuedWatchMetaData.PrioritizedItem(priority=1, item={'uuid': 'abc'})
+            await q.put(item)
+            taken = await q.get()
+            q.defer(taken, 0.05)
+            self.assertTrue(q.is_queued('abc'))
+            self.assertEqual(q.qsize(), 1)
+            again = await asyncio.wait_for(q.get(), timeout=1)
+            self.assertEqual(again.item['uuid'], 'abc')
+            self.assertFalse(q.is_queued('abc'))
+            self.assertEqual(q.qsize(), 0)
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
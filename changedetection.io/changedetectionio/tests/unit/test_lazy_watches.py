@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_lazy_watches
+
+import copy
+import pickle
+import unittest
+
+from changedetectionio.lazy_watches import LazyWatchDict
+
+
+class FakeWatch(dict):
+    pass
+
+
+class TestLazyWatchDict(unittest.TestCase):
+
+    def setUp(self):
+        self.materialised = []
+        self.watches = LazyWatchDict(self._materialise)
+        self.watches.set_unmaterialised('a', {'url': 'https://a.com'})
+        self.watches.set_unmaterialised('b', {'url': 'https://b.com'})
+
+    def _materialise(self, uuid, entity):
+        self.materialised.append(uuid)
+        return FakeWatch(entity)
+
+    def test_rehydrated_on_first_access(self):
+        # Only the UUIDs are needed
+        self.assertEqual(list(self.watches), ['a', 'b'])
+        self.assertIn('a', self.watches)
+        self.assertEqual(len(self.watches), 2)
+        self.assertEqual(self.materialised, [])
+
+        self.assertIsInstance(self.watches['a'], FakeWatch)
+        self.assertIs(self.watches.get('a'), self.watches['a'])
+        self.assertEqual(self.materialised, ['a'])
+        self.assertEqual(self.watches.pending_count, 1)
+        self.assertIsNone(self.watches.get('missing'))
+
+        self.assertTrue(all(isinstance(w, FakeWatch) for w in self.watches.values()))
+        self.assertEqual(self.materialised, ['a', 'b'])
+        self.assertEqual(self.watches.pending_count, 0)
+
+    def test_peek_does_not_rehydrate(self):
+        self.assertEqual(self.watches.peek('a'), {'url': 'https://a.com'})
+        self.assertNotIsInstance(self.watches.peek('a'), FakeWatch)
+        self.assertEqual(self.materialised, [])
+
+    def test_items_and_values_are_views(self):
+        items = self.watches.items()
+        self.assertEqual(len(items), 2)
+        self.assertEqual(self.materialised, [])
+
+        # Each watch is only rehydrated when the iteration reaches it
+        uuid, watch = next(iter(items))
+        self.assertEqual(uuid, 'a')
+        self.assertIsInstance(watch, FakeWatch)
+        self.assertEqual(self.materialised, ['a'])
+        self.assertFalse(self.watches.is_pending('a'))
+        self.assertTrue(self.watches.is_pending('b'))
+
+        # Deleting while iterating is fine
+        values = iter(self.watches.values())
+        next(values)
+        del self.watches['b']
+        self.assertEqual(list(values), [])
+
+    def test_deepcopy_keeps_unused_watches_as_loaded(self):
+        self.watches['a']
+        copied = copy.deepcopy(self.watches)
+        self.assertIs(type(copied), dict)
+        self.assertIsInstance(copied['a'], FakeWatch)
+        self.assertIs(type(copied['b']), dict)
+        self.assertEqual(self.materialised, ['a'])
+
+    def test_plain_dict_copies_are_rehydrated(self):
+        self.assertIsInstance(dict(self.watches)['b'], FakeWatch)
+        restored = pickle.loads(pickle.dumps(self.watches))
+        self.assertIs(type(restored), dict)
+        self.assertIsInstance(restored['a'], FakeWatch)
+
+    def test_replace_and_delete(self):
+        self.watches['a'] = FakeWatch(url='https://new.com')
+        self.assertEqual(self.watches['a']['url'], 'https://new.com')
+        self.assertEqual(self.materialised, [])
+
+        del self.watches['b']
+        self.assertEqual(self.watches.pending_count, 0)
+        self.assertEqual(self.watches.pop('missing', None), None)
+        with self.assertRaises(KeyError):
+            self.watches['b']
+
+
+if __name__ == '__main__':
+    unittest.main()
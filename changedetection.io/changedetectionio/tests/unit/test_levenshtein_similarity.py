@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_levenshtein_similarity
+
+import time
+import unittest
+
+from changedetectionio.conditions.plugins import levenshtein_plugin
+from changedetectionio.conditions.plugins.levenshtein_plugin import similarity, snapshot_lines, split_lines
+
+
+class FakeWatch(dict):
+    def __init__(self, snapshots):
+        super().__init__(uuid='watch-uuid')
+        self.snapshots = snapshots
+        self.reads = 0
+
+    def get_history_snapshot(self, timestamp):
+        self.reads += 1
+        return self.snapshots[timestamp]
+
+
+class TestLevenshteinSimilarity(unittest.TestCase):
+
+    def test_small_texts_are_exact(self):
+        distance, ratio, approximate = similarity(split_lines("kitten\nsat"), split_lines("sitting\nsat"))
+        self.assertFalse(approximate)
+        self.assertEqual(distance, 3)
+
+    def test_line_mode_matches_exact_for_line_edits(self):
+        a = "".join(f"Line number {i} of the page\n" for i in range(200))
+        b = a.replace("Line number 50 of", "Line number fifty of").replace("Line number 150 of the page\n", "")
+
+        exact = similarity(split_lines(a), split_lines(b))
+        by_line = similarity(split_lines(a), split_lines(b), line_mode_threshold=0)
+        self.assertTrue(by_line[2])
+        self.assertEqual(by_line[0], exact[0])
+        self.assertAlmostEqual(by_line[1], exact[1], places=3)
+
+    def test_oversized_block_is_an_upper_bound(self):
+        a = split_lines("same\n" + "a" * 100 + "\nsame\n")
+        b = split_lines("same\n" + "b" * 50 + "\nsame\n")
+        distance, ratio, approximate = similarity(a, b, line_mode_threshold=0, max_block_chars=10)
+        self.assertEqual(distance, 101)
+        self.assertGreaterEqual(ratio, 0)
+
+    def test_large_pages_are_fast(self):
+        a = "".join(f"<p>Product {i} costs {i * 3} dollars</p>\n" for i in range(40000))
+        b = a.replace("Product 20000 costs", "Product 20000 now costs")
+        start = time.time()
+        distance, ratio, approximate = similarity(split_lines(a), split_lines(b))
+        self.assertLess(time.time() - start, 2)
+        self.assertTrue(approximate)
+        self.assertEqual(distance, 4)
+        self.assertGreater(ratio, 0.99)
+
+    def test_snapshot_lines_are_cached(self):
+        levenshtein_plugin._snapshot_lines_cache.clear()
+        watch = FakeWatch({'100': "one\ntwo\n", '200': "one\nthree\n"})
+        self.assertEqual(snapshot_lines(watch, '200'), split_lines("one\nthree\n"))
+        snapshot_lines(watch, '200')
+        self.assertEqual(watch.reads, 1)
+
+        snapshot_lines(watch, '100')
+        self.assertEqual(watch.reads, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
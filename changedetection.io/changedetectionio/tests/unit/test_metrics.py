@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_metrics
+
+import unittest
+
+from changedetectionio import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_histogram_render(self):
+        h = self.registry.register(metrics.Histogram('test_seconds', 'Test', labelnames=('fetcher',), buckets=(0.1, 1.0)))
+        h.observe(0.05, fetcher='requests')
+        h.observe(0.5, fetcher='requests')
+        h.observe(5, fetcher='requests')
+
+        lines = self.registry.render().splitlines()
+        self.assertIn('# TYPE test_seconds histogram', lines)
+        self.assertIn('test_seconds_bucket{fetcher="requests",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{fetcher="requests",le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{fetcher="requests",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_sum{fetcher="requests"} 5.55', lines)
+        self.assertIn('test_seconds_count{fetcher="requests"} 3', lines)
+
+        summary = self.registry.summary()['test_seconds']['requests']
+        self.assertEqual(summary['count'], 3)
+        self.assertEqual(summary['max_seconds'], 5)
+
+        with self.assertRaises(ValueError):
+            h.observe(1, processor='text_json_diff')
+
+    def test_gauge_function(self):
+        g = self.registry.register(metrics.Gauge('test_depth', 'Test', labelnames=('queue',)))
+        g.set_function(lambda: {'update': 3, 'notification': 0})
+        self.assertIn('test_depth{queue="update"} 3', self.registry.render().splitlines())
+
+        # The queue is not there yet
+        g.set_function(lambda: 1 / 0)
+        self.assertNotIn('test_depth{', self.registry.render())
+
+    def test_label_escaping(self):
+        c = self.registry.register(metrics.Counter('test_total', 'Test', labelnames=('host',)))
+        c.inc(host='direct|"example.com"')
+        self.assertIn('test_total{host="direct|\\"example.com\\""} 1', self.registry.render())
+
+    def test_stage_timings_add_up(self):
+        timings = metrics.StageTimings()
+        timings.lap(metrics.STAGE_FILTERS)
+        timings.lap(metrics.STAGE_CHECKSUM)
+        timings.lap(metrics.STAGE_FILTERS)
+        self.assertEqual(set(timings.seconds), {metrics.STAGE_FILTERS, metrics.STAGE_CHECKSUM})
+        self.assertTrue(all(seconds >= 0 for seconds in timings.seconds.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
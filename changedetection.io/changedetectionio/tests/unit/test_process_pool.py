@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_process_pool
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from copy import deepcopy
+from unittest import mock
+
+from changedetectionio.content_fetchers.exceptions import ReplyWithContentButNoText
+from changedetectionio.model import App, Watch
+from changedetectionio.processors import process_pool
+from changedetectionio.processors.text_json_diff.processor import perform_site_check
+
+
+class FakeDatastore:
+    def __init__(self, datastore_path, watch, tags):
+        self.datastore_path = datastore_path
+        self.data = deepcopy(App.model())
+        self.data['settings']['application']['tags'] = tags
+        self.data['watching'] = {watch.get('uuid'): watch}
+
+    def get_all_tags_for_watch(self, uuid):
+        watch = self.data['watching'].get(uuid)
+        return {k: v for k, v in self.data['settings']['application']['tags'].items() if k in watch.get('tags', [])}
+
+    def get_tag_overrides_for_watch(self, uuid, attr):
+        return [x for tag in self.get_all_tags_for_watch(uuid).values() for x in tag.get(attr, [])]
+
+
+class TestProcessPool(unittest.TestCase):
+
+    def setUp(self):
+        self.datastore_path = tempfile.mkdtemp()
+        self.watch = Watch.model(datastore_path=self.datastore_path, default={'url': 'https://example.com', 'tags': ['t1']})
+        self.watch.ensure_data_dir_exists()
+        tags = {'t1': {'title': 'one', 'ignore_text': ['ignore me']}, 't2': {'title': 'two', 'ignore_text': ['not mine']}}
+        self.datastore = FakeDatastore(self.datastore_path, self.watch, tags)
+
+    def tearDown(self):
+        process_pool.shutdown_process_pool()
+        shutil.rmtree(self.datastore_path, ignore_errors=True)
+
+    def new_handler(self, content):
+        update_handler = perform_site_check(datastore=self.datastore, watch_uuid=self.watch.get('uuid'))
+        update_handler.fetcher.content = content
+        update_handler.fetcher.headers = {'content-type': 'text/html'}
+        update_handler.fetcher.status_code = 200
+        update_handler.fetcher.screenshot = b'screenshot'
+        return update_handler
+
+    def test_processing_datastore_only_has_the_watch_tags(self):
+        ds = process_pool.ProcessingDatastore(self.datastore, self.watch)
+        self.assertEqual(list(ds.data['watching'].keys()), [self.watch.get('uuid')])
+        self.assertEqual(ds.get_tag_overrides_for_watch(uuid=self.watch.get('uuid'), attr='ignore_text'), ['ignore me'])
+
+    def test_large_payload_goes_through_a_file(self):
+        payload = process_pool._Payload('x' * 100, inline_bytes=10)
+        self.assertIsNone(payload.value)
+        self.assertTrue(os.path.isfile(payload.path))
+        path = payload.path
+        self.assertEqual(payload.take(), 'x' * 100)
+        self.assertFalse(os.path.exists(path))
+
+        self.assertEqual(process_pool._Payload('small', inline_bytes=10).take(), 'small')
+
+    def test_exceptions_are_rebuilt(self):
+        e = process_pool._RaisedException(ReplyWithContentButNoText(status_code=200, url='https://example.com', has_filters=True)).rebuild()
+        self.assertIsInstance(e, ReplyWithContentButNoText)
+        self.assertEqual(e.status_code, 200)
+        self.assertTrue(e.has_filters)
+
+    def test_same_result_in_the_process_pool(self):
+        html = '<html><body><p>Hello</p><p>ignore me</p>' + ('<p>padding</p>' * 10000) + '</body></html>'
+
+        # On a thread
+        changed, update_obj, contents = asyncio.run(process_pool.run_changedetection(self.new_handler(html), watch=self.watch))
+        # The first check of a watch sets its previous_md5
+        self.watch['previous_md5'] = False
+
+        with mock.patch.dict(os.environ, {'PROCESSOR_POOL_WORKERS': '1', 'PROCESSOR_POOL_INLINE_BYTES': '1024'}):
+            update_handler = self.new_handler(html)
+            pool_result = asyncio.run(process_pool.run_changedetection(update_handler, watch=self.watch))
+
+        self.assertEqual(pool_result, (changed, update_obj, contents))
+        self.assertIn('Hello', contents)
+        # The screenshot never left this process but is still there for the worker
+        self.assertEqual(update_handler.screenshot, b'screenshot')
+
+    def test_processor_exceptions_are_raised_here(self):
+        self.watch['include_filters'] = ['#does-not-exist']
+        with mock.patch.dict(os.environ, {'PROCESSOR_POOL_WORKERS': '1'}):
+            with self.assertRaises(Exception) as raised:
+                asyncio.run(process_pool.run_changedetection(self.new_handler('<html><body>hi</body></html>'), watch=self.watch))
+        self.assertEqual(type(raised.exception).__name__, 'FilterNotFoundInResponse')
+        self.assertEqual(raised.exception.screenshot, b'screenshot')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_realtime_batcher
+
+import unittest
+
+from changedetectionio.model import Watch
+from changedetectionio.realtime.socket_server import WatchUpdateBatcher
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.emitted = []
+        self.rooms = []
+
+    def emit(self, event, data, room=None):
+        self.emitted.append((event, data))
+        self.rooms.append(room)
+
+
+class FakeDatastore:
+    def __init__(self, watches):
+        self.data = {'watching': watches}
+
+
+class TestWatchUpdateBatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.watch = Watch.model(datastore_path='/tmp', default={'url': 'https://example.com'})
+        self.uuid = self.watch.get('uuid')
+        self.socketio = FakeSocketIO()
+        self.batcher = WatchUpdateBatcher(self.socketio, FakeDatastore({self.uuid: self.watch}), interval_ms=0)
+
+    def test_burst_is_coalesced(self):
+        for i in range(10):
+            self.batcher.mark_dirty(self.uuid)
+        self.assertEqual(self.batcher.flush(), 1)
+        event, payload = self.socketio.emitted[0]
+        self.assertEqual(event, 'watch_update')
+        # First emit for a watch carries every field
+        self.assertIn('paused', payload['watch'])
+        self.assertIn('general_stats', payload)
+
+    def test_only_changed_fields_are_sent(self):
+        self.batcher.mark_dirty(self.uuid)
+        self.batcher.flush()
+
+        # Nothing changed, nothing is sent
+        self.batcher.mark_dirty(self.uuid)
+        self.assertEqual(self.batcher.flush(), 0)
+
+        self.watch['paused'] = True
+        self.batcher.mark_dirty(self.uuid)
+        self.assertEqual(self.batcher.flush(), 1)
+        event, payload = self.socketio.emitted[-1]
+        self.assertEqual(set(payload['watch'].keys()), {'paused', 'uuid', 'event_timestamp'})
+        self.assertNotIn('general_stats', payload)
+
+    def test_error_counter_is_incremental(self):
+        self.batcher.mark_dirty(self.uuid)
+        self.batcher.flush()
+        self.assertEqual(self.batcher.general_stats()['count_errors'], 0)
+
+        self.watch['last_error'] = 'Something broke'
+        self.batcher.mark_dirty(self.uuid)
+        self.batcher.flush()
+        event, payload = self.socketio.emitted[-1]
+        self.assertEqual(payload['general_stats']['count_errors'], 1)
+
+        self.batcher.forget(self.uuid)
+        self.assertEqual(self.batcher.general_stats()['count_errors'], 0)
+
+    def test_new_client_gets_general_stats_only(self):
+        self.watch['last_error'] = 'Something broke'
+        self.batcher.mark_dirty(self.uuid)
+        self.batcher.flush()
+        self.socketio.emitted.clear()
+        self.socketio.rooms.clear()
+
+        # The watch rows come from the rendered page, a later client is only sent the counters
+        self.batcher.emit_general_stats(to='new-client')
+        self.assertEqual(self.socketio.rooms, ['new-client'])
+        (event, stats), = self.socketio.emitted
+        self.assertEqual(event, 'general_stats')
+        self.assertEqual(stats['count_errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
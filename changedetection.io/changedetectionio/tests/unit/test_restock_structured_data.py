@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_restock_structured_data
+
+import glob
+import os
+import unittest
+
+from changedetectionio.processors.restock_diff.processor import detect_structured_data_syntaxes, extract_structured_data, \
+    get_itemprop_availability, _get_site_strategy
+
+JSON_LD = '<script type="application/ld+json">{"@context": "http://schema.org", "@type": "Product", "offers": {"@type": "Offer", "price": 12.50, "priceCurrency": "EUR", "availability": "http://schema.org/InStock"}}</script>'
+MICRODATA = '<div itemscope itemtype="https://schema.org/Product"><div itemprop="offers" itemscope itemtype="https://schema.org/Offer"><span itemprop="price">12.50</span><link itemprop="availability" href="https://schema.org/OutOfStock" /></div></div>'
+
+
+class TestRestockStructuredData(unittest.TestCase):
+
+    def test_detect_syntaxes(self):
+        self.assertEqual(detect_structured_data_syntaxes(f"<html><body>{JSON_LD}</body></html>"), ['json-ld'])
+        self.assertEqual(detect_structured_data_syntaxes(f"<html><body>{MICRODATA}</body></html>"), ['microdata'])
+        self.assertEqual(detect_structured_data_syntaxes("<html><body><p>Nothing here</p></body></html>"), [])
+
+    def test_same_result_as_extruct(self):
+        import extruct
+
+        examples = [f"<html><body>{JSON_LD}</body></html>", f"<html><body>{JSON_LD}{MICRODATA}</body></html>"]
+        for filename in glob.glob(os.path.join(os.path.dirname(__file__), "..", "itemprop_test_examples", "*.txt")):
+            with open(filename, 'r') as f:
+                examples.append(f"<html><body>{f.read()}</body></html>")
+
+        for html in examples:
+            data = extract_structured_data(html)
+            reference = extruct.extract(html, syntaxes=list(data.keys()))
+            self.assertEqual(data, reference)
+
+    def test_availability(self):
+        value = get_itemprop_availability(f"<html><body>{JSON_LD}</body></html>")
+        self.assertEqual(value.get('price'), 12.5)
+        self.assertEqual(value.get('availability'), 'instock')
+
+        value = get_itemprop_availability(f"<html><body>{MICRODATA}</body></html>")
+        self.assertEqual(value.get('availability'), 'outofstock')
+
+    def test_broken_json_ld_falls_back_to_extruct_for_the_site(self):
+        broken = '<html><body><script type="application/ld+json">{"@type": "Product" "offers": {"price": 10}}</script></body></html>'
+        get_itemprop_availability(broken, url="https://broken.example.com/product")
+        self.assertTrue(_get_site_strategy("broken.example.com").get('json_ld_needs_extruct'))
+        self.assertFalse(_get_site_strategy("other.example.com").get('json_ld_needs_extruct'))
+
+
+if __name__ == '__main__':
+    unittest.main()
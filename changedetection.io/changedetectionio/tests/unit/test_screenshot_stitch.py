@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_screenshot_stitch
+
+import asyncio
+import io
+import unittest
+
+from PIL import Image
+
+from changedetectionio.content_fetchers.screenshot_handler import stitch_images, stitch_images_async, get_stitch_pool, shutdown_stitch_pool
+
+
+def make_chunk(width, height, colour):
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), colour).save(output, format="JPEG")
+    return output.getvalue()
+
+
+class TestScreenshotStitch(unittest.TestCase):
+
+    def test_stitch_order_and_size(self):
+        chunks = [make_chunk(100, 50, (255, 0, 0)), make_chunk(100, 50, (0, 0, 255))]
+        result = stitch_images(chunks, original_page_height=100, capture_height=1000)
+        with Image.open(io.BytesIO(result)) as im:
+            self.assertEqual(im.size, (100, 100))
+            # Red on top, blue underneath
+            r, g, b = im.getpixel((50, 10))
+            self.assertGreater(r, 200)
+            r, g, b = im.getpixel((50, 90))
+            self.assertGreater(b, 200)
+
+    def test_stitch_trims_to_capture_height(self):
+        chunks = [make_chunk(100, 80, (255, 0, 0)), make_chunk(100, 80, (0, 0, 255))]
+        result = stitch_images(chunks, original_page_height=5000, capture_height=120)
+        with Image.open(io.BytesIO(result)) as im:
+            self.assertEqual(im.size, (100, 120))
+
+    def test_stitch_pool_is_reused(self):
+        chunks = [make_chunk(64, 32, (0, 255, 0)), make_chunk(64, 32, (0, 255, 0))]
+        try:
+            pool = get_stitch_pool()
+            for i in range(3):
+                result = asyncio.run(stitch_images_async(chunks, 64, 1000))
+                with Image.open(io.BytesIO(result)) as im:
+                    self.assertEqual(im.size, (64, 64))
+            # The same long-lived pool every time
+            self.assertIs(get_stitch_pool(), pool)
+        finally:
+            shutdown_stitch_pool()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_search_index
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from changedetectionio.search_index import WatchSearchIndex, WatchSortIndex, StoredWatch, InvalidCursor, SEARCH_MODE_EXACT, SEARCH_MODE_PARTIAL, SEARCH_MODE_PREFIX
+
+
+class TestWatchSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = WatchSearchIndex()
+        self.index.add('a', {'url': 'https://example.com/page1', 'title': 'Example Title', 'last_error': False})
+        self.index.add('b', {'url': 'https://example.org/testing', 'title': None, 'last_error': 'Connection refused'})
+        self.index.add('c', {'url': 'https://test-site.com/example', 'title': None, 'last_error': False})
+
+    def test_exact(self):
+        self.assertEqual(self.index.search('https://EXAMPLE.com/page1', mode=SEARCH_MODE_EXACT), ['a'])
+        self.assertEqual(self.index.search('example title', mode=SEARCH_MODE_EXACT), ['a'])
+        self.assertEqual(self.index.search('https://example', mode=SEARCH_MODE_EXACT), [])
+
+    def test_prefix(self):
+        self.assertEqual(self.index.search('https://example.', mode=SEARCH_MODE_PREFIX), ['a', 'b'])
+        self.assertEqual(self.index.search('connection', mode=SEARCH_MODE_PREFIX), ['b'])
+        self.assertEqual(self.index.search('refused', mode=SEARCH_MODE_PREFIX), [])
+
+    def test_partial(self):
+        # Results keep the order they were added in
+        self.assertEqual(self.index.search('example', mode=SEARCH_MODE_PARTIAL), ['a', 'b', 'c'])
+        self.assertEqual(self.index.search('refused', mode=SEARCH_MODE_PARTIAL), ['b'])
+        # Shorter than a trigram still works
+        self.assertEqual(self.index.search('g', mode=SEARCH_MODE_PARTIAL), ['a', 'b'])
+
+    def test_update_and_remove(self):
+        self.index.update('a', {'url': 'https://changed.com', 'title': None, 'last_error': False})
+        self.assertEqual(self.index.search('example title', mode=SEARCH_MODE_EXACT), [])
+        self.assertEqual(self.index.search('changed', mode=SEARCH_MODE_PARTIAL), ['a'])
+
+        # update() does not add unknown watches
+        self.index.update('z', {'url': 'https://changed.com/z'})
+        self.assertEqual(self.index.search('changed', mode=SEARCH_MODE_PARTIAL), ['a'])
+
+        self.index.remove('a')
+        self.assertEqual(self.index.search('changed', mode=SEARCH_MODE_PARTIAL), [])
+        self.assertNotIn('a', self.index)
+        self.assertEqual(len(self.index), 2)
+
+
+class FakeWatch(dict):
+    @property
+    def label(self):
+        return self.get('title') or self.get('url')
+
+    @property
+    def last_changed(self):
+        return self.get('changed', 0)
+
+
+class TestWatchSortIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = WatchSortIndex()
+        self.index.add('a', FakeWatch(url='https://b.com', last_checked=300, changed=10))
+        self.index.add('b', FakeWatch(url='https://a.com', last_checked=100, changed=0))
+        self.index.add('c', FakeWatch(url='https://c.com', title='Aaa', last_checked=200, changed=0))
+
+    def test_sorted(self):
+        self.assertEqual(self.index.uuids(), ['a', 'b', 'c'])
+        self.assertEqual(self.index.uuids('last_checked'), ['b', 'c', 'a'])
+        self.assertEqual(self.index.uuids('label'), ['c', 'b', 'a'])
+        # Descending keeps equal keys in insertion order, like a stable sort
+        self.assertEqual(self.index.uuids('last_changed', reverse=True), ['a', 'b', 'c'])
+
+    def test_update_moves_watch(self):
+        self.index.update('b', FakeWatch(url='https://a.com', last_checked=999, changed=0))
+        self.assertEqual(self.index.uuids('last_checked'), ['c', 'a', 'b'])
+        self.index.remove('a')
+        self.assertEqual(self.index.uuids('last_checked'), ['c', 'b'])
+        self.assertNotIn('a', self.index)
+
+    def test_cursor_pages(self):
+        for reverse in (False, True):
+            expected = self.index.uuids('last_changed', reverse=reverse)
+            seen = []
+            cursor = None
+            while True:
+                page, cursor = self.index.page('last_changed', reverse=reverse, limit=1, cursor=cursor)
+                seen += page
+                if not cursor:
+                    break
+            self.assertEqual(seen, expected)
+
+        page, cursor = self.index.page('last_checked', limit=5, predicate=lambda uuid: uuid != 'c')
+        self.assertEqual(page, ['b', 'a'])
+        self.assertIsNone(cursor)
+
+    def test_stored_watch(self):
+        # A watch that was not rehydrated yet (LAZY_WATCH_LOAD) is sorted from its loaded dict and history index
+        with tempfile.TemporaryDirectory() as watch_data_dir:
+            stored = StoredWatch({'url': 'https://d.com', 'last_checked': 50}, watch_data_dir)
+            self.assertEqual(stored.label, 'https://d.com')
+            self.assertEqual(stored.last_changed, 0)
+
+            with open(os.path.join(watch_data_dir, 'history.txt'), 'w') as f:
+                f.write("1000,1000.txt\n")
+            # Just one snapshot is not a change
+            self.assertEqual(stored.last_changed, 0)
+            with open(os.path.join(watch_data_dir, 'history.txt'), 'a') as f:
+                f.write("2000,2000.txt\n")
+            self.assertEqual(stored.last_changed, 2000)
+            self.assertEqual(stored.history, {'1000': os.path.join(watch_data_dir, '1000.txt'),
+                                              '2000': os.path.join(watch_data_dir, '2000.txt')})
+
+            self.index.add('d', stored)
+            self.assertEqual(self.index.uuids('last_checked'), ['d', 'b', 'c', 'a'])
+            self.assertEqual(self.index.uuids('last_changed', reverse=True), ['d', 'a', 'b', 'c'])
+
+    def test_pickle(self):
+        # The datastore (and so the index) is pickled when the preview is rendered in a worker process
+        restored = pickle.loads(pickle.dumps(self.index))
+        self.assertEqual(restored.uuids('last_checked'), ['b', 'c', 'a'])
+        restored.remove('a')
+        self.assertEqual(len(restored), 2)
+
+    def test_cursor_must_match_sort(self):
+        page, cursor = self.index.page('last_checked', limit=1)
+        with self.assertRaises(InvalidCursor):
+            self.index.page('label', limit=1, cursor=cursor)
+        with self.assertRaises(InvalidCursor):
+            self.index.page('last_checked', limit=1, cursor='not-a-cursor')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_skip_unchanged
+
+import shutil
+import tempfile
+import unittest
+from copy import deepcopy
+import uuid as uuid_builder
+
+from changedetectionio.model import App, Watch
+from changedetectionio.processors.checksum import normalise_volatile_tokens
+from changedetectionio.processors.text_json_diff.processor import perform_site_check
+
+
+class FakeDatastore:
+    def __init__(self, watch):
+        self.data = deepcopy(App.model())
+        self.data['watching'] = {watch.get('uuid'): watch}
+
+    def get_all_tags_for_watch(self, uuid):
+        return {}
+
+    def get_tag_overrides_for_watch(self, uuid, attr):
+        return []
+
+
+PAGE = """<html><head><meta name="csrf-token" content="{token}"><script nonce="{token}" src="/app.js?v={ts}"></script></head>
+<body><form><input type="hidden" name="authenticity_token" value="{token}"></form><p>Some text {text}</p></body></html>"""
+
+
+class TestSkipUnchanged(unittest.TestCase):
+
+    def setUp(self):
+        self.datastore_path = tempfile.mkdtemp()
+        self.watch = Watch.model(datastore_path=self.datastore_path, default={'url': 'https://example.com'})
+        self.watch.ensure_data_dir_exists()
+        self.datastore = FakeDatastore(self.watch)
+
+    def tearDown(self):
+        shutil.rmtree(self.datastore_path, ignore_errors=True)
+
+    def check(self, html):
+        update_handler = perform_site_check(datastore=self.datastore, watch_uuid=self.watch.get('uuid'))
+        update_handler.fetcher.content = html
+        update_handler.fetcher.headers = {'content-type': 'text/html'}
+        update_handler.fetcher.status_code = 200
+        changed, update_obj, contents = update_handler.run_changedetection(watch=self.watch)
+        self.watch.update(update_obj)
+        if changed or not self.watch.history_n:
+            self.watch.save_history_text(contents=contents, timestamp=self.watch.history_n + 1, snapshot_id=str(uuid_builder.uuid4()))
+        return changed, contents
+
+    def test_volatile_tokens(self):
+        a = normalise_volatile_tokens(PAGE.format(token='abc123', ts=1700000000, text='one'))
+        b = normalise_volatile_tokens(PAGE.format(token='zzz999', ts=1700000999, text='one'))
+        self.assertEqual(a, b)
+        self.assertNotIn('abc123', a)
+        # Text is never touched
+        self.assertNotEqual(a, normalise_volatile_tokens(PAGE.format(token='abc123', ts=1700000000, text='two')))
+
+    def test_unchanged_content_skips_the_filters(self):
+        changed, contents = self.check(PAGE.format(token='abc', ts=1700000000, text='one'))
+        self.assertIn('Some text one', contents)
+
+        # Only the tokens changed, the filters are not run at all
+        changed, contents = self.check(PAGE.format(token='def', ts=1700000001, text='one'))
+        self.assertFalse(changed)
+        self.assertEqual(contents, b'')
+
+        # The text changed
+        changed, contents = self.check(PAGE.format(token='def', ts=1700000001, text='two'))
+        self.assertTrue(changed)
+        self.assertIn('Some text two', contents)
+
+    def test_changed_settings_run_the_filters(self):
+        html = PAGE.format(token='abc', ts=1700000000, text='one')
+        self.check(html)
+        self.watch['ignore_text'] = ['nothing']
+        changed, contents = self.check(html)
+        self.assertFalse(changed)
+        self.assertIn('Some text one', contents)
+
+        self.datastore.data['settings']['application']['global_ignore_text'] = ['Some text']
+        changed, contents = self.check(html)
+        self.assertIn('Some text one', contents)
+
+    def test_source_watches_keep_the_tokens(self):
+        self.watch['url'] = 'source:https://example.com'
+        self.check(PAGE.format(token='abc', ts=1700000000, text='one'))
+        changed, contents = self.check(PAGE.format(token='def', ts=1700000000, text='one'))
+        self.assertTrue(changed)
+
+    def test_include_filters_keep_the_tokens(self):
+        # The filter can select the token itself
+        self.watch['include_filters'] = ['//input[@name="authenticity_token"]/@value']
+        self.check(PAGE.format(token='abc', ts=1700000000, text='one'))
+        changed, contents = self.check(PAGE.format(token='def', ts=1700000000, text='one'))
+        self.assertTrue(changed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_snapshot_cache
+
+import os
+import shutil
+import tempfile
+import unittest
+import uuid as uuid_builder
+
+from changedetectionio.model import Watch
+from changedetectionio.snapshot_cache import SnapshotCache, snapshot_cache
+
+
+class TestSnapshotCache(unittest.TestCase):
+
+    def test_bounded_by_size(self):
+        cache = SnapshotCache(max_bytes=100)
+        cache.put('a', 1, 'x' * 25)
+        cache.put('a', 2, 'x' * 25)
+        cache.put('a', 3, 'x' * 25)
+        # Touch 1 so 2 is the least recently used
+        self.assertEqual(cache.get('a', '1'), 'x' * 25)
+        cache.put('a', 4, 'x' * 25)
+        cache.put('a', 5, 'x' * 25)
+        self.assertIsNone(cache.get('a', 2))
+        self.assertIsNotNone(cache.get('a', 1))
+        self.assertLessEqual(cache.get_stats()['bytes'], 100)
+
+        # Too large to be worth caching
+        cache.put('a', 6, 'x' * 60)
+        self.assertIsNone(cache.get('a', 6))
+
+    def test_discard(self):
+        cache = SnapshotCache(max_bytes=100)
+        cache.put('a', 1, 'one')
+        cache.put('a', 2, 'two')
+        cache.put('b', 1, 'three')
+        cache.discard('a', 1)
+        self.assertIsNone(cache.get('a', 1))
+        cache.discard('a')
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get_stats()['bytes'], len('three'))
+
+
+class TestWatchSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        snapshot_cache.clear()
+        self.datastore_path = tempfile.mkdtemp()
+        self.watch = Watch.model(datastore_path=self.datastore_path, default={})
+        self.watch.ensure_data_dir_exists()
+        for t in (100, 200, 300):
+            # Long enough to be brotli compressed
+            self.watch.save_history_text(contents=f"snapshot {t}\n" * 200, timestamp=t, snapshot_id=str(uuid_builder.uuid4()))
+
+    def tearDown(self):
+        shutil.rmtree(self.datastore_path, ignore_errors=True)
+
+    def test_batch_read_and_cache(self):
+        snapshots = self.watch.get_history_snapshots(['200', '300'])
+        self.assertEqual(list(snapshots.keys()), ['200', '300'])
+        self.assertTrue(snapshots['300'].startswith('snapshot 300'))
+
+        # Served from the cache from now on, even without the files
+        for f in os.listdir(self.watch.watch_data_dir):
+            if f != 'history.txt':
+                os.unlink(os.path.join(self.watch.watch_data_dir, f))
+        self.assertEqual(self.watch.get_history_snapshot('200'), snapshots['200'])
+
+        with self.assertRaises(FileNotFoundError):
+            self.watch.get_history_snapshot('100')
+
+        # Missing files and unknown timestamps are left out
+        snapshots = self.watch.get_history_snapshots(['100', '200', '999'], skip_unreadable=True)
+        self.assertEqual(list(snapshots.keys()), ['200'])
+
+    def test_clear_watch_forgets_the_snapshots(self):
+        self.watch.get_history_snapshot('300')
+        self.watch.clear_watch()
+        self.watch.save_history_text(contents="new content", timestamp=300, snapshot_id=str(uuid_builder.uuid4()))
+        self.assertEqual(self.watch.get_history_snapshot('300'), "new content")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# run from dir above changedetectionio/ dir
+# python3 -m unittest changedetectionio.tests.unit.test_storage_compression
+
+import os
+import shutil
+import tempfile
+import unittest
+import uuid as uuid_builder
+import zlib
+from unittest import mock
+
+import brotli
+
+from changedetectionio import storage_compression
+from changedetectionio.model import Watch
+from changedetectionio.snapshot_cache import snapshot_cache
+
+
+class TestStorageCompression(unittest.TestCase):
+
+    def test_formats_stay_readable(self):
+        data = ("<html><body>" + "Some repeating text. " * 500 + "</body></html>").encode('utf-8')
+        for artifact in (storage_compression.ARTIFACT_SNAPSHOT_TEXT, storage_compression.ARTIFACT_LAST_FETCHED_TEXT, storage_compression.ARTIFACT_FETCHED_HTML):
+            self.assertEqual(brotli.decompress(storage_compression.compress(artifact, data)), data)
+        self.assertEqual(zlib.decompress(storage_compression.compress(storage_compression.ARTIFACT_XPATH_DATA, data)), data)
+
+    def test_levels_from_env(self):
+        self.assertEqual(storage_compression.level_for(storage_compression.ARTIFACT_FETCHED_HTML), 3)
+        with mock.patch.dict(os.environ, {'COMPRESSION_FETCHED_HTML_QUALITY': '99', 'COMPRESSION_XPATH_DATA_LEVEL': '-1'}):
+            self.assertEqual(storage_compression.level_for(storage_compression.ARTIFACT_FETCHED_HTML), 11)
+            self.assertEqual(storage_compression.level_for(storage_compression.ARTIFACT_XPATH_DATA), 0)
+
+
+class TestRecompressColdSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        snapshot_cache.clear()
+        self.datastore_path = tempfile.mkdtemp()
+        self.watch = Watch.model(datastore_path=self.datastore_path, default={})
+        self.watch.ensure_data_dir_exists()
+        self.contents = {}
+        with mock.patch.dict(os.environ, {'COMPRESSION_SNAPSHOT_TEXT_QUALITY': '0'}):
+            for t in (1000, 2000, 3000):
+                self.contents[str(t)] = "".join(f"Line {i} of snapshot {t} with some words that repeat\n" for i in range(500))
+                self.watch.save_history_text(contents=self.contents[str(t)], timestamp=t, snapshot_id=str(uuid_builder.uuid4()))
+
+    def tearDown(self):
+        shutil.rmtree(self.datastore_path, ignore_errors=True)
+
+    def test_only_cold_snapshots_once(self):
+        sizes = {k: os.path.getsize(v) for k, v in self.watch.history.items()}
+
+        saved = storage_compression.recompress_cold_snapshots(self.watch, older_than_seconds=500, quality=11, now=2600)
+        self.assertGreater(saved, 0)
+        new_sizes = {k: os.path.getsize(v) for k, v in self.watch.history.items()}
+        self.assertLess(new_sizes['1000'], sizes['1000'])
+        self.assertLess(new_sizes['2000'], sizes['2000'])
+        # Not old enough yet
+        self.assertEqual(new_sizes['3000'], sizes['3000'])
+
+        snapshot_cache.clear()
+        for k, text in self.contents.items():
+            self.assertEqual(self.watch.get_history_snapshot(k), text)
+
+        # Already done
+        self.assertEqual(storage_compression.recompress_cold_snapshots(self.watch, older_than_seconds=500, quality=11, now=2600), 0)
+
+    def test_disabled_by_default(self):
+        self.assertEqual(storage_compression.recompress_cold_snapshots(self.watch), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
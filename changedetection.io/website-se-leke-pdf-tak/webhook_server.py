@@ -34,7 +34,7 @@ if str(graphrag_src) not in sys.path:
 # These imports MUST come AFTER the sys.path modification to ensure
 # Python can find them.
 try:
-    from pdf_reader import parse_pdf
+    from pdf_reader import iter_sections, save_to_jsonl
     from ingest import GraphRAGIngestion
     from json_merger import JSONMerger
     from query import GraphRAGQuery
@@ -53,19 +53,22 @@ CORS(app)
 # or found in your system's PATH.
 WKHTMLTOPDF_PATH = r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
 
+# Processes used to parse the content pages of large PDFs, one per CPU unless PDF_PARSE_WORKERS is set
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", os.cpu_count() or 1))
+
 # Define file paths for output
 OUTPUT_DIR = Path(__file__).parent / "output"
-MASTER_JSON_PATH = OUTPUT_DIR / "master_structured_content.json"
+# The sections are kept as JSON Lines, one per line, so they are never all held in memory
+MASTER_JSONL_PATH = OUTPUT_DIR / "master_structured_content.jsonl"
 CHANGES_PDF_PATH = OUTPUT_DIR / "changes.pdf"
-CHANGES_JSON_PATH = OUTPUT_DIR / "changes.json"
+CHANGES_JSONL_PATH = OUTPUT_DIR / "changes.jsonl"
 
 # --- HELPER FUNCTIONS ---
 def initialize_master_json():
-    """Creates an empty master JSON file if it doesn't exist."""
-    if not MASTER_JSON_PATH.exists():
-        print("Master JSON not found. Creating a new one.")
-        with open(MASTER_JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump({"title": "Master Document", "sections": []}, f, indent=2)
+    """Creates an empty master JSON Lines file if it doesn't exist."""
+    if not MASTER_JSONL_PATH.exists():
+        print("Master JSON Lines file not found. Creating a new one.")
+        MASTER_JSONL_PATH.touch()
 
 # --- FLASK WEBHOOK ---
 @app.route("/webhook", methods=["POST"])
@@ -109,28 +112,22 @@ def webhook():
         print(f"❌ An unexpected error occurred during PDF generation: {e}")
         return "An unexpected error occurred during PDF generation", 500
 
-    # 2. Parse the changed PDF to structured JSON
+    # 2. Parse the changed PDF to structured JSON Lines, each section is written as soon as it is parsed
     try:
         print("=== Parsing Changes PDF ===")
-        document = parse_pdf(str(CHANGES_PDF_PATH))
-        structured_json = {
-            "title": document.title,
-            "sections": [s.__dict__ for s in document.sections] # Convert section objects to dictionaries
-        }
-        with open(CHANGES_JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(structured_json, f, indent=2)
-        print(f"✓ Changes JSON written to {CHANGES_JSON_PATH}")
+        count = save_to_jsonl(iter_sections(str(CHANGES_PDF_PATH), workers=PDF_PARSE_WORKERS), str(CHANGES_JSONL_PATH))
+        print(f"✓ {count} sections of changes written to {CHANGES_JSONL_PATH}")
     except Exception as e:
         print(f"❌ Parsing PDF failed: {e}")
         return "PDF parsing failed", 500
 
-    # 3. Merge the changes JSON into the master JSON
+    # 3. Merge the changes into the master file
     try:
-        print("=== Merging JSON files ===")
+        print("=== Merging JSON Lines files ===")
         merger = JSONMerger()
-        # The merge method updates MASTER_JSON_PATH with the merged content
-        merger.merge(str(MASTER_JSON_PATH), str(CHANGES_JSON_PATH), str(MASTER_JSON_PATH))
-        print(f"✓ Changes merged into {MASTER_JSON_PATH}")
+        # The merge method updates MASTER_JSONL_PATH with the merged content
+        merger.merge(str(MASTER_JSONL_PATH), str(CHANGES_JSONL_PATH), str(MASTER_JSONL_PATH))
+        print(f"✓ Changes merged into {MASTER_JSONL_PATH}")
     except Exception as e:
         print(f"❌ JSON merging failed: {e}")
         return "JSON merging failed", 500
@@ -140,7 +137,7 @@ def webhook():
         print("=== Updating Neo4j Graph ===")
         ingestor = GraphRAGIngestion()
         # The update_graph method will handle incremental updates
-        ingestor.update_graph(str(MASTER_JSON_PATH))
+        ingestor.update_graph(str(MASTER_JSONL_PATH))
         ingestor.close() # Ensure the Neo4j connection is closed
         print("✓ Graph update complete")
     except Exception as e: